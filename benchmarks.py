@@ -0,0 +1,608 @@
+from lexer import LEXERS, Span
+from parser import Parser, PARSERS
+from cache import ProgramCache
+from interpreter import Value, Interpreter, numpy
+import main, sys, tempfile, time, tracemalloc
+
+###########################################
+# SAMPLE PROGRAMS
+###########################################
+
+def generate_script(function_count=500):
+	lines = []
+	for i in range(function_count):
+		lines.append(f'# helper number {i}')
+		lines.append(f'fn helper_{i}(a, b)')
+		lines.append(f'\tlet total = a * {i} + b / 2.5; let label = "text {i}"')
+		lines.append(f'\tif total >= 10 and a != b then return [a, b, total] elif total < 0 then total else total - 1')
+		lines.append(f'\tfor j = 0 to {i + 1} step 2 then let total = total + j ^ 2')
+		lines.append(f'\twhile not total <= 0 then let total = total - 1')
+		lines.append('\treturn total')
+		lines.append('end')
+		lines.append(f'let value_{i} = helper_{i}({i}, {i + 1}); let f_{i} = fn (x) -> x + {i}')
+	return '\n'.join(lines) + '\n'
+
+LOOP_PROGRAM = '''
+let total = 0
+for i = 0 to 20000 then
+	let total = total + i * 2 - 1
+	if total > 1000000 then let total = total / 2
+end
+let count = 0
+while count < 10000 then let count = count + 1
+'''
+
+CALL_PROGRAM = '''
+fn fib(n)
+	if n < 2 then return n
+	return fib(n - 1) + fib(n - 2)
+end
+fn add(a, b) -> a + b
+let total = 0
+for i = 0 to 3000 then let total = add(total, i)
+fib(15)
+'''
+
+DEEP_CALL_PROGRAM = '''
+fn depth(n) -> if n == 0 then 0 else depth(n - 1) + (if True then 1 else 0)
+for i = 0 to 100 then depth(60)
+'''
+
+BUILTIN_PROGRAM = '''
+let items = []
+for i = 0 to 5000 then append(items, i)
+let count = 0
+for i = 0 to 5000 then let count = count + is_number(items / i)
+'''
+
+TAIL_CALL_PROGRAM = '''
+fn count_down(n, total) -> if n == 0 then total else count_down(n - 1, total + n)
+count_down(20000, 0)
+'''
+
+RECURSION_PROGRAM = '''
+fn depth(n) -> if n == 0 then 0 else 1 + depth(n - 1)
+depth(20000)
+'''
+
+COUNTED_LOOP_PROGRAM = '''
+for i = 0 to 1000000 then i * 2
+'''
+
+FIBONACCI_PROGRAM = '''
+fn fib(n) -> if n < 2 then n else fib(n - 1) + fib(n - 2)
+fib(20)
+'''
+
+MEMO_FIBONACCI_PROGRAM = '''
+let fib = memo(fn fib(n) -> if n < 2 then n else fib(n - 1) + fib(n - 2))
+fib(20)
+'''
+
+GUARD_PROGRAM = '''
+fn weight(n)
+	let total = 0
+	for j = 0 to 40 then let total = total + j * n
+	return total
+end
+let matches = 0
+for i = 0 to 3000 then
+	if i < 100 and weight(i) > 1000 then let matches = matches + 1
+end
+let i = 0
+while i < 3000 or weight(i) < 0 then let i = i + 1
+'''
+
+EAGER_GUARD_PROGRAM = '''
+fn weight(n)
+	let total = 0
+	for j = 0 to 40 then let total = total + j * n
+	return total
+end
+let matches = 0
+for i = 0 to 3000 then
+	let is_heavy = weight(i) > 1000
+	if i < 100 and is_heavy then let matches = matches + 1
+end
+let i = 0
+let is_negative = weight(i) < 0
+while i < 3000 or is_negative then
+	let i = i + 1
+	let is_negative = weight(i) < 0
+end
+'''
+
+def list_program(size):
+	return f'''
+let items = []
+for i = 0 to {size} then let items = items <= i
+let joined = []
+for i = 0 to {size} then let joined = joined + [i, i]
+let total = 0
+for i = 0 to {size} then let total = total + items / i
+for i = 0 to {size} then let items = items - (-1)
+'''
+
+def removal_program(index, removals):
+	return f'for i = 0 to {removals} then let items = items - {index}'
+
+LIST_BUILTIN_SIZE = 10000
+SORT_SIZE = 500
+
+LIST_BUILTIN_SETUP = f'''
+let items = range(0, {LIST_BUILTIN_SIZE}, 1)
+let descending = range({SORT_SIZE}, 0, -1)
+'''
+
+# Each built-in against the loop a script would need without it, both working on the lists above
+LIST_BUILTIN_CASES = [
+	('map', 'let result = map(items, fn(x) -> x * 2)', f'''
+let result = []
+for i = 0 to {LIST_BUILTIN_SIZE} then append(result, items / i * 2)
+'''),
+	('filter', f'let result = filter(items, fn(x) -> x < {LIST_BUILTIN_SIZE // 2})', f'''
+let result = []
+for i = 0 to {LIST_BUILTIN_SIZE} then if items / i < {LIST_BUILTIN_SIZE // 2} then append(result, items / i)
+'''),
+	('reduce', 'let result = reduce(items, fn(total, x) -> total + x, 0)', f'''
+let result = 0
+for i = 0 to {LIST_BUILTIN_SIZE} then let result = result + items / i
+'''),
+	('sum', 'let result = sum(items)', f'''
+let result = 0
+for i = 0 to {LIST_BUILTIN_SIZE} then let result = result + items / i
+'''),
+	('sort', 'let result = sort(descending)', f'''
+let remaining = descending
+let result = []
+for count = 0 to {SORT_SIZE} then
+	let smallest = 0
+	for i = 1 to len(remaining) then if remaining / i < remaining / smallest then let smallest = i
+	append(result, remaining / smallest)
+	let remaining = remaining - smallest
+end
+'''),
+	('slice', f'let result = slice(items, 100, {LIST_BUILTIN_SIZE - 100})', f'''
+let result = []
+for i = 100 to {LIST_BUILTIN_SIZE - 100} then append(result, items / i)
+'''),
+	('range', f'let result = range(0, {LIST_BUILTIN_SIZE}, 1)', f'''
+let result = []
+for i = 0 to {LIST_BUILTIN_SIZE} then append(result, i)
+'''),
+	('reverse', 'let result = reverse(items)', f'''
+let result = []
+for i = {LIST_BUILTIN_SIZE - 1} to -1 step -1 then append(result, items / i)
+'''),
+	('index_of', f'let result = index_of(items, {LIST_BUILTIN_SIZE - 1})', f'''
+let result = -1
+for i = 0 to {LIST_BUILTIN_SIZE} then
+	if items / i == {LIST_BUILTIN_SIZE - 1} then
+		let result = i
+		break
+	end
+end
+'''),
+]
+
+def report_program(size):
+	return f'''
+let report = ""
+for i = 0 to {size} then let report = report + "row " + "=" * 40 + "\\n"
+'''
+
+def pairs_program(size, lookups):
+	return f'''
+fn find(pairs, key)
+	for index = 0 to {size} then
+		let pair = pairs / index
+		if pair / 0 == key then return pair / 1
+	end
+	return null
+end
+let pairs = []
+for i = 0 to {size} then let pairs = pairs <= [i * 7, i]
+let total = 0
+for i = 0 to {lookups} then let total = total + find(pairs, (i * {size // lookups} + 1) * 7)
+'''
+
+def map_program(size, lookups):
+	return f'''
+let entries = {{}}
+for i = 0 to {size} then set(entries, i * 7, i)
+let total = 0
+for i = 0 to {lookups} then let total = total + entries / ((i * {size // lookups} + 1) * 7)
+'''
+
+def squares_program(size, is_generator):
+	# Both versions add up the same squares; one builds them all first, the other makes each on demand
+	make_squares = 'for i = 0 to n then yield i * i' if is_generator else '''let values = []
+	for i = 0 to n then append(values, i * i)
+	return values'''
+	return f'''
+fn squares(n)
+	{make_squares}
+end
+let total = 0
+for value in squares({size}) then let total = total + value
+'''
+
+LIST_MATH_PROGRAM = '''
+let scaled = []
+for i = 0 to 100000 then append(scaled, i * 2.5 + 1)
+let total = 0
+for i = 0 to 100000 then let total = total + scaled / i
+'''
+
+ARRAY_MATH_PROGRAM = '''
+let scaled = arange(0, 100000, 1) * 2.5 + 1
+let total = sum(scaled)
+'''
+
+OPTIMIZER_PROGRAM = '''
+fn area(r) -> math_pi * r * r
+let radius = 3
+let total = 0
+for i = 0 to 20000 then
+	let total = total + area(radius) + i * radius * 60 * 60
+	if False then print(total)
+end
+'''
+
+###########################################
+# HELPERS
+###########################################
+
+def measure(function, repeat=5):
+	best = None
+	for _ in range(repeat):
+		start = time.perf_counter()
+		function()
+		elapsed = time.perf_counter() - start
+		best = elapsed if best is None else min(best, elapsed)
+	return best
+
+def measure_peak_memory(function):
+	tracemalloc.start()
+	function()
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return peak
+
+def count_allocations(function):
+	# Constructors show up as calls to the outermost __init__, while the field by field fast paths
+	# of the virtual machine and the closure compiler call object.__new__ directly and only build numbers
+	counts = {}
+
+	def profile(frame, event, argument):
+		if event == 'call' and frame.f_code.co_name == '__init__':
+			value = frame.f_locals.get('self')
+			if isinstance(value, Value) and type(value).__init__.__code__ is frame.f_code:
+				counts[type(value).__name__] = counts.get(type(value).__name__, 0) + 1
+		elif event == 'c_call' and argument is object.__new__:
+			counts['Number'] = counts.get('Number', 0) + 1
+
+	sys.setprofile(profile)
+	try:
+		function()
+	finally:
+		sys.setprofile(None)
+	return counts
+
+def count_visits(function):
+	visits = [0]
+	visit = Interpreter.visit
+
+	def counting_visit(self, node, context):
+		visits[0] += 1
+		return visit(self, node, context)
+
+	Interpreter.visit = counting_visit
+	try:
+		function()
+	finally:
+		Interpreter.visit = visit
+	return visits[0]
+
+def count_nodes(node):
+	count = 0
+	pending = [node]
+	while pending:
+		item = pending.pop()
+		if isinstance(item, (list, tuple)):
+			pending.extend(item)
+		elif isinstance(item, Span):
+			count += 1
+			for cls in type(item).__mro__:
+				for name in getattr(cls, '__slots__', ()):
+					pending.append(getattr(item, name, None))
+	return count
+
+def report(title, timings):
+	print(title)
+	baseline = None
+	for name, elapsed in timings:
+		baseline = baseline or elapsed
+		print(f'  {name:<24}{elapsed * 1000:>10.2f} ms{baseline / elapsed:>8.2f}x')
+
+###########################################
+# BENCHMARKS
+###########################################
+
+def benchmark_lexers():
+	text = generate_script()
+	timings = []
+	for name, lexer_class in LEXERS.items():
+		timings.append((name, measure(lambda: lexer_class('<benchmark>', text).make_tokens())))
+	report(f'lexers ({len(text.splitlines())} lines)', timings)
+
+def benchmark_parsers():
+	text = generate_script()
+	tokens, _ = LEXERS['table']('<benchmark>', text).make_tokens()
+	timings = []
+	for name, parser_class in PARSERS.items():
+		timings.append((name, measure(lambda: parser_class(tokens).parse())))
+	report(f'parsers ({len(tokens)} tokens)', timings)
+
+def benchmark_cache():
+	text = generate_script()
+
+	with tempfile.TemporaryDirectory() as directory:
+		cache = ProgramCache(directory)
+		cache.store('<benchmark>', text, main.parse_program('<benchmark>', text)[0])
+		timings = [
+			('lex + parse', measure(lambda: main.parse_program('<benchmark>', text))),
+			('cache hit', measure(lambda: cache.load('<benchmark>', text)))
+		]
+	report(f'program loading ({len(text.splitlines())} lines)', timings)
+
+def benchmark_streaming():
+	text = generate_script(2000)
+
+	def parse_token_list():
+		tokens, _ = LEXERS['table']('<benchmark>', text).make_tokens()
+		Parser(tokens).parse()
+
+	def parse_token_stream():
+		Parser(LEXERS['table']('<benchmark>', text).generate_tokens()).parse()
+
+	print(f'lex + parse peak memory ({len(text.splitlines())} lines)')
+	for name, function in (('token list', parse_token_list), ('token stream', parse_token_stream)):
+		print(f'  {name:<24}{measure_peak_memory(function) / 1024 / 1024:>10.2f} MiB')
+
+def benchmark_memory():
+	text = generate_script(2000)
+	result = []
+
+	def parse():
+		result.append(Parser(LEXERS['table']('<benchmark>', text).generate_tokens()).parse().node)
+
+	tracemalloc.start()
+	parse()
+	retained, _ = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	node_count = count_nodes(result[0])
+	print(f'parsed program memory ({len(text.splitlines())} lines)')
+	print(f'  {"retained":<24}{retained / 1024 / 1024:>10.2f} MiB')
+	print(f'  {"tokens + nodes":<24}{node_count:>10}')
+	print(f'  {"bytes per object":<24}{retained / node_count:>10.1f}')
+
+def benchmark_engines():
+	for title, text in (('loop-heavy', LOOP_PROGRAM), ('call-heavy', CALL_PROGRAM), ('deep-call', DEEP_CALL_PROGRAM), ('builtin-heavy', BUILTIN_PROGRAM)):
+		node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+		timings = []
+		for name, engine in main.ENGINES.items():
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			timings.append((name, measure(lambda: engine(node, context))))
+		report(f'engines ({title})', timings)
+
+def benchmark_recursion():
+	for title, text in (('tail calls', TAIL_CALL_PROGRAM), ('deep recursion', RECURSION_PROGRAM)):
+		node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+		print(f'engines ({title}, limit {sys.getrecursionlimit()})')
+		for name, engine in main.ENGINES.items():
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			try:
+				print(f'  {name:<24}{measure(lambda: engine(node, context), 1) * 1000:>10.2f} ms')
+			except RecursionError:
+				print(f'  {name:<24}{"RecursionError":>13}')
+
+def benchmark_interpreter():
+	# Compiled loops skip the tree walker, so its throughput is measured with the loop compiler detached
+	print('interpreter node throughput')
+	Interpreter.loop_compiler = None
+	try:
+		for title, text in (('loop-heavy', LOOP_PROGRAM), ('call-heavy', CALL_PROGRAM), ('deep-call', DEEP_CALL_PROGRAM)):
+			node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			visits = count_visits(lambda: main.interpret(node, context))
+			elapsed = measure(lambda: main.interpret(node, context))
+			print(f'  {title:<24}{visits / elapsed / 1000000:>10.2f} M nodes/s  ({visits} nodes in {elapsed * 1000:.2f} ms)')
+	finally:
+		Interpreter.loop_compiler = main.loop_compiler
+
+def benchmark_jit():
+	for title, text in (('loop-heavy', LOOP_PROGRAM), ('counted loop', COUNTED_LOOP_PROGRAM)):
+		node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+		timings = []
+		for name, loop_compiler in (('tree walker', None), ('loop compiler', main.loop_compiler)):
+			Interpreter.loop_compiler = loop_compiler
+			main.loop_compiler.reset()
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			timings.append((name, measure(lambda: main.interpret(node, context), 1)))
+		report(f'interpreter ({title}, threshold {main.loop_compiler.threshold})', timings)
+
+		for loop in main.loop_compiler.statistics():
+			print(f'  {loop["kind"]} loop at {loop["loop"]:<12}{loop["compiled_iterations"]:>10} compiled iterations, {loop["saved_time"] * 1000:.2f} ms saved')
+	Interpreter.loop_compiler = main.loop_compiler
+
+def benchmark_allocations():
+	for title, text in (('loop-heavy', LOOP_PROGRAM), ('call-heavy', CALL_PROGRAM)):
+		node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+		print(f'value allocations ({title})')
+		for name, engine in main.ENGINES.items():
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			counts = count_allocations(lambda: engine(node, context))
+			details = ', '.join(f'{class_name} {count}' for class_name, count in sorted(counts.items()))
+			print(f'  {name:<24}{sum(counts.values()):>10}  ({details})')
+
+def benchmark_loops():
+	node = main.Resolver().resolve(main.parse_program('<benchmark>', COUNTED_LOOP_PROGRAM)[0])
+	print('counted loop (1000000 iterations)')
+	for name, engine in main.ENGINES.items():
+		context = main.Context('<program>')
+		context.symbol_table = main.global_symbol_table
+		elapsed = measure(lambda: engine(node, context), 1)
+		peak = measure_peak_memory(lambda: engine(node, context))
+		print(f'  {name:<24}{elapsed * 1000:>10.2f} ms{peak / 1024:>10.1f} KiB peak')
+
+def benchmark_memo():
+	for name in main.ENGINES:
+		timings = []
+		for title, text in (('plain', FIBONACCI_PROGRAM), ('memo', MEMO_FIBONACCI_PROGRAM)):
+			node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			timings.append((title, measure(lambda: main.ENGINES[name](node, context))))
+		report(f'fib(20) ({name})', timings)
+
+def benchmark_optimizer():
+	main.optimizer.reset()
+	main.optimizer.optimize(main.parse_program('<benchmark>', generate_script())[0], 2)
+	print('optimizer passes (500 function script)')
+	for optimization_pass in main.optimizer.statistics():
+		print(f'  {optimization_pass["pass"]:<24}{optimization_pass["time"] * 1000:>10.2f} ms  (-O{optimization_pass["level"]})')
+
+	for name, engine in main.ENGINES.items():
+		timings = []
+		for level in (0, 1, 2):
+			node = main.Resolver().resolve(main.optimizer.optimize(main.parse_program('<benchmark>', OPTIMIZER_PROGRAM)[0], level))
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			timings.append((f'-O{level}', measure(lambda: engine(node, context), 3)))
+		report(f'optimization levels ({name})', timings)
+
+def benchmark_short_circuit():
+	for name, engine in main.ENGINES.items():
+		timings = []
+		for title, text in (('both sides', EAGER_GUARD_PROGRAM), ('short-circuit', GUARD_PROGRAM)):
+			node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			timings.append((title, measure(lambda: engine(node, context), 3)))
+		report(f'guarded loops ({name})', timings)
+
+def benchmark_lists():
+	print('list operations (interpreter, four loops of size operations)')
+	for size in (1000, 10000, 100000):
+		node = main.Resolver().resolve(main.parse_program('<benchmark>', list_program(size))[0])
+		context = main.Context('<program>')
+		context.symbol_table = main.global_symbol_table
+		elapsed = measure(lambda: main.interpret(node, context), 1)
+		print(f'  {size:<24}{elapsed * 1000:>10.2f} ms{elapsed / (4 * size) * 1e6:>8.2f} us per operation')
+
+	# Removing the last element is cheap, while removing one from the middle copies the list
+	removals = 100
+	print(f'list removals (interpreter, {removals} removals from a list of size elements)')
+	for size in (1000, 10000, 100000):
+		for title, index in (('last', -1), ('middle', size // 2)):
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			main.interpret(main.Resolver().resolve(main.parse_program('<benchmark>', f'let items = range(0, {size}, 1)')[0]), context)
+			node = main.Resolver().resolve(main.parse_program('<benchmark>', removal_program(index, removals))[0])
+			elapsed = measure(lambda: main.interpret(node, context), 1)
+			print(f'  {f"{title} {size}":<24}{elapsed * 1000:>10.2f} ms{elapsed / removals * 1e6:>10.2f} us per removal')
+
+def benchmark_strings():
+	print('string building (interpreter, one line of 45 characters per iteration, joined at the end)')
+	for size in (1000, 10000, 100000):
+		node = main.Resolver().resolve(main.parse_program('<benchmark>', report_program(size))[0])
+		context = main.Context('<program>')
+		context.symbol_table = main.global_symbol_table
+
+		def build():
+			main.interpret(node, context)
+			return main.global_symbol_table.get('report').value
+
+		elapsed = measure(build, 1)
+		print(f'  {size:<24}{elapsed * 1000:>10.2f} ms{elapsed / size * 1e6:>8.2f} us per line')
+
+def benchmark_list_builtins():
+	context = main.Context('<program>')
+	context.symbol_table = main.global_symbol_table
+	main.interpret(main.Resolver().resolve(main.parse_program('<benchmark>', LIST_BUILTIN_SETUP)[0]), context)
+
+	for name, builtin_text, loop_text in LIST_BUILTIN_CASES:
+		timings = []
+		for title, text in (('loop', loop_text), ('built-in', builtin_text)):
+			node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+			timings.append((title, measure(lambda: main.interpret(node, context), 3)))
+		report(f'{name} (interpreter)', timings)
+
+def benchmark_maps():
+	size, lookups = 100000, 10
+	timings = []
+	for title, text in (('list of pairs', pairs_program(size, lookups)), ('map', map_program(size, lookups))):
+		node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+		context = main.Context('<program>')
+		context.symbol_table = main.global_symbol_table
+		timings.append((title, measure(lambda: main.interpret(node, context), 1)))
+	report(f'build {size} entries and look up {lookups} keys (interpreter)', timings)
+
+def benchmark_generators():
+	print('sum of squares (interpreter), from a list or from a generator')
+	for size in (10000, 100000, 1000000):
+		for title, is_generator in (('list', False), ('generator', True)):
+			node = main.Resolver().resolve(main.parse_program('<benchmark>', squares_program(size, is_generator))[0])
+			context = main.Context('<program>')
+			context.symbol_table = main.global_symbol_table
+			elapsed = measure(lambda: main.interpret(node, context), 1)
+			peak = measure_peak_memory(lambda: main.interpret(node, context))
+			print(f'  {f"{title} {size}":<24}{elapsed * 1000:>10.2f} ms{peak / 1024:>10.1f} KiB peak')
+
+def benchmark_arrays():
+	if numpy is None:
+		print('arrays: skipped, NumPy is not installed')
+		return
+
+	timings = []
+	for title, text in (('list loops', LIST_MATH_PROGRAM), ('array', ARRAY_MATH_PROGRAM)):
+		node = main.Resolver().resolve(main.parse_program('<benchmark>', text)[0])
+		context = main.Context('<program>')
+		context.symbol_table = main.global_symbol_table
+		timings.append((title, measure(lambda: main.interpret(node, context), 3)))
+	report('scale and sum 100000 numbers (interpreter)', timings)
+
+BENCHMARKS = {
+	'lexer': benchmark_lexers,
+	'parser': benchmark_parsers,
+	'cache': benchmark_cache,
+	'streaming': benchmark_streaming,
+	'memory': benchmark_memory,
+	'engines': benchmark_engines,
+	'recursion': benchmark_recursion,
+	'interpreter': benchmark_interpreter,
+	'allocations': benchmark_allocations,
+	'memo': benchmark_memo,
+	'loops': benchmark_loops,
+	'jit': benchmark_jit,
+	'optimizer': benchmark_optimizer,
+	'short-circuit': benchmark_short_circuit,
+	'lists': benchmark_lists,
+	'list-builtins': benchmark_list_builtins,
+	'maps': benchmark_maps,
+	'strings': benchmark_strings,
+	'generators': benchmark_generators,
+	'arrays': benchmark_arrays
+}
+
+if __name__ == '__main__':
+	names = sys.argv[1:] or list(BENCHMARKS)
+	for name in names:
+		BENCHMARKS[name]()
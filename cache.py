@@ -0,0 +1,126 @@
+from constants import *
+import hashlib, os, pickle, tempfile
+
+###########################################
+# PROGRAM CACHE
+###########################################
+
+CACHE_FORMAT_VERSION = 1
+CACHE_DIRECTORY = '__langcache__'
+CACHE_MAX_SIZE = 64 * 1024 * 1024
+CACHE_SUFFIX = '.ast'
+
+class ProgramCache:
+	def __init__(self, directory=CACHE_DIRECTORY, max_size=CACHE_MAX_SIZE):
+		self.directory = directory
+		self.max_size = max_size
+		self.hits = 0
+		self.misses = 0
+
+	def make_key(self, file_name, text):
+		digest = hashlib.sha256()
+		for part in (str(CACHE_FORMAT_VERSION), INTERPRETER_VERSION, file_name, text):
+			digest.update(part.encode('utf-8', 'surrogatepass'))
+			digest.update(b'\0')
+		return digest.hexdigest()
+
+	def entry_path(self, key):
+		return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+	def load(self, file_name, text):
+		key = self.make_key(file_name, text)
+		path = self.entry_path(key)
+
+		try:
+			with open(path, 'rb') as file:
+				format_version, interpreter_version, stored_key, node = pickle.load(file)
+		except FileNotFoundError:
+			self.misses += 1
+			return None
+		except Exception:
+			self.discard(path)
+			self.misses += 1
+			return None
+
+		if format_version != CACHE_FORMAT_VERSION or interpreter_version != INTERPRETER_VERSION or stored_key != key:
+			self.discard(path)
+			self.misses += 1
+			return None
+
+		# Refresh the modification time so eviction drops the least recently used entries first
+		try:
+			os.utime(path)
+		except OSError:
+			pass
+
+		self.hits += 1
+		return node
+
+	def store(self, file_name, text, node):
+		key = self.make_key(file_name, text)
+
+		try:
+			data = pickle.dumps((CACHE_FORMAT_VERSION, INTERPRETER_VERSION, key, node), pickle.HIGHEST_PROTOCOL)
+		except (pickle.PicklingError, RecursionError, TypeError):
+			return False
+
+		if len(data) > self.max_size:
+			return False
+
+		try:
+			os.makedirs(self.directory, exist_ok=True)
+			file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+			try:
+				with os.fdopen(file_descriptor, 'wb') as file:
+					file.write(data)
+				os.replace(temporary_path, self.entry_path(key))
+			except BaseException:
+				self.discard(temporary_path)
+				raise
+		except OSError:
+			return False
+
+		self.evict()
+		return True
+
+	def evict(self):
+		entries = []
+		total_size = 0
+
+		try:
+			names = os.listdir(self.directory)
+		except OSError:
+			return
+
+		for name in names:
+			if not name.endswith(CACHE_SUFFIX):
+				continue
+			path = os.path.join(self.directory, name)
+			try:
+				status = os.stat(path)
+			except OSError:
+				continue
+			entries.append((status.st_mtime, status.st_size, path))
+			total_size += status.st_size
+
+		entries.sort()
+		for _, size, path in entries:
+			if total_size <= self.max_size:
+				break
+			self.discard(path)
+			total_size -= size
+
+	def clear(self):
+		try:
+			names = os.listdir(self.directory)
+		except OSError:
+			return
+		for name in names:
+			if name.endswith(CACHE_SUFFIX):
+				self.discard(os.path.join(self.directory, name))
+
+	def discard(self, path):
+		try:
+			os.remove(path)
+		except OSError:
+			pass
@@ -0,0 +1,421 @@
+from constants import *
+from interpreter import Value, Number, String, List, Function, Context, build_map, RuntimeFailure, LoopSignal, ReturnSignal, TailCall, BINARY_OPERATIONS, KEYWORD_OPERATIONS, YIELD_OUTSIDE_FUNCTION_DETAILS, short_circuits
+from parser import ListNode
+from vm import GeneratorFunction
+from error import RunTimeError
+
+new_value = Value.__new__
+
+###########################################
+# CLOSURE FUNCTION
+###########################################
+
+class ClosureFunction(Function):
+	def __init__(self, name, body_node, argument_names, should_auto_return, scope, enclosing_context, body):
+		Function.__init__(self, name, body_node, argument_names, should_auto_return, scope, enclosing_context)
+		self.body = body
+
+	def execute(self, arguments, span, context):
+		return call_function(self, arguments, span, context)
+
+	def caller(self, span, context):
+		# Looks up everything a frame needs once, so each call only builds the frame and runs the body
+		name, body, should_auto_return = self.name, self.body, self.should_auto_return
+		scope, enclosing = self.scope, self.enclosing_context
+		symbol_table, argument_slots, frame_size = enclosing.symbol_table, scope.argument_slots, scope.frame_size
+		argument_count = len(self.argument_names)
+
+		def call(arguments):
+			if len(arguments) != argument_count:
+				return call_function(self, arguments, span, context)
+
+			execution_context = Context(name, context, span)
+			execution_context.symbol_table = symbol_table
+			execution_context.enclosing = enclosing
+			execution_context.scope = scope
+			slots = execution_context.slots = [None] * frame_size
+			for argument_slot, argument_value in zip(argument_slots, arguments):
+				slots[argument_slot] = argument_value
+
+			try:
+				value = body(execution_context)
+				if not should_auto_return:
+					value = Number.null
+			except ReturnSignal as signal:
+				value = signal.value
+
+			if type(value) is TailCall:
+				return call_function(value.function, value.arguments, span, context, value.node, execution_context)
+			return value
+		return call
+
+def call_function(function, arguments, span, context, call_span=None, calling_context=None):
+	call_span, calling_context = call_span or span, calling_context or context
+
+	while True:
+		argument_names = function.argument_names
+		if len(arguments) != len(argument_names):
+			function.check_arguments(argument_names, arguments, call_span, calling_context)
+
+		execution_context = function.generate_new_context(span, context)
+		slots = execution_context.slots
+		for argument_slot, argument_value in zip(function.scope.argument_slots, arguments):
+			slots[argument_slot] = argument_value
+
+		try:
+			value = function.body(execution_context)
+			if not function.should_auto_return:
+				value = Number.null
+		except ReturnSignal as signal:
+			value = signal.value
+
+		if type(value) is not TailCall:
+			return value
+
+		# A call in tail position runs here, in place of the frame that made it
+		function, arguments, call_span = value.function, value.arguments, value.node
+		calling_context = execution_context
+
+def make_lookup(address, name):
+	if not address:
+		def lookup(context):
+			return context.symbol_table.get(name)
+	elif len(address) == 1 and address[0][0] == 0:
+		slot = address[0][1]
+
+		def lookup(context):
+			value = context.slots[slot]
+			return context.symbol_table.get(name) if value is None else value
+	else:
+		def lookup(context):
+			return context.lookup(address, name)
+	return lookup
+
+def make_store(slot, name):
+	if slot is None:
+		def store(context, value):
+			context.symbol_table.symbols[name] = value
+	else:
+		def store(context, value):
+			context.slots[slot] = value
+	return store
+
+def is_true(value):
+	return value.value != 0 if type(value) is Number else value.is_true()
+
+###########################################
+# CLOSURE COMPILER
+###########################################
+
+class ClosureCompiler:
+	def execute_program(self, node, context):
+		program = self.visit(node)
+		try:
+			return program(context), None
+		except RuntimeFailure as failure:
+			return None, failure.error
+		except (ReturnSignal, LoopSignal):
+			return None, None
+
+	def visit(self, node):
+		method_name = f'visit_{type(node).__name__}'
+		method = getattr(self, method_name, self.no_visit_method)
+		return method(node)
+
+	def no_visit_method(self, node):
+		raise Exception(f'No visit_{type(node).__name__} method defined')
+
+	def visit_discarded(self, node):
+		if not isinstance(node, ListNode):
+			return self.visit(node)
+
+		statements = tuple(self.visit(element_node) for element_node in node.element_nodes)
+
+		def evaluate(context):
+			for statement in statements:
+				statement(context)
+		return evaluate
+
+	def visit_body(self, node, should_return_null):
+		if not should_return_null:
+			return self.visit(node)
+
+		body = self.visit_discarded(node)
+
+		def evaluate(context):
+			body(context)
+			return Number.null
+		return evaluate
+
+	###################################
+
+	def visit_NumberNode(self, node):
+		return self.visit_constant(Number(node.token.value))
+
+	def visit_StringNode(self, node):
+		return self.visit_constant(String(node.token.value))
+
+	def visit_constant(self, constant):
+		def evaluate(context):
+			return constant
+		return evaluate
+
+	def visit_ListNode(self, node):
+		elements = tuple(self.visit(element_node) for element_node in node.element_nodes)
+
+		def evaluate(context):
+			return List([element(context) for element in elements])
+		return evaluate
+
+	def visit_MapNode(self, node):
+		entries = tuple((self.visit(key_node), self.visit(value_node)) for key_node, value_node in node.entry_nodes)
+
+		def evaluate(context):
+			return build_map(node, [(key(context), value(context)) for key, value in entries], context)
+		return evaluate
+
+	def visit_VarAccessNode(self, node):
+		variable_name = node.variable_name_token.value
+		lookup = make_lookup(node.address, variable_name)
+
+		def evaluate(context):
+			value = lookup(context)
+			if value is None:
+				value = context.lookup_in_callers(variable_name)
+			if value is None:
+				raise RuntimeFailure(RunTimeError(node.position_start, node.position_end, f"'{variable_name}' is not defined", context))
+			return value
+		return evaluate
+
+	def visit_VariableAssignamentNode(self, node):
+		store = make_store(node.slot, node.variable_name_token.value)
+		value_evaluator = self.visit(node.value_node)
+
+		def evaluate(context):
+			value = value_evaluator(context)
+			store(context, value)
+			return value
+		return evaluate
+
+	def visit_BinaryOperationNode(self, node):
+		left_evaluator = self.visit(node.left_node)
+		right_evaluator = self.visit(node.right_node)
+
+		operation_token = node.operation_token
+		is_logical = operation_token.type == TT_KEYWORD
+		if is_logical:
+			method_name, number_operation = KEYWORD_OPERATIONS[operation_token.value]
+		else:
+			method_name, number_operation = BINARY_OPERATIONS[operation_token.type]
+
+		def evaluate(context):
+			left = left_evaluator(context)
+			if is_logical and short_circuits(node, left):
+				return left
+			right = right_evaluator(context)
+			if type(left) is Number and type(right) is Number:
+				try:
+					result = new_value(Number)
+					result.value = number_operation(left.value, right.value)
+					result.error = None
+					return result
+				except ArithmeticError:
+					pass
+			result, error = getattr(left, method_name)(right)
+			if error:
+				raise RuntimeFailure(error.locate(node, node.right_node, context))
+			return result
+		return evaluate
+
+	def visit_UnaryOperationNode(self, node):
+		operand_evaluator = self.visit(node.node)
+
+		if node.operation_token.type == TT_MINUS:
+			operation = lambda value: value.multed_by(Number(-1))
+		elif node.operation_token.matches(TT_KEYWORD, 'not'):
+			operation = lambda value: value.notted()
+		else:
+			operation = lambda value: (value, None)
+
+		def evaluate(context):
+			value, error = operation(operand_evaluator(context))
+			if error:
+				raise RuntimeFailure(error.locate(node.node, node.node, context))
+			return value
+		return evaluate
+
+	def visit_IfNode(self, node):
+		cases = tuple((self.visit(condition), self.visit_body(expression, should_return_null)) for condition, expression, should_return_null in node.cases)
+		else_evaluator = self.visit_body(*node.else_case) if node.else_case else None
+
+		def evaluate(context):
+			for condition, expression in cases:
+				if is_true(condition(context)):
+					return expression(context)
+			if else_evaluator:
+				return else_evaluator(context)
+			return Number.null
+		return evaluate
+
+	def visit_ForNode(self, node):
+		store = make_store(node.slot, node.variable_name_token.value)
+		start_evaluator = self.visit(node.start_value_node)
+		end_evaluator = self.visit(node.end_value_node)
+		step_evaluator = self.visit(node.step_value_node) if node.step_value_node else None
+		should_return_null = node.should_return_null
+		body = self.visit_discarded(node.body_node) if should_return_null else self.visit(node.body_node)
+
+		def evaluate(context):
+			start_value = start_evaluator(context)
+			end_value = end_evaluator(context)
+			step = step_evaluator(context).value if step_evaluator else 1
+
+			i = start_value.value
+			ascending = step >= 0
+			last_value = None
+
+			while (i < end_value.value) if ascending else (i > end_value.value):
+				number = new_value(Number)
+				number.value = i
+				number.error = None
+				store(context, number)
+				i += step
+
+				try:
+					value = body(context)
+				except LoopSignal as signal:
+					if signal.should_break:
+						break
+					continue
+
+				last_value = value
+
+			return Number.null if should_return_null or last_value is None else last_value
+		return evaluate
+
+	def visit_ForInNode(self, node):
+		store = make_store(node.slot, node.variable_name_token.value)
+		iterable_evaluator = self.visit(node.iterable_node)
+		should_return_null = node.should_return_null
+		body = self.visit_discarded(node.body_node) if should_return_null else self.visit(node.body_node)
+
+		def evaluate(context):
+			values, error = iterable_evaluator(context).iterate(node.iterable_node, context)
+			if error:
+				raise RuntimeFailure(error.locate(node.iterable_node, node.iterable_node, context))
+
+			last_value = None
+
+			for element in values:
+				store(context, element)
+
+				try:
+					value = body(context)
+				except LoopSignal as signal:
+					if signal.should_break:
+						break
+					continue
+
+				last_value = value
+
+			return Number.null if should_return_null or last_value is None else last_value
+		return evaluate
+
+	def visit_WhileNode(self, node):
+		condition = self.visit(node.condition_node)
+		should_return_null = node.should_return_null
+		body = self.visit_discarded(node.body_node) if should_return_null else self.visit(node.body_node)
+
+		def evaluate(context):
+			last_value = None
+
+			while is_true(condition(context)):
+				try:
+					value = body(context)
+				except LoopSignal as signal:
+					if signal.should_break:
+						break
+					continue
+
+				last_value = value
+
+			return Number.null if should_return_null or last_value is None else last_value
+		return evaluate
+
+	def visit_FunctionNode(self, node):
+		function_name = node.variable_name_token.value if node.variable_name_token else None
+		argument_names = [argument_name.value for argument_name in node.argument_name_tokens]
+		should_auto_return = node.should_auto_return
+		store = make_store(node.slot, function_name)
+		scope = node.scope
+
+		if scope.is_generator:
+			def evaluate(context):
+				function = GeneratorFunction(function_name, node.body_node, argument_names, should_auto_return, scope, context)
+				if function_name:
+					store(context, function)
+				return function
+			return evaluate
+
+		body = self.visit(node.body_node) if should_auto_return else self.visit_discarded(node.body_node)
+
+		def evaluate(context):
+			function = ClosureFunction(function_name, node.body_node, argument_names, should_auto_return, scope, context, body)
+			if function_name:
+				store(context, function)
+			return function
+		return evaluate
+
+	def visit_CallNode(self, node):
+		callee_evaluator = self.visit(node.node_to_call)
+		argument_evaluators = tuple(self.visit(argument_node) for argument_node in node.argument_nodes)
+		is_tail_call = node.is_tail_call
+
+		def evaluate(context):
+			value_to_call = callee_evaluator(context)
+			arguments = [argument(context) for argument in argument_evaluators]
+
+			if type(value_to_call) is ClosureFunction:
+				if is_tail_call:
+					return TailCall(value_to_call, arguments, node)
+				return call_function(value_to_call, arguments, node, context)
+
+			return value_to_call.execute(arguments, node, context)
+		return evaluate
+
+	def visit_ReturnNode(self, node):
+		value_evaluator = self.visit(node.node_to_return) if node.node_to_return else None
+
+		def evaluate(context):
+			raise ReturnSignal(value_evaluator(context) if value_evaluator else Number.null)
+		return evaluate
+
+	def visit_YieldNode(self, node):
+		# Generator bodies run on the virtual machine, so only a top-level yield gets here
+		value_evaluator = self.visit(node.node_to_yield) if node.node_to_yield else None
+
+		def evaluate(context):
+			if value_evaluator:
+				value_evaluator(context)
+			raise RuntimeFailure(RunTimeError(node.position_start, node.position_end, YIELD_OUTSIDE_FUNCTION_DETAILS, context))
+		return evaluate
+
+	def visit_ContinueNode(self, node):
+		def evaluate(context):
+			raise LoopSignal(False)
+		return evaluate
+
+	def visit_BreakNode(self, node):
+		def evaluate(context):
+			raise LoopSignal(True)
+		return evaluate
+
+	def visit_SequenceNode(self, node):
+		statements = tuple(self.visit(statement_node) for statement_node in node.statement_nodes)
+		value_evaluator = self.visit(node.value_node)
+
+		def evaluate(context):
+			for statement in statements:
+				statement(context)
+			return value_evaluator(context)
+		return evaluate
@@ -0,0 +1,300 @@
+from constants import *
+from parser import ListNode
+from interpreter import Number, String, BINARY_OPERATIONS, KEYWORD_OPERATIONS, SHORT_CIRCUIT_TRUTHS
+
+###########################################
+# OPCODES
+###########################################
+
+OP_LOAD_CONSTANT = 0
+OP_LOAD_NULL     = 1
+OP_LOAD_NAME     = 2
+OP_STORE_NAME    = 3
+OP_POP           = 4
+OP_BINARY        = 5
+OP_UNARY         = 6
+OP_BUILD_LIST    = 7
+OP_JUMP          = 8
+OP_JUMP_IF_FALSE = 9
+OP_CALL          = 10
+OP_MAKE_FUNCTION = 11
+OP_RETURN        = 12
+OP_HALT          = 13
+OP_FOR_SETUP     = 14
+OP_FOR_ITER      = 15
+OP_WHILE_SETUP   = 16
+OP_LOOP_KEEP     = 17
+OP_LOOP_END      = 18
+OP_BREAK         = 19
+OP_CONTINUE      = 20
+OP_WHILE_TEST    = 21
+OP_WHILE_NEXT    = 22
+OP_STORE_LOCAL   = 23
+OP_TAIL_CALL     = 24
+OP_SHORT_CIRCUIT = 25
+OP_BUILD_MAP     = 26
+OP_ITER_SETUP    = 27
+OP_ITER_NEXT     = 28
+OP_YIELD         = 29
+
+OPCODE_NAMES = [
+	'LOAD_CONSTANT', 'LOAD_NULL', 'LOAD_NAME', 'STORE_NAME', 'POP', 'BINARY', 'UNARY', 'BUILD_LIST',
+	'JUMP', 'JUMP_IF_FALSE', 'CALL', 'MAKE_FUNCTION', 'RETURN', 'HALT', 'FOR_SETUP', 'FOR_ITER',
+	'WHILE_SETUP', 'LOOP_KEEP', 'LOOP_END', 'BREAK', 'CONTINUE', 'WHILE_TEST', 'WHILE_NEXT', 'STORE_LOCAL',
+	'TAIL_CALL', 'SHORT_CIRCUIT', 'BUILD_MAP', 'ITER_SETUP', 'ITER_NEXT', 'YIELD',
+]
+
+UNARY_NEGATE   = 0
+UNARY_NOT      = 1
+UNARY_POSITIVE = 2
+
+###########################################
+# CODE
+###########################################
+
+class Code:
+	def __init__(self, name, instructions, is_function):
+		self.name = name
+		self.instructions = instructions
+		self.is_function = is_function
+
+	def disassemble(self):
+		lines = []
+		for index, (opcode, argument) in enumerate(self.instructions):
+			if isinstance(argument, tuple):
+				argument = argument[0]
+			lines.append(f'{index:4} {OPCODE_NAMES[opcode]:<14} {"" if argument is None else argument}')
+		return '\n'.join(lines)
+
+	def __repr__(self):
+		return f'<code {self.name}>'
+
+###########################################
+# COMPILER
+###########################################
+
+class Compiler:
+	def __init__(self, name='<program>', is_function=False):
+		self.name = name
+		self.is_function = is_function
+		self.instructions = []
+
+	def compile_program(self, node):
+		self.visit(node)
+		self.emit(OP_RETURN)
+		return self.finish()
+
+	def compile_function(self, node):
+		return self.compile_body(node.body_node, node.should_auto_return)
+
+	def compile_body(self, body_node, should_auto_return):
+		if should_auto_return:
+			self.visit(body_node)
+		else:
+			self.visit_discarded(body_node)
+			self.emit(OP_LOAD_NULL)
+		self.emit(OP_RETURN)
+		return self.finish()
+
+	def finish(self):
+		return Code(self.name, [tuple(instruction) for instruction in self.instructions], self.is_function)
+
+	def emit(self, opcode, argument=None):
+		self.instructions.append([opcode, argument])
+		return len(self.instructions) - 1
+
+	def patch(self, index, argument):
+		self.instructions[index][1] = argument
+
+	def here(self):
+		return len(self.instructions)
+
+	def visit(self, node):
+		method_name = f'visit_{type(node).__name__}'
+		method = getattr(self, method_name, self.no_visit_method)
+		return method(node)
+
+	def no_visit_method(self, node):
+		raise Exception(f'No visit_{type(node).__name__} method defined')
+
+	def visit_discarded(self, node):
+		if isinstance(node, ListNode):
+			for element_node in node.element_nodes:
+				self.visit(element_node)
+				self.emit(OP_POP)
+		else:
+			self.visit(node)
+			self.emit(OP_POP)
+
+	def visit_body(self, node, should_return_null):
+		if should_return_null:
+			self.visit_discarded(node)
+			self.emit(OP_LOAD_NULL)
+		else:
+			self.visit(node)
+
+	###################################
+
+	def visit_NumberNode(self, node):
+		self.emit(OP_LOAD_CONSTANT, Number(node.token.value))
+
+	def visit_StringNode(self, node):
+		self.emit(OP_LOAD_CONSTANT, String(node.token.value))
+
+	def visit_ListNode(self, node):
+		for element_node in node.element_nodes:
+			self.visit(element_node)
+		self.emit(OP_BUILD_LIST, len(node.element_nodes))
+
+	def visit_MapNode(self, node):
+		for key_node, value_node in node.entry_nodes:
+			self.visit(key_node)
+			self.visit(value_node)
+		self.emit(OP_BUILD_MAP, (len(node.entry_nodes), node))
+
+	def local_slot(self, address):
+		if len(address) == 1 and address[0][0] == 0:
+			return address[0][1]
+		return None
+
+	def emit_store(self, slot, name):
+		if slot is None:
+			self.emit(OP_STORE_NAME, name)
+		else:
+			self.emit(OP_STORE_LOCAL, slot)
+
+	def visit_VarAccessNode(self, node):
+		self.emit(OP_LOAD_NAME, (self.local_slot(node.address), node.address, node.variable_name_token.value, node))
+
+	def visit_VariableAssignamentNode(self, node):
+		self.visit(node.value_node)
+		self.emit_store(node.slot, node.variable_name_token.value)
+
+	def visit_BinaryOperationNode(self, node):
+		self.visit(node.left_node)
+
+		operation_token = node.operation_token
+		if operation_token.type == TT_KEYWORD:
+			# A left number that settles the result stays on the stack and skips the rest
+			short_circuit = self.emit(OP_SHORT_CIRCUIT)
+			self.visit(node.right_node)
+			method_name, number_operation = KEYWORD_OPERATIONS[operation_token.value]
+			self.emit(OP_BINARY, (method_name, number_operation, node))
+			self.patch(short_circuit, (self.here(), SHORT_CIRCUIT_TRUTHS[operation_token.value]))
+			return
+
+		self.visit(node.right_node)
+		method_name, number_operation = BINARY_OPERATIONS[operation_token.type]
+		self.emit(OP_BINARY, (method_name, number_operation, node))
+
+	def visit_UnaryOperationNode(self, node):
+		self.visit(node.node)
+
+		if node.operation_token.type == TT_MINUS:
+			kind = UNARY_NEGATE
+		elif node.operation_token.matches(TT_KEYWORD, 'not'):
+			kind = UNARY_NOT
+		else:
+			kind = UNARY_POSITIVE
+		self.emit(OP_UNARY, (kind, node))
+
+	def visit_IfNode(self, node):
+		end_jumps = []
+
+		for condition, expression, should_return_null in node.cases:
+			self.visit(condition)
+			next_case = self.emit(OP_JUMP_IF_FALSE)
+			self.visit_body(expression, should_return_null)
+			end_jumps.append(self.emit(OP_JUMP))
+			self.patch(next_case, self.here())
+
+		if node.else_case:
+			expression, should_return_null = node.else_case
+			self.visit_body(expression, should_return_null)
+		else:
+			self.emit(OP_LOAD_NULL)
+
+		for end_jump in end_jumps:
+			self.patch(end_jump, self.here())
+
+	def visit_loop_body(self, node):
+		if node.should_return_null:
+			self.visit_discarded(node.body_node)
+		else:
+			self.visit(node.body_node)
+			self.emit(OP_LOOP_KEEP)
+
+	def visit_ForNode(self, node):
+		self.visit(node.start_value_node)
+		self.visit(node.end_value_node)
+		if node.step_value_node:
+			self.visit(node.step_value_node)
+
+		setup = self.emit(OP_FOR_SETUP)
+		loop_start = self.emit(OP_FOR_ITER, (node.slot, node.variable_name_token.value))
+		self.visit_loop_body(node)
+		self.emit(OP_JUMP, loop_start)
+		loop_end = self.emit(OP_LOOP_END, node.should_return_null)
+
+		self.patch(setup, (node.step_value_node is not None, loop_start, loop_end))
+
+	def visit_ForInNode(self, node):
+		self.visit(node.iterable_node)
+
+		setup = self.emit(OP_ITER_SETUP)
+		loop_start = self.emit(OP_ITER_NEXT, (node.slot, node.variable_name_token.value))
+		self.visit_loop_body(node)
+		self.emit(OP_JUMP, loop_start)
+		loop_end = self.emit(OP_LOOP_END, node.should_return_null)
+
+		self.patch(setup, (loop_start, loop_end, node))
+
+	def visit_WhileNode(self, node):
+		setup = self.emit(OP_WHILE_SETUP)
+		loop_start = self.here()
+		self.visit(node.condition_node)
+		exit_jump = self.emit(OP_WHILE_TEST)
+		self.visit_loop_body(node)
+		self.emit(OP_WHILE_NEXT, loop_start)
+		loop_end = self.emit(OP_LOOP_END, node.should_return_null)
+
+		self.patch(setup, (loop_start, loop_end))
+		self.patch(exit_jump, loop_end)
+
+	def visit_FunctionNode(self, node):
+		function_name = node.variable_name_token.value if node.variable_name_token else None
+		argument_names = [argument_name.value for argument_name in node.argument_name_tokens]
+		code = Compiler(function_name or '<anonymous>', True).compile_function(node)
+		self.emit(OP_MAKE_FUNCTION, (function_name, node.slot, argument_names, code, node))
+
+	def visit_CallNode(self, node):
+		self.visit(node.node_to_call)
+		for argument_node in node.argument_nodes:
+			self.visit(argument_node)
+		self.emit(OP_TAIL_CALL if node.is_tail_call else OP_CALL, (len(node.argument_nodes), node))
+
+	def visit_ReturnNode(self, node):
+		if node.node_to_return:
+			self.visit(node.node_to_return)
+		else:
+			self.emit(OP_LOAD_NULL)
+		self.emit(OP_RETURN if self.is_function else OP_HALT)
+
+	def visit_YieldNode(self, node):
+		if node.node_to_yield:
+			self.visit(node.node_to_yield)
+		else:
+			self.emit(OP_LOAD_NULL)
+		self.emit(OP_YIELD, node)
+
+	def visit_ContinueNode(self, node):
+		self.emit(OP_CONTINUE)
+
+	def visit_BreakNode(self, node):
+		self.emit(OP_BREAK)
+
+	def visit_SequenceNode(self, node):
+		for statement_node in node.statement_nodes:
+			self.visit(statement_node)
+			self.emit(OP_POP)
+		self.visit(node.value_node)
@@ -4,36 +4,72 @@ import string
 # CONSTANTS
 ###########################################
 
+INTERPRETER_VERSION = '0.3.0'
+
 LETTERS        =  string.ascii_letters
 DIGITS         =  "0123456789"
 LETTERS_DIGITS =  LETTERS + DIGITS
 
-TT_INT		    = 'INT'
-TT_FLOAT    	= 'FLOAT'
-TT_STRING       = 'STRING'
-TT_IDENTIFIER	= 'IDENTIFIER'
-TT_KEYWORD		= 'KEYWORD'
-TT_PLUS     	= 'PLUS'
-TT_MINUS    	= 'MINUS'
-TT_MUL      	= 'MUL'
-TT_DIV      	= 'DIV'
-TT_POW			= 'POW'
-TT_EQ			= 'EQ'
-TT_LPAREN   	= 'LPAREN'
-TT_RPAREN   	= 'RPAREN'
-TT_LSQUARE   	= 'LSQUARE'
-TT_RSQUARE  	= 'RSQUARE'
-TT_EE			= 'EE'
-TT_NE			= 'NE'
-TT_LT			= 'LT'
-TT_GT			= 'GT'
-TT_LTE		    = 'LTE'
-TT_GTE		    = 'GTE'
-TT_COMMA		= 'COMMA'
-TT_ARROW		= 'ARROW'
-TT_NEWLINE      = 'NEWLINE'
-TT_EOF			= 'EOF'
+TT_INT		    = 0
+TT_FLOAT    	= 1
+TT_STRING       = 2
+TT_IDENTIFIER	= 3
+TT_KEYWORD		= 4
+TT_PLUS     	= 5
+TT_MINUS    	= 6
+TT_MUL      	= 7
+TT_DIV      	= 8
+TT_POW			= 9
+TT_EQ			= 10
+TT_LPAREN   	= 11
+TT_RPAREN   	= 12
+TT_LSQUARE   	= 13
+TT_RSQUARE  	= 14
+TT_EE			= 15
+TT_NE			= 16
+TT_LT			= 17
+TT_GT			= 18
+TT_LTE		    = 19
+TT_GTE		    = 20
+TT_COMMA		= 21
+TT_ARROW		= 22
+TT_NEWLINE      = 23
+TT_EOF			= 24
+TT_LBRACE   	= 25
+TT_RBRACE   	= 26
+TT_COLON    	= 27
+
 
+TOKEN_NAMES = [
+	'INT',
+	'FLOAT',
+	'STRING',
+	'IDENTIFIER',
+	'KEYWORD',
+	'PLUS',
+	'MINUS',
+	'MUL',
+	'DIV',
+	'POW',
+	'EQ',
+	'LPAREN',
+	'RPAREN',
+	'LSQUARE',
+	'RSQUARE',
+	'EE',
+	'NE',
+	'LT',
+	'GT',
+	'LTE',
+	'GTE',
+	'COMMA',
+	'ARROW',
+	'NEWLINE',
+	'EOF',
+	'LBRACE',
+	'RBRACE',
+	'COLON'
+]
 
 KEYWORDS = [
 	'let',
@@ -52,7 +88,9 @@ KEYWORDS = [
 	'return',
 	'end',
 	'continue',
-	'break'
+	'break',
+	'in',
+	'yield'
 ]
 
 
@@ -1,234 +1,207 @@
 from constants import * 
 from error import RunTimeError
-import os, math
+from collections import OrderedDict
+from vector import Vector
+import os, math, operator, itertools
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
 
 ###########################################
-# RUNTIME result
+# SIGNALS
 ###########################################
 
-class RuntimeResult:
-	def __init__(self):
-		self.reset()
-		
-	def reset(self):
-		self.value = None
-		self.error = None
-		self.func_return_value = None
-		self.loop_should_continue = False
-		self.loop_should_break = False
-		
-	def register(self, res):
-		self.error = res.error
-		self.func_return_value = res.func_return_value
-		self.loop_should_continue = res.loop_should_continue
-		self.loop_should_break = res.loop_should_break
-		return res.value
-
-	def register(self, response):
-		self.error = response.error
-		return response.value
-
-	def success(self, value):
-		self.value = value
-		return self
-		
-	def success_return(self, value):
-		self.reset()
-		self.func_return_value = value
-		return self
-		
-	def success_continue(self):
-		self.reset()
-		self.loop_should_continue = True
-		return self
-	
-	def success_break(self):
-		self.reset()
-		self.loop_should_break = True
-		return self
-	
-	def failure(self, error):
-		self.reset()
+class RuntimeFailure(Exception):
+	def __init__(self, error):
 		self.error = error
-		return self
-	
-	def should_return(self):
-		# Note: this will allow you to continue and break outside the current function
-		return (self.error or self.func_return_value or self.loop_should_continue or self.loop_should_break )
+
+class LoopSignal(Exception):
+	def __init__(self, should_break):
+		self.should_break = should_break
+
+class ReturnSignal(Exception):
+	def __init__(self, value):
+		self.value = value
+
+class BuiltInError(Exception):
+	def __init__(self, details):
+		self.details = details
+
+class TailCall:
+	def __init__(self, function, arguments, node):
+		self.function = function
+		self.arguments = arguments
+		self.node = node
 
 
 ###########################################
 # VALUES
 ###########################################
 
-class Value:
-	def __init__(self):
-		self.set_position()
-		self.set_context()
-
-	def set_position(self, position_start=None, position_end=None):
-		self.position_start = position_start
-		self.position_end = position_end
-		return self
+class OperationError:
+	# Values are shared and carry no position, so an operation only says what went wrong and
+	# whether the right operand is to blame; the caller places the error on the nodes it evaluates
+	def __init__(self, details, is_operand_error=False):
+		self.details = details
+		self.is_operand_error = is_operand_error
 
-	def set_context(self, context=None):
-		self.context = context
-		return self
+	def locate(self, span, operand_span, context):
+		if self.is_operand_error: span = operand_span
+		return RunTimeError(span.position_start, span.position_end, self.details, context)
 
+class Value:
 	def added_to(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def subbed_by(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def multed_by(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def dived_by(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def powed_by(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def get_comparison_eq(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def get_comparison_ne(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def get_comparison_lt(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def get_comparison_gt(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def get_comparison_lte(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def get_comparison_gte(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def anded_by(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def ored_by(self, other):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
 	def notted(self):
-		return None, self.illegal_operation(other)
+		return None, self.illegal_operation()
 
-	def execute(self, arguments):
-		return RuntimeResult().failure(self.illegal_operation())
+	def execute(self, arguments, span, context):
+		raise RuntimeFailure(self.illegal_operation().locate(span, span, context))
 
-	def copy(self):
-		raise Exception('No copy method defined')
+	def iterate(self, span, context):
+		# A value that can be looped over returns a Python iterator of its elements, made lazily.
+		# The span and context are those of the code asking for the elements
+		return None, self.illegal_operation()
 
 	def is_true(self):
 		return False
 
-	def illegal_operation(self, other=None):
-		if not other: other = self
-		return RunTimeError(
-			self.position_start, other.position_end,
-			'Illegal operation',
-			self.context
-		)
+	def illegal_operation(self):
+		return OperationError('Illegal operation')
 
 class Number(Value):
 	def __init__(self, value):
-		Value.__init__(self)
 		self.value = value
 		self.error = None
 
 	def added_to(self, other):
 		if isinstance(other, Number):
-			return Number(self.value + other.value).set_context(self.context), None
+			return Number(self.value + other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'added_to')
 
 	def subbed_by(self, other):
 		if isinstance(other, Number):
-			return Number(self.value - other.value).set_context(self.context), None
+			return Number(self.value - other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'subbed_by')
 
 	def multed_by(self, other):
 		if isinstance(other, Number):
-			return Number(self.value * other.value).set_context(self.context), None
+			return Number(self.value * other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'multed_by')
 
 	def dived_by(self, other):
 		if isinstance(other, Number):
 			if other.value == 0:
-				return None, RunTimeError(other.position_start, other.position_end,'Division by zero',self.context)
+				return None, OperationError('Division by zero', True)
 
-			return Number(self.value / other.value).set_context(self.context), None
+			return Number(self.value / other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'dived_by')
 
 	def powed_by(self, other):
 		if isinstance(other, Number):
-			return Number(self.value ** other.value).set_context(self.context), None
+			return Number(self.value ** other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'powed_by')
 
 	def get_comparison_eq(self, other):
 		if isinstance(other, Number):
-			return Number(self.value == other.value).set_context(self.context), None
+			return Number(self.value == other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'get_comparison_eq')
 
 	def get_comparison_ne(self, other):
 		if isinstance(other, Number):
-			return Number(self.value != other.value).set_context(self.context), None
+			return Number(self.value != other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'get_comparison_ne')
 
 	def get_comparison_lt(self, other):
 		if isinstance(other, Number):
-			return Number(self.value < other.value).set_context(self.context), None
+			return Number(self.value < other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'get_comparison_lt')
 
 	def get_comparison_gt(self, other):
 		if isinstance(other, Number):
-			return Number(self.value > other.value).set_context(self.context), None
+			return Number(self.value > other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'get_comparison_gt')
 
 	def get_comparison_lte(self, other):
 		if isinstance(other, Number):
-			return Number(self.value <= other.value).set_context(self.context), None
+			return Number(self.value <= other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'get_comparison_lte')
 
 	def get_comparison_gte(self, other):
 		if isinstance(other, Number):
-			return Number(self.value >= other.value).set_context(self.context), None
+			return Number(self.value >= other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return self.broadcast(other, 'get_comparison_gte')
 
 	def anded_by(self, other):
 		if isinstance(other, Number):
-			return Number(self.value and other.value).set_context(self.context), None
+			return Number(self.value and other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return None, self.illegal_operation()
 
 	def ored_by(self, other):
 		if isinstance(other, Number):
-			return Number(self.value or other.value).set_context(self.context), None
+			return Number(self.value or other.value), None
 		else:
-			return None, Value.illegal_operation(self, other)
+			return None, self.illegal_operation()
 
 	def notted(self):
-		return Number(1 if self.value == 0 else 0).set_context(self.context), None
+		return Number(1 if self.value == 0 else 0), None
 
-	def copy(self):
-		copy = Number(self.value)
-		copy.set_position(self.position_start, self.position_end)
-		copy.set_context(self.context)
-		return copy
+	def broadcast(self, other, method_name):
+		# A number meets every element of an array on its right
+		if isinstance(other, Array):
+			return other.operate(self, method_name, True)
+		return None, self.illegal_operation()
 
 	def is_true(self):
 		return self.value != 0
@@ -242,288 +215,840 @@ Number.true = Number(1)
 Number.math_pi = Number(math.pi)
 
 class String(Value):
+	# + does not copy the text. A chain of concatenations appends its pieces to one shared list,
+	# each string remembering how many of the pieces are its own, and repetition by a whole number
+	# is only noted. The text is joined once, the first time the value is read
 	def __init__(self, value):
-		Value.__init__(self)  
-		self.value = value
+		self.text = value
+		self.length = len(value)
+		self.pieces = None
 		self.error = None
 
+	@property
+	def value(self):
+		if self.text is None:
+			self.text = ''.join(self.pieces[:self.piece_count]) * self.repeat_count
+		return self.text
+
 	def added_to(self, other):
 		if isinstance(other, String):
-			return String(self.value + other.value).set_context(self.context), None
+			return self.concatenated(other), None
 		else:
-			None, Value.illegal_operation(self, other)
+			return None, self.illegal_operation()
 
 	def multed_by(self, other):
-		if isinstance(other, Number):
-			return String(self.value * other.value).set_context(self.context), None
+		# A string repeats a whole number of times
+		if isinstance(other, Number) and isinstance(other.value, int):
+			return self.repeated(other.value), None
 		else:
-			None, Value.illegal_operation(self, other)
+			return None, self.illegal_operation()
 
-	def is_true(self):
-		return len(self.value) > 0
+	def concatenated(self, other):
+		pieces = self.pieces
+		# Only the newest string on a list may extend it, as the strings before it share the list
+		if pieces is None or self.repeat_count != 1 or len(pieces) != self.piece_count:
+			pieces = [self.value]
+		pieces.append(other.value)
+		return deferred_string(pieces, self.length + other.length)
 
-	def copy(self):
-		copy = String(self.value)
-		copy.set_position(self.position_start, self.position_end)
-		copy.set_context(self.context)
-		return copy
+	def repeated(self, count):
+		return deferred_string([self.value], self.length * max(count, 0), count)
+
+	def iterate(self, span, context):
+		return (String(character) for character in self.value), None
+
+	def is_true(self):
+		return self.length > 0
 
 	def __repr__(self):
 		return f'"{self.value}"'
 
+def deferred_string(pieces, length, repeat_count=1):
+	string = Value.__new__(String)
+	string.text = None
+	string.length = length
+	string.pieces = pieces
+	string.piece_count = len(pieces)
+	string.repeat_count = repeat_count
+	string.error = None
+	return string
+
 class List(Value):
+	# The elements are a persistent vector, so operations build new lists that share structure
+	# with the old one instead of changing it. Only the built-ins append and pop modify a list
 	def __init__(self, elements):
-		Value.__init__(self)
-		self.elements = elements
+		self.elements = elements if type(elements) is Vector else Vector.from_list(elements)
 
 	def added_to(self, other):
 		if isinstance(other, List):
-			new_list = self.copy()
-			new_list.elements.extend(other.elements)
-			return new_list, None
+			return List(self.elements.extend(other.elements)), None
 		else:
-			None, Value.illegal_operation(self, other)
+			return None, self.illegal_operation()
 
 	def get_comparison_lte(self, other):
-		new_list = self.copy()
-		new_list.elements.append(other)
-		return new_list, None
+		return List(self.elements.append(other)), None
 
 	def subbed_by(self, other):
 		if isinstance(other, Number):
-			new_list = self.copy()
 			try:
-				new_list.elements.pop(other)
-				return new_list, None
+				return List(self.elements.remove(other.value)), None
 			except:
-				return None , RunTimeError(other.position_start, other.position_end, 
-											"Element at this index could not be removed from list because index is out of bounds", self.context)
+				return None, OperationError("Element at this index could not be removed from list because index is out of bounds", True)
 		else:
-			None, Value.illegal_operation(self, other)
+			return None, self.illegal_operation()
 
 	def dived_by(self, other):
 		if isinstance(other, Number):
 			try:
 				return self.elements[other.value], None
 			except:
-				return None , RunTimeError(other.position_start, other.position_end, 
-											"Element at this index could not be retrieved from list because index is out of bounds", self.context)
+				return None, OperationError("Element at this index could not be retrieved from list because index is out of bounds", True)
 		else:
-			None, Value.illegal_operation(self, other)
+			return None, self.illegal_operation()
+
+	def iterate(self, span, context):
+		return iter(self.elements), None
 
 	def copy(self):
-		copy = List(self.elements)
-		copy.set_context(self.context)
-		copy.set_position(self.position_start, self.position_end)
-		return copy
+		return List(self.elements)
 
 	def __repr__(self):
 		return f"[{','.join([str(x) for x in self.elements])}]"
 
+class Map(Value):
+	# Entries are kept under the Python value of their key, so lookups hash as Python does and
+	# 1 and 1.0 are the same key. Operators build new maps and leave their operands as they were.
+	# A copy shares its dict until one of the two is changed; only set and remove change a map
+	def __init__(self, entries, is_shared=False):
+		self.entries = entries
+		self.is_shared = is_shared
+
+	def added_to(self, other):
+		if isinstance(other, Map):
+			if not other.entries:
+				return self.copy(), None
+			if not self.entries:
+				return other.copy(), None
+			return Map(self.entries | other.entries), None
+		else:
+			return None, self.illegal_operation()
+
+	def subbed_by(self, other):
+		key = map_key(other)
+		if key is None:
+			return None, OperationError(MAP_KEY_DETAILS, True)
+		if key not in self.entries:
+			return None, OperationError("Key could not be removed from map because it is not in the map", True)
+
+		entries = dict(self.entries)
+		del entries[key]
+		return Map(entries), None
+
+	def dived_by(self, other):
+		key = map_key(other)
+		if key is None:
+			return None, OperationError(MAP_KEY_DETAILS, True)
+		try:
+			return self.entries[key], None
+		except KeyError:
+			return None, OperationError("Key could not be found in map", True)
+
+	def writable_entries(self):
+		if self.is_shared:
+			self.entries = dict(self.entries)
+			self.is_shared = False
+		return self.entries
+
+	def iterate(self, span, context):
+		# The keys are read from a copy, so a loop that changes the map still sees every key it had
+		return (map_key_value(key) for key in self.copy().entries), None
+
+	def copy(self):
+		self.is_shared = True
+		return Map(self.entries, True)
+
+	def __repr__(self):
+		return f"{{{','.join([f'{map_key_value(key)}:{value}' for key, value in self.entries.items()])}}}"
+
+MAP_KEY_DETAILS = "Map keys must be numbers or strings"
+YIELD_OUTSIDE_FUNCTION_DETAILS = "'yield' can only be used inside a function"
+
+def map_key(value):
+	if type(value) is Number or type(value) is String:
+		return value.value
+	return None
+
+def map_key_value(key):
+	return String(key) if type(key) is str else Number(key)
+
+def build_map(node, entries, context):
+	# The keys are checked once every entry has been evaluated, in every engine
+	map_entries = {}
+	for (key_node, _), (key, value) in zip(node.entry_nodes, entries):
+		map_entry_key = map_key(key)
+		if map_entry_key is None:
+			raise RuntimeFailure(RunTimeError(key_node.position_start, key_node.position_end, MAP_KEY_DETAILS, context))
+		map_entries[map_entry_key] = value
+	return Map(map_entries)
+
+class Array(Value):
+	# A block of numbers held by NumPy. Operators work on every element at once, pairing the
+	# elements of two arrays of the same length or taking a number to each element
+	def __init__(self, values):
+		self.values = values
+
+	def operate(self, other, method_name, is_reflected=False):
+		if isinstance(other, Array):
+			if other.values.shape != self.values.shape:
+				return None, OperationError('Arrays must have the same length', True)
+			other_values = other.values
+		elif isinstance(other, Number):
+			other_values = other.value
+		else:
+			return None, self.illegal_operation()
+
+		left, right = (other_values, self.values) if is_reflected else (self.values, other_values)
+		if method_name in WIDENED_OPERATIONS:
+			left, right = exact_integer_operands(left, right, method_name)
+		if method_name == 'dived_by' and numpy.any(numpy.asarray(right) == 0):
+			return None, OperationError('Division by zero', True)
+
+		try:
+			return Array(numpy.asarray(ARRAY_OPERATIONS[method_name](left, right))), None
+		except (ArithmeticError, TypeError, ValueError):
+			return None, self.illegal_operation()
+
+	def added_to(self, other):
+		return self.operate(other, 'added_to')
+
+	def subbed_by(self, other):
+		return self.operate(other, 'subbed_by')
+
+	def multed_by(self, other):
+		return self.operate(other, 'multed_by')
+
+	def dived_by(self, other):
+		return self.operate(other, 'dived_by')
+
+	def powed_by(self, other):
+		return self.operate(other, 'powed_by')
+
+	def get_comparison_eq(self, other):
+		return self.operate(other, 'get_comparison_eq')
+
+	def get_comparison_ne(self, other):
+		return self.operate(other, 'get_comparison_ne')
+
+	def get_comparison_lt(self, other):
+		return self.operate(other, 'get_comparison_lt')
+
+	def get_comparison_gt(self, other):
+		return self.operate(other, 'get_comparison_gt')
+
+	def get_comparison_lte(self, other):
+		return self.operate(other, 'get_comparison_lte')
+
+	def get_comparison_gte(self, other):
+		return self.operate(other, 'get_comparison_gte')
+
+	def iterate(self, span, context):
+		return (Number(value) for value in self.values.tolist()), None
+
+	def __repr__(self):
+		return f"array([{','.join([str(x) for x in self.values.tolist()])}])"
+
+ARRAY_OPERATIONS = {
+	'added_to': operator.add,
+	'subbed_by': operator.sub,
+	'multed_by': operator.mul,
+	'dived_by': operator.truediv,
+	'powed_by': lambda base, exponent: numpy.float_power(as_floats(base), as_floats(exponent)),
+	'get_comparison_eq': operator.eq,
+	'get_comparison_ne': operator.ne,
+	'get_comparison_lt': operator.lt,
+	'get_comparison_gt': operator.gt,
+	'get_comparison_lte': operator.le,
+	'get_comparison_gte': operator.ge,
+}
+
+INT64_MAX = 2 ** 63 - 1
+WIDENED_OPERATIONS = frozenset(('added_to', 'subbed_by', 'multed_by'))
+
+LIST_REDUCTIONS = {
+	'sum': sum,
+	'min': min,
+	'max': max,
+	'mean': lambda numbers: sum(numbers) / len(numbers),
+}
+
+def as_floats(values):
+	# float_power has no loop for the object arrays that hold integers too large for int64
+	if isinstance(values, numpy.ndarray) and values.dtype == object:
+		return values.astype(float)
+	return values
+
+def integer_magnitude(values):
+	# The largest absolute value among integer operands, or None when they are not all integers
+	if isinstance(values, numpy.ndarray):
+		if values.dtype.kind not in 'iu':
+			return None
+		return max(abs(int(values.max())), abs(int(values.min()))) if values.size else 0
+	return abs(values) if type(values) is int else None
+
+def exact_integer_operands(left, right, method_name):
+	# NumPy's integers wrap around once a result leaves int64, while the language's numbers grow
+	# without bound. Operands whose result could leave int64 are turned into Python integers
+	left_magnitude = integer_magnitude(left)
+	right_magnitude = integer_magnitude(right)
+	if left_magnitude is None or right_magnitude is None:
+		return left, right
+
+	bound = left_magnitude * right_magnitude if method_name == 'multed_by' else left_magnitude + right_magnitude
+	if bound <= INT64_MAX:
+		return left, right
+	return [numpy.asarray(values, dtype=object) if isinstance(values, numpy.ndarray) else values for values in (left, right)]
+
+def require_numpy():
+	if numpy is None:
+		raise BuiltInError("Arrays need NumPy, which is not installed")
+
+def number_of(value, details):
+	if not isinstance(value, Number):
+		raise BuiltInError(details)
+	return value.value
+
+def whole_number_of(value, details):
+	number = number_of(value, details)
+	if number != int(number):
+		raise BuiltInError(details)
+	return int(number)
+
+def elements_of(value, details):
+	if not isinstance(value, List):
+		raise BuiltInError(details)
+	return value.elements
+
+def sorted_by_keys(values, keys, details):
+	# Keys are compared by their Python values, so they must all be numbers or all be strings
+	key_type = type(keys[0]) if keys else Number
+	if key_type is not Number and key_type is not String or any(type(key) is not key_type for key in keys):
+		raise BuiltInError(details)
+
+	key_values = [key.value for key in keys]
+	try:
+		order = sorted(range(len(values)), key=key_values.__getitem__)
+	except TypeError:
+		raise BuiltInError(details)
+	return [values[index] for index in order]
+
 class BaseFunction(Value):
 	def __init__(self, name, error=None):
-		Value.__init__(self)
 		self.name = name or "<anonymous>"
 
-	def generate_new_context(self):
-		new_context = Context(self.name, self.context, self.position_start)
-		new_context.symbol_table = SymbolTable(new_context.parent.symbol_table)
+	def generate_new_context(self, span, context):
+		new_context = Context(self.name, context, span)
+		new_context.symbol_table = SymbolTable(context.symbol_table)
 		return new_context
 
-	def check_arguments(self, argument_names, arguments):
-		response = RuntimeResult()
-
+	def check_arguments(self, argument_names, arguments, span, context):
 		if len(arguments) > len(argument_names):
-			return response.failure(RunTimeError(self.position_start, self.position_end,
-												f"{len(arguments) - len(argument_names)} too many arguments passed into '{self.name}'",self.context))
+			raise RuntimeFailure(RunTimeError(span.position_start, span.position_end,
+												f"{len(arguments) - len(argument_names)} too many arguments passed into '{self.name}'", context))
 		
 		if len(arguments) < len(argument_names):
-			return response.failure(RunTimeError(self.position_start, self.position_end, 
-												f"{len(argument_names) - len(arguments)} too few arguments passed into '{self.name}'", self.context))
-
-		return response.success(None)
+			raise RuntimeFailure(RunTimeError(span.position_start, span.position_end, 
+												f"{len(argument_names) - len(arguments)} too few arguments passed into '{self.name}'", context))
 
-	def populate_arguments(self, argument_names, arguments, execution_context):
-		for i in range(len(arguments)):
-			argument_name = argument_names[i]
-			argument_value = arguments[i]
-			argument_value.set_context(execution_context)
-			execution_context.symbol_table.set(argument_name, argument_value)
-
-	def check_and_populate_arguments(self, argument_names, arguments, execution_context):
-		response = RuntimeResult()
-
-		response.register(self.check_arguments(argument_names, arguments))
-		if response.should_return():
-			 return response
-
-		self.populate_arguments(argument_names, arguments, execution_context)
-		return response.success(None)
+	def caller(self, span, context):
+		# Built-ins that call a function once per element get a call with the span and context bound
+		def call(arguments):
+			return self.execute(arguments, span, context)
+		return call
 
 class Function(BaseFunction):
-	def __init__(self, name, body_node, argument_names, should_auto_return):
+	def __init__(self, name, body_node, argument_names, should_auto_return, scope, enclosing_context):
 		BaseFunction.__init__(self, name)
 		self.body_node = body_node
 		self.argument_names = argument_names
 		self.should_auto_return = should_auto_return
+		self.scope = scope
+		self.enclosing_context = enclosing_context
+
+	def generate_new_context(self, span, context):
+		new_context = Context(self.name, context, span)
+		new_context.symbol_table = self.enclosing_context.symbol_table
+		new_context.slots = [None] * self.scope.frame_size
+		new_context.enclosing = self.enclosing_context
+		new_context.scope = self.scope
+		return new_context
 
-	def execute(self, arguments):
-		response = RuntimeResult()
-		interpreter = Interpreter()
-		execution_context = self.generate_new_context()
+	def populate_arguments(self, argument_names, arguments, execution_context):
+		for argument_slot, argument_value in zip(self.scope.argument_slots, arguments):
+			execution_context.slots[argument_slot] = argument_value
+
+	def execute(self, arguments, span, context):
+		return run_function(self, arguments, span, context)
+
+	def caller(self, span, context):
+		# Looks up everything a frame needs once, so each call only builds the frame and runs the body
+		visit = Interpreter.shared.visit
+		name, body_node, should_auto_return = self.name, self.body_node, self.should_auto_return
+		scope, enclosing = self.scope, self.enclosing_context
+		symbol_table, argument_slots, frame_size = enclosing.symbol_table, scope.argument_slots, scope.frame_size
+		argument_count = len(self.argument_names)
+
+		def call(arguments):
+			if len(arguments) != argument_count:
+				return run_function(self, arguments, span, context)
+
+			execution_context = Context(name, context, span)
+			execution_context.symbol_table = symbol_table
+			execution_context.enclosing = enclosing
+			execution_context.scope = scope
+			slots = execution_context.slots = [None] * frame_size
+			for argument_slot, argument_value in zip(argument_slots, arguments):
+				slots[argument_slot] = argument_value
 
-		response.register(self.check_and_populate_arguments(self.argument_names, arguments, execution_context))
-		if response.should_return():
-			 return response
-		
-		value = response.register(interpreter.visit(self.body_node, execution_context))
-		if response.should_return() and response.func_return_value == None: 
-			return response
-		
-		return_value = (value if self.should_auto_return else None) or response.func_return_value or Number.null
-		
-		return response.success(return_value)
+			try:
+				value = visit(body_node, execution_context)
+				if not should_auto_return:
+					value = Number.null
+			except ReturnSignal as signal:
+				value = signal.value
 
-	def copy(self):
-		copy = Function(self.name, self.body_node, self.argument_names, self.should_auto_return)
-		copy.set_context(self.context)
-		copy.set_position(self.position_start, self.position_end)
-		return copy
+			if type(value) is TailCall:
+				return run_function(value.function, value.arguments, span, context, value.node, execution_context)
+			return value
+		return call
 
 	def __repr__(self):
 		return f"<function {self.name}>"          
 
+def run_function(function, arguments, span, context, call_span=None, calling_context=None):
+	interpreter = Interpreter.shared
+	call_span, calling_context = call_span or span, calling_context or context
+
+	while True:
+		function.check_arguments(function.argument_names, arguments, call_span, calling_context)
+		execution_context = function.generate_new_context(span, context)
+		function.populate_arguments(function.argument_names, arguments, execution_context)
+
+		try:
+			value = interpreter.visit(function.body_node, execution_context)
+			if not function.should_auto_return:
+				value = Number.null
+		except ReturnSignal as signal:
+			value = signal.value
+
+		if type(value) is not TailCall:
+			return value
+
+		# A call in tail position runs here, in place of the frame that made it
+		function, arguments, call_span = value.function, value.arguments, value.node
+		calling_context = execution_context
+
+MEMO_CACHE_LIMIT = 1024
+
+def memo_key(value):
+	if type(value) is Number:
+		return (Number, type(value.value), value.value)
+	if type(value) is String:
+		return (String, value.value)
+	if type(value) is List:
+		keys = memo_keys(value.elements)
+		return None if keys is None else (List, keys)
+	return None
+
+def memo_keys(values):
+	keys = tuple(memo_key(value) for value in values)
+	return None if None in keys else keys
+
+class MemoizedFunction(BaseFunction):
+	# Results are cached by the values of the arguments, so only functions that depend on nothing
+	# else should be wrapped. Calls with a function among their arguments are never cached
+	def __init__(self, function, size=MEMO_CACHE_LIMIT):
+		BaseFunction.__init__(self, function.name)
+		self.function = function
+		self.size = size
+		self.cache = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+
+	def execute(self, arguments, span, context):
+		key = memo_keys(arguments)
+		if key is None:
+			return self.function.execute(arguments, span, context)
+
+		value = self.cache.get(key)
+		if value is not None:
+			self.cache.move_to_end(key)
+			self.hits += 1
+			return value
+
+		self.misses += 1
+		value = self.function.execute(arguments, span, context)
+		self.cache[key] = value
+		if len(self.cache) > self.size:
+			self.cache.popitem(last=False)
+		return value
+
+	def statistics(self):
+		return {'hits': self.hits, 'misses': self.misses, 'size': len(self.cache), 'limit': self.size}
+
+	def __repr__(self):
+		return f"<memoized function {self.name}>"
+
 class BuiltInFunction(BaseFunction):
 	def __init__(self, name):
 		BaseFunction.__init__(self, name)
+		self.method = getattr(self, f"execute_{self.name}", self.no_visit_method)
+		self.calls_functions = getattr(self.method, 'calls_functions', False)
 
-	def execute(self, arguments):
-		response = RuntimeResult()
-		execution_context = self.generate_new_context()
-
-		method_name = f"execute_{self.name}"
-		method = getattr(self, method_name, self.no_visit_method)
-
-		response.register(self.check_and_populate_arguments(method.argument_names, arguments, execution_context))
-		if response.should_return(): 
-			return response
+	def execute(self, arguments, span, context):
+		# Built-ins take their arguments positionally, and only a failing call gets a context of its own.
+		# Those that call functions of the program get one first, to show up in their tracebacks
+		argument_names = self.method.argument_names
+		if len(arguments) != len(argument_names):
+			self.check_arguments(argument_names, arguments, span, context)
 
-		return_value = response.register(method(execution_context))
-		if response.should_return(): 
-			return response
-		return return_value
+		execute_context = None
+		try:
+			if self.calls_functions:
+				execute_context = self.generate_new_context(span, context)
+				return self.method(*arguments, span, execute_context)
+			return self.method(*arguments)
+		except BuiltInError as error:
+			execute_context = execute_context or self.generate_new_context(span, context)
+			raise RuntimeFailure(RunTimeError(span.position_start, span.position_end, error.details, execute_context))
 
 	def no_visit_method(self, node, context):
 		raise Exception(f'No execute_{type(node).__name__} method defined')
 
-	def copy(self):
-		copy = BuiltInFunction(self.name)
-		copy.set_context(self.context)
-		copy.set_position(self.position_start, self.position_end)
-		return copy
-
 	def __repr__(self):
 		return f"<built-in function {self.name}>"  
    
     ############################################## 
-	def execute_print(self, execute_context):
-		return RuntimeResult().success(String(execute_context.symbol_table.get("value")))
+	def execute_print(self, value):
+		print(value.value if isinstance(value, String) else value)
+		return Number.null
 	execute_print.argument_names = ["value"]
 
-	def execute_input(self, execute_context):
+	def execute_input(self):
 		while True:
 			text = input()
 			try:
 				number = int(text)
-				return RuntimeResult().success(Number(number))
+				return Number(number)
 			except ValueError:
-				return RuntimeResult().success(String(text))
+				return String(text)
 	execute_input.argument_names = []
 
-	def execute_clear(self, execute_context):
+	def execute_clear(self):
 		os.system('cls' if os.name == 'nt' else 'clear')
-		return  RuntimeResult().success(Number.null)
+		return Number.null
 	execute_clear.argument_names = []
 
-	def execute_is_number(self, execute_context):
-		is_number = isinstance(execute_context.symbol_table.get("value"), Number)
-		return RuntimeResult().success(Number.true if is_number else Number.false)
+	def execute_is_number(self, value):
+		is_number = isinstance(value, Number)
+		return Number.true if is_number else Number.false
 	execute_is_number.argument_names = ["value"]
 
-	def execute_is_string(self, execute_context):
-		is_string = isinstance(execute_context.symbol_table.get("value"), String)
-		return RuntimeResult().success(Number.true if is_string else Number.false)
+	def execute_is_string(self, value):
+		is_string = isinstance(value, String)
+		return Number.true if is_string else Number.false
 	execute_is_string.argument_names = ["value"]
 
-	def execute_is_list(self, execute_context):
-		is_list = isinstance(execute_context.symbol_table.get("value"), List)
-		return RuntimeResult().success(Number.true if is_list else Number.false)
+	def execute_is_list(self, value):
+		is_list = isinstance(value, List)
+		return Number.true if is_list else Number.false
 	execute_is_list.argument_names = ["value"]
 
-	def execute_is_function(self, execute_context):
-		is_function = isinstance(execute_context.symbol_table.get("value"), BaseFunction)
-		return RuntimeResult().success(Number.true if is_function else Number.false)
-	execute_is_function.argument_names = ["value"]
+	def execute_is_map(self, value):
+		is_map = isinstance(value, Map)
+		return Number.true if is_map else Number.false
+	execute_is_map.argument_names = ["value"]
 
-	def execute_append(self, execute_context):
-		list_ = execute_context.symbol_table.get('list')
-		value = execute_context.symbol_table.get('value')
+	def execute_is_function(self, value):
+		is_function = isinstance(value, BaseFunction)
+		return Number.true if is_function else Number.false
+	execute_is_function.argument_names = ["value"]
 
+	def execute_append(self, list_, value):
 		if not isinstance(list_, List):
-			return RuntimeResult().failure(RunTimeError(self.position_start, self.position_end, "First argument must be a list", execute_context))
+			raise BuiltInError("First argument must be a list")
 
-		list_.elements.append(value) 
-		return RuntimeResult().success(Number.null)
+		list_.elements = list_.elements.append(value)
+		return Number.null
 	execute_append.argument_names = ["list", "value"]
 
-	def execute_pop(self, execute_context):
-		list_ = execute_context.symbol_table.get('list')
-		index = execute_context.symbol_table.get('index')
-
+	def execute_pop(self, list_, index):
 		if not isinstance(list_, List):
-			return RuntimeResult().failure(RunTimeError(self.position_start, self.position_end, "First argument must be a list", execute_context))
+			raise BuiltInError("First argument must be a list")
 		
 		if not isinstance(index, Number):
-			return RuntimeResult().failure(RunTimeError(self.position_start, self.position_end, "First argument must be a number", execute_context))
+			raise BuiltInError("First argument must be a number")
 
 		try:
-			element = list_.elements.pop(index.value)
+			element = list_.elements[index.value]
+			list_.elements = list_.elements.remove(index.value)
 		except:
-			return RuntimeResult().failure(RunTimeError(self.position_start, self.position_end, 
-											"Elements at this index could not be removed from list because index is out of range", execute_context))
+			raise BuiltInError("Elements at this index could not be removed from list because index is out of range")
 		
-		return RuntimeResult().success(element)
+		return element
 	execute_pop.argument_names = ["list", "index"]
 	
-	def execute_len(self, execute_context):
-		list_ = execute_context.symbol_table.get("list")
-		
+	def execute_len(self, list_):
 		if not isinstance(list_, List):
-			return RuntimeResult().failure(RunTimeError(self.position_start, self.position_end,"Argument must be list",execute_context))
+			raise BuiltInError("Argument must be list")
 			
-		return RuntimeResult().success(Number(len(list_.elements)))
-	execute_len.arg_names = ["list"]
+		return Number(len(list_.elements))
+	execute_len.argument_names = ["list"]
+
+	def execute_map(self, list_, function, span, context):
+		elements = elements_of(list_, "First argument must be a list")
+		if not isinstance(function, BaseFunction):
+			raise BuiltInError("Second argument must be a function")
+
+		call = function.caller(span, context)
+		return List([call([element]) for element in elements])
+	execute_map.argument_names = ["list", "function"]
+	execute_map.calls_functions = True
+
+	def execute_filter(self, list_, function, span, context):
+		elements = elements_of(list_, "First argument must be a list")
+		if not isinstance(function, BaseFunction):
+			raise BuiltInError("Second argument must be a function")
+
+		call = function.caller(span, context)
+		return List([element for element in elements if call([element]).is_true()])
+	execute_filter.argument_names = ["list", "function"]
+	execute_filter.calls_functions = True
+
+	def execute_reduce(self, list_, function, initial, span, context):
+		elements = elements_of(list_, "First argument must be a list")
+		if not isinstance(function, BaseFunction):
+			raise BuiltInError("Second argument must be a function")
+
+		call = function.caller(span, context)
+		accumulator = initial
+		for element in elements:
+			accumulator = call([accumulator, element])
+		return accumulator
+	execute_reduce.argument_names = ["list", "function", "initial"]
+	execute_reduce.calls_functions = True
+
+	def execute_sort(self, list_):
+		elements = list(elements_of(list_, "Argument must be a list"))
+		return List(sorted_by_keys(elements, elements, "List must only hold numbers or only strings"))
+	execute_sort.argument_names = ["list"]
+
+	def execute_sort_by(self, list_, function, span, context):
+		elements = list(elements_of(list_, "First argument must be a list"))
+		if not isinstance(function, BaseFunction):
+			raise BuiltInError("Second argument must be a function")
+
+		call = function.caller(span, context)
+		keys = [call([element]) for element in elements]
+		return List(sorted_by_keys(elements, keys, "Function must only return numbers or only strings"))
+	execute_sort_by.argument_names = ["list", "function"]
+	execute_sort_by.calls_functions = True
+
+	def execute_slice(self, list_, start, end):
+		# Indices count from the end when negative and are clamped to the list, as Python slices are
+		elements = elements_of(list_, "First argument must be a list")
+		start = whole_number_of(start, "Second argument must be a whole number")
+		end = whole_number_of(end, "Third argument must be a whole number")
+
+		start, end, _ = slice(start, end).indices(len(elements))
+		return List(list(itertools.islice(elements, start, end)))
+	execute_slice.argument_names = ["list", "start", "end"]
+
+	def execute_range(self, start, end, step):
+		start = whole_number_of(start, "First argument must be a whole number")
+		end = whole_number_of(end, "Second argument must be a whole number")
+		step = whole_number_of(step, "Third argument must be a whole number")
+		if step == 0:
+			raise BuiltInError("Third argument must not be zero")
+
+		return List([Number(number) for number in range(start, end, step)])
+	execute_range.argument_names = ["start", "end", "step"]
+
+	def execute_reverse(self, list_):
+		elements = elements_of(list_, "Argument must be a list")
+		return List(list(elements)[::-1])
+	execute_reverse.argument_names = ["list"]
+
+	def execute_index_of(self, list_, value):
+		# Numbers and strings are found by value, and anything else only as the same object
+		elements = elements_of(list_, "First argument must be a list")
+		key = map_key(value)
+
+		for index, element in enumerate(elements):
+			if element is value or key is not None and map_key(element) == key:
+				return Number(index)
+		return Number(-1)
+	execute_index_of.argument_names = ["list", "value"]
 	
-	def execute_run(self, execute_context):
-		fn = execute_context.symbol_table.get("fn")
-		
+	def map_and_key(self, map_, key):
+		if not isinstance(map_, Map):
+			raise BuiltInError("First argument must be a map")
+
+		map_entry_key = map_key(key)
+		if map_entry_key is None:
+			raise BuiltInError("Second argument must be a number or a string")
+		return map_entry_key
+
+	def execute_get(self, map_, key):
+		map_entry_key = self.map_and_key(map_, key)
+		try:
+			return map_.entries[map_entry_key]
+		except KeyError:
+			raise BuiltInError("Key could not be found in map")
+	execute_get.argument_names = ["map", "key"]
+
+	def execute_set(self, map_, key, value):
+		map_entry_key = self.map_and_key(map_, key)
+		map_.writable_entries()[map_entry_key] = value
+		return Number.null
+	execute_set.argument_names = ["map", "key", "value"]
+
+	def execute_has(self, map_, key):
+		map_entry_key = self.map_and_key(map_, key)
+		return Number.true if map_entry_key in map_.entries else Number.false
+	execute_has.argument_names = ["map", "key"]
+
+	def execute_remove(self, map_, key):
+		map_entry_key = self.map_and_key(map_, key)
+		if map_entry_key not in map_.entries:
+			raise BuiltInError("Key could not be removed from map because it is not in the map")
+
+		return map_.writable_entries().pop(map_entry_key)
+	execute_remove.argument_names = ["map", "key"]
+
+	def execute_keys(self, map_):
+		if not isinstance(map_, Map):
+			raise BuiltInError("Argument must be a map")
+
+		return List([map_key_value(key) for key in map_.entries])
+	execute_keys.argument_names = ["map"]
+
+	def execute_values(self, map_):
+		if not isinstance(map_, Map):
+			raise BuiltInError("Argument must be a map")
+
+		return List(list(map_.entries.values()))
+	execute_values.argument_names = ["map"]
+
+	def execute_run(self, fn):
 		if not isinstance(fn, String):
-			return RuntimeResult().failure(RunTimeError(self.position_start, self.position_end,"Second argument must be string",execute_context))
+			raise BuiltInError("Second argument must be string")
 			
 		fn = fn.value
 		try:
 			with open(fn, "r") as f:
 				script = f.read()
 		except Exception as e:
-			return RuntimeResult().failure(RunTimeError(self.position_start, self.position_end,f"Failed to load script \"{fn}\"\n" + str(e),execute_context))
+			raise BuiltInError(f"Failed to load script \"{fn}\"\n" + str(e))
 			
-		_, error = run(fn, script)
+		from main import run
+		_, error = run(fn, script, use_cache=True)
 		
 		if error:
-			return RuntimeResult().failure(RunTimeError(self.position_start, self.position_end,f"Failed to finish executing script \"{fn}\"\n" + error.as_string(), execute_context))
+			raise BuiltInError(f"Failed to finish executing script \"{fn}\"\n" + error.as_string())
 			
-		return RuntimeResult().success(Number.null)
-	execute_run.arg_names = ["fn"]
+		return Number.null
+	execute_run.argument_names = ["fn"]
+
+	def execute_memo(self, function):
+		if not isinstance(function, BaseFunction):
+			raise BuiltInError("Argument must be a function")
+
+		return MemoizedFunction(function)
+	execute_memo.argument_names = ["function"]
+
+	def execute_memo_sized(self, function, size):
+		if not isinstance(function, BaseFunction):
+			raise BuiltInError("First argument must be a function")
+
+		if not isinstance(size, Number) or size.value != int(size.value) or size.value < 1:
+			raise BuiltInError("Second argument must be a positive whole number")
+
+		return MemoizedFunction(function, int(size.value))
+	execute_memo_sized.argument_names = ["function", "size"]
+
+	def execute_array(self, list_):
+		require_numpy()
+		if not isinstance(list_, List):
+			raise BuiltInError("Argument must be a list")
+		if not all(isinstance(element, Number) for element in list_.elements):
+			raise BuiltInError("List must only hold numbers")
+
+		return Array(numpy.array([element.value for element in list_.elements]))
+	execute_array.argument_names = ["list"]
+
+	def execute_zeros(self, size):
+		require_numpy()
+		size = number_of(size, "Argument must be a number")
+		if size != int(size) or size < 0:
+			raise BuiltInError("Argument must be a whole number that is not negative")
+
+		return Array(numpy.zeros(int(size)))
+	execute_zeros.argument_names = ["size"]
+
+	def execute_arange(self, start, end, step):
+		require_numpy()
+		start = number_of(start, "First argument must be a number")
+		end = number_of(end, "Second argument must be a number")
+		step = number_of(step, "Third argument must be a number")
+		if step == 0:
+			raise BuiltInError("Third argument must not be zero")
+
+		return Array(numpy.arange(start, end, step))
+	execute_arange.argument_names = ["start", "end", "step"]
+
+	def execute_to_list(self, values, span, context):
+		elements, error = values.iterate(span, context)
+		if error:
+			raise BuiltInError("Argument must be a list, string, map, array or generator")
+
+		return List(list(elements))
+	execute_to_list.argument_names = ["values"]
+	execute_to_list.calls_functions = True
+
+	def reduce_values(self, values, reduction_name):
+		if isinstance(values, List):
+			numbers = [number_of(element, "List must only hold numbers") for element in values.elements]
+			if not numbers and reduction_name != 'sum':
+				raise BuiltInError("List must not be empty")
+			return Number(LIST_REDUCTIONS[reduction_name](numbers))
+		if not isinstance(values, Array):
+			raise BuiltInError("Argument must be a list or an array")
+
+		array = values.values
+		if not array.size and reduction_name != 'sum':
+			raise BuiltInError("Array must not be empty")
+		# A sum of integers that could leave int64 is added up in Python instead
+		if reduction_name == 'sum' and array.dtype.kind in 'iu' and integer_magnitude(array) * array.size > INT64_MAX:
+			return Number(sum(array.tolist()))
+
+		result = getattr(numpy, reduction_name)(array)
+		return Number(result.item() if isinstance(result, numpy.generic) else result)
+
+	def execute_sum(self, values):
+		return self.reduce_values(values, 'sum')
+	execute_sum.argument_names = ["values"]
+
+	def execute_min(self, values):
+		return self.reduce_values(values, 'min')
+	execute_min.argument_names = ["values"]
+
+	def execute_max(self, values):
+		return self.reduce_values(values, 'max')
+	execute_max.argument_names = ["values"]
+
+	def execute_mean(self, values):
+		return self.reduce_values(values, 'mean')
+	execute_mean.argument_names = ["values"]
 
 BuiltInFunction.print            =  BuiltInFunction("print")
 BuiltInFunction.input            =  BuiltInFunction("input")
@@ -531,20 +1056,85 @@ BuiltInFunction.clear            =  BuiltInFunction("clear")
 BuiltInFunction.is_number        =  BuiltInFunction("is_number")
 BuiltInFunction.is_string        =  BuiltInFunction("is_string")
 BuiltInFunction.is_list          =  BuiltInFunction("is_list")
+BuiltInFunction.is_map           =  BuiltInFunction("is_map")
 BuiltInFunction.is_function      =  BuiltInFunction("is_function")
 BuiltInFunction.append           =  BuiltInFunction("append")
 BuiltInFunction.pop              =  BuiltInFunction("pop")
+BuiltInFunction.get              =  BuiltInFunction("get")
+BuiltInFunction.set              =  BuiltInFunction("set")
+BuiltInFunction.has              =  BuiltInFunction("has")
+BuiltInFunction.remove           =  BuiltInFunction("remove")
+BuiltInFunction.keys             =  BuiltInFunction("keys")
+BuiltInFunction.values           =  BuiltInFunction("values")
+BuiltInFunction.len              =  BuiltInFunction("len")
+BuiltInFunction.map              =  BuiltInFunction("map")
+BuiltInFunction.filter           =  BuiltInFunction("filter")
+BuiltInFunction.reduce           =  BuiltInFunction("reduce")
+BuiltInFunction.sort             =  BuiltInFunction("sort")
+BuiltInFunction.sort_by          =  BuiltInFunction("sort_by")
+BuiltInFunction.slice            =  BuiltInFunction("slice")
+BuiltInFunction.range            =  BuiltInFunction("range")
+BuiltInFunction.reverse          =  BuiltInFunction("reverse")
+BuiltInFunction.index_of         =  BuiltInFunction("index_of")
+BuiltInFunction.run              =  BuiltInFunction("run")
+BuiltInFunction.memo             =  BuiltInFunction("memo")
+BuiltInFunction.memo_sized       =  BuiltInFunction("memo_sized")
+BuiltInFunction.array            =  BuiltInFunction("array")
+BuiltInFunction.zeros            =  BuiltInFunction("zeros")
+BuiltInFunction.arange           =  BuiltInFunction("arange")
+BuiltInFunction.to_list          =  BuiltInFunction("to_list")
+BuiltInFunction.sum              =  BuiltInFunction("sum")
+BuiltInFunction.min              =  BuiltInFunction("min")
+BuiltInFunction.max              =  BuiltInFunction("max")
+BuiltInFunction.mean             =  BuiltInFunction("mean")
 
 ###########################################
 # CONTEXT
 ###########################################
 
 class Context:
-	def __init__(self, display_name, parent=None, parent_entry_position=None):
+	def __init__(self, display_name, parent=None, parent_entry_span=None):
 		self.display_name = display_name
 		self.parent = parent
-		self.parent_entry_position = parent_entry_position
+		self.parent_entry_span = parent_entry_span
 		self.symbol_table = None
+		self.slots = None
+		self.enclosing = None
+		self.scope = None
+
+	@property
+	def parent_entry_position(self):
+		return self.parent_entry_span.position_start if self.parent_entry_span else None
+
+	def lookup(self, address, name):
+		for depth, slot in address:
+			frame = self
+			while depth:
+				frame = frame.enclosing
+				depth -= 1
+			value = frame.slots[slot]
+			if value is not None:
+				return value
+		return self.symbol_table.get(name)
+
+	def lookup_in_callers(self, name):
+		# Names used to be looked up along the chain of calls, so a function could read the variables
+		# of whichever function called it. A name that is neither in an enclosing function nor global
+		# is still read from the innermost caller that has it, so those programs keep working
+		context = self.parent
+		while context:
+			if context.scope:
+				slot = context.scope.slots.get(name)
+				if slot is not None and context.slots[slot] is not None:
+					return context.slots[slot]
+			context = context.parent
+		return None
+
+	def assign(self, slot, name, value):
+		if slot is None:
+			self.symbol_table.set(name, value)
+		else:
+			self.slots[slot] = value
 
 
 ###########################################
@@ -573,10 +1163,106 @@ class SymbolTable:
 # INTERPRETER
 ###########################################
 
+new_value = Value.__new__
+
+BINARY_OPERATIONS = {
+	TT_PLUS: ('added_to', operator.add),
+	TT_MINUS: ('subbed_by', operator.sub),
+	TT_MUL: ('multed_by', operator.mul),
+	TT_DIV: ('dived_by', operator.truediv),
+	TT_POW: ('powed_by', operator.pow),
+	TT_EE: ('get_comparison_eq', operator.eq),
+	TT_NE: ('get_comparison_ne', operator.ne),
+	TT_LT: ('get_comparison_lt', operator.lt),
+	TT_GT: ('get_comparison_gt', operator.gt),
+	TT_LTE: ('get_comparison_lte', operator.le),
+	TT_GTE: ('get_comparison_gte', operator.ge),
+}
+
+KEYWORD_OPERATIONS = {
+	'and': ('anded_by', lambda left, right: left and right),
+	'or': ('ored_by', lambda left, right: left or right),
+}
+
+# The truth of a left number that settles an and/or by itself
+SHORT_CIRCUIT_TRUTHS = {'and': False, 'or': True}
+
+def short_circuits(node, left):
+	# The right side of an and/or is only evaluated when the left side has not settled the result.
+	# Any left value other than a number still meets the right side, and the error it raises
+	return type(left) is Number and (left.value != 0) is SHORT_CIRCUIT_TRUTHS[node.operation_token.value]
+
+QUICKENING_LIMIT = 8
+
+def quicken_binary_operation(node, left, right, quickenings=0):
+	# Each operation in the tree specialises itself for the operand types it first sees, and
+	# specialises again when they change, until it has done so QUICKENING_LIMIT times
+	operation_token = node.operation_token
+	if operation_token.type == TT_KEYWORD:
+		method_name, number_operation = KEYWORD_OPERATIONS[operation_token.value]
+	else:
+		method_name, number_operation = BINARY_OPERATIONS[operation_token.type]
+
+	def operate_generic(left, right, node, context):
+		result, error = getattr(left, method_name)(right)
+		if error:
+			raise RuntimeFailure(error.locate(node, node.right_node, context))
+		return result
+
+	if quickenings >= QUICKENING_LIMIT:
+		return operate_generic
+
+	def requicken(left, right, node, context):
+		operate = node.operate = quicken_binary_operation(node, left, right, quickenings + 1)
+		return operate(left, right, node, context)
+
+	left_type, right_type = type(left), type(right)
+
+	if left_type is Number and right_type is Number:
+		def operate_numbers(left, right, node, context):
+			if type(left) is not Number or type(right) is not Number:
+				return requicken(left, right, node, context)
+			try:
+				result = new_value(Number)
+				result.value = number_operation(left.value, right.value)
+				result.error = None
+				return result
+			except ArithmeticError:
+				return operate_generic(left, right, node, context)
+		return operate_numbers
+
+	if left_type is String and right_type is String and method_name == 'added_to':
+		def operate_strings(left, right, node, context):
+			if type(left) is not String or type(right) is not String:
+				return requicken(left, right, node, context)
+			return left.concatenated(right)
+		return operate_strings
+
+	if left_type is String and right_type is Number and method_name == 'multed_by':
+		def operate_repeat(left, right, node, context):
+			if type(left) is not String or type(right) is not Number:
+				return requicken(left, right, node, context)
+			if type(right.value) is not int:
+				return operate_generic(left, right, node, context)
+			return left.repeated(right.value)
+		return operate_repeat
+
+	def operate_other(left, right, node, context):
+		if type(left) is Number and type(right) is Number:
+			return requicken(left, right, node, context)
+		return operate_generic(left, right, node, context)
+	return operate_other
+
 class Interpreter:
+	loop_compiler = None
+
+	def __init__(self):
+		self.visit_methods = {}
+
 	def visit(self, node, context):
-		method_name = f'visit_{type(node).__name__}'
-		method = getattr(self, method_name, self.no_visit_method)
+		method = self.visit_methods.get(type(node))
+		if method is None:
+			method = self.visit_methods[type(node)] = getattr(self, f'visit_{type(node).__name__}', self.no_visit_method)
 		return method(node, context)
 
 	def no_visit_method(self, node, context):
@@ -585,90 +1271,56 @@ class Interpreter:
 	###################################
 
 	def visit_NumberNode(self, node, context):
-		return RuntimeResult().success(Number(node.token.value).set_context(context).set_position(node.position_start, node.position_end))
+		return Number(node.token.value)
 	
 	def visit_StringNode(self, node, context):
-		return RuntimeResult().success(String(node.token.value).set_context(context).set_position(node.position_start, node.position_end))
+		return String(node.token.value)
 
 	def visit_ListNode(self, node, context):
-		response = RuntimeResult()
 		elements = []
 
 		for element_node in node.element_nodes:
-			elements.append(response.register(self.visit(element_node, context)))
-			if response.should_return():
-			 	return response
+			elements.append(self.visit(element_node, context))
 		
-		return response.success(List(elements).set_context(context).set_position(node.position_start, node.position_end))
+		return List(elements)
+
+	def visit_MapNode(self, node, context):
+		entries = []
+
+		for key_node, value_node in node.entry_nodes:
+			entries.append((self.visit(key_node, context), self.visit(value_node, context)))
+
+		return build_map(node, entries, context)
 
 	def visit_VarAccessNode(self, node, context):
-		response = RuntimeResult()
 		variable_name = node.variable_name_token.value
-		value = context.symbol_table.get(variable_name)
+		value = context.lookup(node.address, variable_name) or context.lookup_in_callers(variable_name)
 
 		if not value:
-			return response.failure(RunTimeError(node.position_start, node.position_end,f"'{variable_name}' is not defined", context))
+			raise RuntimeFailure(RunTimeError(node.position_start, node.position_end,f"'{variable_name}' is not defined", context))
 
-		value = value.copy().set_position(node.position_start, node.position_end).set_context(context)
-		return response.success(value)
+		return value
 
 	def visit_VariableAssignamentNode(self, node, context):
-		response = RuntimeResult()
 		variable_name = node.variable_name_token.value
-		value = response.register(self.visit(node.value_node, context))
-		if response.should_return(): 
-			return response
+		value = self.visit(node.value_node, context)
 
-		context.symbol_table.set(variable_name, value)
-		return response.success(value)
+		context.assign(node.slot, variable_name, value)
+		return value
 
 	def visit_BinaryOperationNode(self, node, context):
-		response = RuntimeResult()
-		left = response.register(self.visit(node.left_node, context))
-		if response.should_return():
-			 return response
-		right = response.register(self.visit(node.right_node, context))
-		if response.should_return(): 
-			return response
-
-		if node.operation_token.type == TT_PLUS:
-			result, error = left.added_to(right)
-		elif node.operation_token.type == TT_MINUS:
-			result, error = left.subbed_by(right)
-		elif node.operation_token.type == TT_MUL:
-			result, error = left.multed_by(right)
-		elif node.operation_token.type == TT_DIV:
-			result, error = left.dived_by(right)
-		elif node.operation_token.type == TT_POW:
-			result, error = left.powed_by(right)
-		elif node.operation_token.type == TT_EE:
-			result, error = left.get_comparison_eq(right)
-		elif node.operation_token.type == TT_NE:
-			result, error = left.get_comparison_ne(right)
-		elif node.operation_token.type == TT_LT:
-			result, error = left.get_comparison_lt(right)
-		elif node.operation_token.type == TT_GT:
-			result, error = left.get_comparison_gt(right)
-		elif node.operation_token.type == TT_LTE:
-			result, error = left.get_comparison_lte(right)
-		elif node.operation_token.type == TT_GTE:
-			result, error = left.get_comparison_gte(right)
-		elif node.operation_token.matches(TT_KEYWORD, 'and'):
-			result, error = left.anded_by(right)
-		elif node.operation_token.matches(TT_KEYWORD, 'or'):
-			result, error = left.ored_by(right)
+		left = self.visit(node.left_node, context)
+		if node.operation_token.type == TT_KEYWORD and short_circuits(node, left):
+			return left
+		right = self.visit(node.right_node, context)
 
-		if error:
-			return response.failure(error)
-		else:
-			return response.success(result.set_position(node.position_start, node.position_end))
+		operate = node.operate
+		if operate is None:
+			operate = node.operate = quicken_binary_operation(node, left, right)
+		return operate(left, right, node, context)
 
 	def visit_UnaryOperationNode(self, node, context):
-		response = RuntimeResult()
-		number = response.register(self.visit(node.node, context))
-		if response.should_return():
-			 return response
-
+		number = self.visit(node.node, context)
 		error = None
 
 		if node.operation_token.type == TT_MINUS:
@@ -677,151 +1329,191 @@ class Interpreter:
 			number, error = number.notted()
 
 		if error:
-			return response.failure(error)
-		else:
-			return response.success(number.set_position(node.position_start, node.position_end))
+			raise RuntimeFailure(error.locate(node.node, node.node, context))
+		return number
 
 	def visit_IfNode(self, node, context):
-		response = RuntimeResult()
-
 		for condition, expression, should_return_null in node.cases:
-			condition_value = response.register(self.visit(condition, context))
-			if response.should_return(): 
-				return response
+			condition_value = self.visit(condition, context)
 
 			if condition_value.is_true():
-				expression_value = response.register(self.visit(expression, context))
-				if response.should_return():
-					 return response
-				return response.success(Number.null if should_return_null else expression_value)
+				expression_value = self.visit(expression, context)
+				return Number.null if should_return_null else expression_value
 
 		if node.else_case:
 			expression, should_return_null = node.else_case
-			else_value = response.register(self.visit(expression, context))
-			if response.should_return(): 
-				return response
-			return response.success(Number.null if should_return_null else else_value)
+			else_value = self.visit(expression, context)
+			return Number.null if should_return_null else else_value
 
-		return response.success(Number.null)
+		return Number.null
 
 	def visit_ForNode(self, node, context):
-		response = RuntimeResult()
-		elements = []
-
-		start_value = response.register(self.visit(node.start_value_node, context))
-		if response.should_return():
-			 return response
-
-		end_value = response.register(self.visit(node.end_value_node, context))
-		if response.should_return(): 
-			return response
+		# The counter stays a plain number and only the last body value is kept, so a loop runs in
+		# constant memory however many times it iterates
+		start_value = self.visit(node.start_value_node, context)
+		end_value = self.visit(node.end_value_node, context)
+		step = self.visit(node.step_value_node, context).value if node.step_value_node else 1
 
-		if node.step_value_node:
-			step_value = response.register(self.visit(node.step_value_node, context))
-			if response.should_return(): 
-				return response
+		visit = self.visit
+		body_node = node.body_node
+		should_return_null = node.should_return_null
+		if node.slot is None:
+			variables, key = context.symbol_table.symbols, node.variable_name_token.value
 		else:
-			step_value = Number(1)
+			variables, key = context.slots, node.slot
 
 		i = start_value.value
+		end_value = end_value.value
+		ascending = step >= 0
+		last_value = None
+
+		loop_compiler = self.loop_compiler
+		countdown = loop_compiler.enter(node) if loop_compiler else -1
+
+		while (i < end_value) if ascending else (i > end_value):
+			if not countdown:
+				i, last_value, is_finished = loop_compiler.resume_for(node, context, i, end_value, step, ascending, last_value)
+				if is_finished:
+					break
+				countdown = -1
+				continue
+			countdown -= 1
 
-		if step_value.value >= 0:
-			condition = lambda: i < end_value.value
-		else:
-			condition = lambda: i > end_value.value
-		
-		while condition():
-			context.symbol_table.set(node.variable_name_token.value, Number(i))
-			i += step_value.value
-
-			value = response.register(self.visit(node.body_node, context))
-			if response.should_return() and response.loop_should_continue == False and response.loop_should_break == False: 
-				return response
+			number = new_value(Number)
+			number.value = i
+			number.error = None
+			variables[key] = number
+			i += step
 
-			if response.loop_should_continue:
+			try:
+				value = visit(body_node, context)
+			except LoopSignal as signal:
+				if signal.should_break:
+					break
 				continue
 
-			if response.loop_should_break:
-				break
+			if not should_return_null:
+				last_value = value
 
-			elements.append(value)
-
-		return response.success(Number.null if node.should_return_null else elements[-1])
-								# List(elements).set_context(context).set_position(node.position_start, node.position_end))
+		if countdown >= 0:
+			loop_compiler.leave(node, countdown)
+		return Number.null if last_value is None else last_value
 
 	def visit_WhileNode(self, node, context):
-		response = RuntimeResult()
-		elements = []
+		last_value = None
+		loop_compiler = self.loop_compiler
+		countdown = loop_compiler.enter(node) if loop_compiler else -1
 
 		while True:
-			condition = response.register(self.visit(node.condition_node, context))
-			if response.should_return(): 
-				return response
+			if not countdown:
+				last_value, is_finished = loop_compiler.resume_while(node, context, last_value)
+				if is_finished:
+					break
+				countdown = -1
+				continue
+			countdown -= 1
 
-			if not condition.is_true(): break
+			# A signal raised by the condition belongs to the enclosing loop
+			condition = self.visit(node.condition_node, context)
 
-			value = response.register(self.visit(node.body_node, context))
-			if response.should_return() and response.loop_should_continue == False and response.loop_should_break == False: 
-				return response
+			if not condition.is_true(): break
 
-			if response.loop_should_continue:
+			try:
+				value = self.visit(node.body_node, context)
+			except LoopSignal as signal:
+				if signal.should_break:
+					break
 				continue
 
-			if response.loop_should_break:
-				break
+			last_value = value
 
-			elements.append(value)
+		if countdown >= 0:
+			loop_compiler.leave(node, countdown)
+		return Number.null if node.should_return_null or last_value is None else last_value
 
-		return response.success(Number.null if node.should_return_null else elements[-1])
-								#List(elements).set_context(context).set_position(node.position_start, node.position_end))
+	def visit_ForInNode(self, node, context):
+		iterable = self.visit(node.iterable_node, context)
+		values, error = iterable.iterate(node.iterable_node, context)
+		if error:
+			raise RuntimeFailure(error.locate(node.iterable_node, node.iterable_node, context))
 
-	def visit_FunctionNode(self, node, context):
-		response = RuntimeResult()
+		visit = self.visit
+		body_node = node.body_node
+		should_return_null = node.should_return_null
+		if node.slot is None:
+			variables, key = context.symbol_table.symbols, node.variable_name_token.value
+		else:
+			variables, key = context.slots, node.slot
+
+		last_value = None
 
+		for element in values:
+			variables[key] = element
+
+			try:
+				value = visit(body_node, context)
+			except LoopSignal as signal:
+				if signal.should_break:
+					break
+				continue
+
+			if not should_return_null:
+				last_value = value
+
+		return Number.null if last_value is None else last_value
+
+	def visit_FunctionNode(self, node, context):
 		func_name = node.variable_name_token.value if node.variable_name_token else None
 		body_node = node.body_node
 		argument_names = [argument_name.value for argument_name in node.argument_name_tokens]
-		func_value = Function(func_name, body_node, argument_names, node.should_auto_return).set_context(context).set_position(node.position_start, node.position_end)
+		if node.scope.is_generator:
+			# Generators keep their place between values, which only the virtual machine can do
+			from vm import GeneratorFunction
+			func_value = GeneratorFunction(func_name, body_node, argument_names, node.should_auto_return, node.scope, context)
+		else:
+			func_value = Function(func_name, body_node, argument_names, node.should_auto_return, node.scope, context)
 		
 		if node.variable_name_token:
-			context.symbol_table.set(func_name, func_value)
+			context.assign(node.slot, func_name, func_value)
 
-		return response.success(func_value)
+		return func_value
 
 	def visit_CallNode(self, node, context):
-		response = RuntimeResult()
 		arguments = []
 
-		value_to_call = response.register(self.visit(node.node_to_call, context))
-		if response.should_return(): 
-			return response
-		value_to_call = value_to_call.copy().set_position(node.position_start, node.position_end)
+		value_to_call = self.visit(node.node_to_call, context)
 
 		for arg_node in node.argument_nodes:
-			arguments.append(response.register(self.visit(arg_node, context)))
-			if response.should_return(): 
-				return response
+			arguments.append(self.visit(arg_node, context))
 
-		return_value = response.register(value_to_call.execute(arguments))
-		if response.should_return():
-			 return response
-		
-		return response.success(return_value)
+		if node.is_tail_call and type(value_to_call) is Function:
+			return TailCall(value_to_call, arguments, node)
+		return value_to_call.execute(arguments, node, context)
 
 	def visit_ReturnNode(self, node, context):
-		response = RuntimeResult()
-		
 		if node.node_to_return:
-			value = response.register(self.visit(node.node_to_return, context))
-			if response.should_return(): 
-				return response
+			value = self.visit(node.node_to_return, context)
 		else:
 			value = Number.null 
 		
-		return response.success_return(value)
+		raise ReturnSignal(value)
+
+	def visit_YieldNode(self, node, context):
+		# Yields inside functions run on the virtual machine, so only a top-level one gets here
+		if node.node_to_yield:
+			self.visit(node.node_to_yield, context)
+		raise RuntimeFailure(RunTimeError(node.position_start, node.position_end, YIELD_OUTSIDE_FUNCTION_DETAILS, context))
 		
 	def visit_ContinueNode(self, node, context):
-		return RuntimeResult().success_continue()
+		raise LoopSignal(False)
 		
 	def visit_BreakNode(self, node, context):
-		return RuntimeResult().success_break()
\ No newline at end of file
+		raise LoopSignal(True)
+
+	def visit_SequenceNode(self, node, context):
+		for statement_node in node.statement_nodes:
+			self.visit(statement_node, context)
+
+		return self.visit(node.value_node, context)
+
+Interpreter.shared = Interpreter()
@@ -0,0 +1,578 @@
+from constants import *
+from parser import ListNode, ForNode
+from interpreter import Interpreter, Value, Number, String, List, RuntimeFailure, LoopSignal, SHORT_CIRCUIT_TRUTHS, short_circuits
+from error import RunTimeError
+import time, weakref
+
+###########################################
+# CONSTANTS
+###########################################
+
+JIT_THRESHOLD = 1000
+JIT_GUARD_FAILURE_LIMIT = 64
+JIT_DEOPTIMIZATION_LIMIT = 3
+
+BINARY_OPERATORS = {
+	TT_PLUS: ('added_to', '+'),
+	TT_MINUS: ('subbed_by', '-'),
+	TT_MUL: ('multed_by', '*'),
+	TT_DIV: ('dived_by', '/'),
+	TT_POW: ('powed_by', '**'),
+	TT_EE: ('get_comparison_eq', '=='),
+	TT_NE: ('get_comparison_ne', '!='),
+	TT_LT: ('get_comparison_lt', '<'),
+	TT_GT: ('get_comparison_gt', '>'),
+	TT_LTE: ('get_comparison_lte', '<='),
+	TT_GTE: ('get_comparison_gte', '>='),
+}
+
+KEYWORD_OPERATORS = {
+	'and': ('anded_by', 'and'),
+	'or': ('ored_by', 'or'),
+}
+
+UNARY_NEGATE   = 0
+UNARY_NOT      = 1
+UNARY_POSITIVE = 2
+
+new_value = Value.__new__
+
+###########################################
+# RUNTIME HELPERS
+###########################################
+
+def operator_of(node):
+	operation_token = node.operation_token
+	if operation_token.type == TT_KEYWORD:
+		return KEYWORD_OPERATORS[operation_token.value]
+	return BINARY_OPERATORS[operation_token.type]
+
+def unary_kind_of(node):
+	if node.operation_token.type == TT_MINUS:
+		return UNARY_NEGATE
+	if node.operation_token.matches(TT_KEYWORD, 'not'):
+		return UNARY_NOT
+	return UNARY_POSITIVE
+
+def binary_operation(left, right, method_name, node, context):
+	result, error = getattr(left, method_name)(right)
+	if error:
+		raise RuntimeFailure(error.locate(node, node.right_node, context))
+	return result
+
+def unary_operation(value, kind, node, context):
+	error = None
+	if kind == UNARY_NEGATE:
+		value, error = value.multed_by(Number(-1))
+	elif kind == UNARY_NOT:
+		value, error = value.notted()
+	if error:
+		raise RuntimeFailure(error.locate(node.node, node.node, context))
+	return value
+
+def lookup_in_callers(node, context):
+	value = context.lookup_in_callers(node.variable_name_token.value)
+	if value is not None:
+		return value
+	raise RuntimeFailure(RunTimeError(node.position_start, node.position_end, f"'{node.variable_name_token.value}' is not defined", context))
+
+###########################################
+# TYPE RECORDER
+###########################################
+
+class TypeRecorder(Interpreter):
+	# Walks one iteration of a hot loop exactly like the interpreter, noting the operand types
+	# each operation saw so the compiled loop can guard on them
+	def __init__(self):
+		Interpreter.__init__(self)
+		self.observed = {}
+
+	def visit_BinaryOperationNode(self, node, context):
+		left = self.visit(node.left_node, context)
+		if node.operation_token.type == TT_KEYWORD and short_circuits(node, left):
+			return left
+		right = self.visit(node.right_node, context)
+		self.observed[node] = (type(left), type(right))
+		return binary_operation(left, right, operator_of(node)[0], node, context)
+
+	def visit_UnaryOperationNode(self, node, context):
+		value = self.visit(node.node, context)
+		self.observed[node] = type(value)
+		return unary_operation(value, unary_kind_of(node), node, context)
+
+###########################################
+# LOOP WRITER
+###########################################
+
+class LoopWriter:
+	# Every expression is compiled into statements that leave its value in a local name, so the
+	# generated code evaluates the tree in the same order as the interpreter. Nodes without a
+	# translation are handed back to the interpreter
+	def __init__(self, trace, observed):
+		self.observed = observed
+		self.lines = []
+		self.indent = 0
+		self.temporary_count = 0
+		self.references = {}
+		self.constant_types = {}
+		self.is_in_condition = False
+		self.namespace = {
+			'Number': Number, 'String': String, 'List': List, 'new_value': new_value,
+			'LoopSignal': LoopSignal, 'binary_operation': binary_operation, 'unary_operation': unary_operation,
+			'lookup_in_callers': lookup_in_callers, 'visit': Interpreter.shared.visit, 'trace': trace,
+		}
+
+	def emit(self, line):
+		self.lines.append('\t' * self.indent + line)
+
+	def temporary(self):
+		self.temporary_count += 1
+		return f't{self.temporary_count}'
+
+	def reference(self, value):
+		name = self.references.get(id(value))
+		if name is None:
+			name = self.references[id(value)] = f'reference_{len(self.references)}'
+			self.namespace[name] = value
+		return name
+
+	def constant(self, value):
+		name = self.reference(value)
+		self.constant_types[name] = type(value)
+		return name
+
+	def guard(self, name, type_):
+		if self.constant_types.get(name) is type_:
+			return []
+		return [f'type({name}) is {type_.__name__}']
+
+	def truth(self, name):
+		return f'({name}.value != 0 if type({name}) is Number else {name}.is_true())'
+
+	def write_for(self, node):
+		self.emit('def compiled_loop(context, i, end_value, step, ascending, last_value):')
+		self.indent += 1
+		self.write_prologue()
+		self.emit('while True:')
+		self.indent += 1
+		self.emit('if not is_stable:')
+		self.emit('\ttrace.compiled_iterations += iterations')
+		self.emit('\treturn i, last_value, False')
+		self.emit('if not ((i < end_value) if ascending else (i > end_value)):')
+		self.emit('\tbreak')
+		self.emit('iterations += 1')
+		self.emit('number = new_value(Number)')
+		self.emit('number.value = i')
+		self.emit('number.error = None')
+		self.write_store(node.slot, node.variable_name_token.value, 'number')
+		self.emit('i += step')
+		self.write_body(node)
+		self.indent -= 1
+		self.emit('trace.compiled_iterations += iterations')
+		self.emit('return i, last_value, True')
+		return '\n'.join(self.lines) + '\n'
+
+	def write_while(self, node):
+		self.emit('def compiled_loop(context, last_value):')
+		self.indent += 1
+		self.write_prologue()
+		self.emit('while True:')
+		self.indent += 1
+		self.emit('if not is_stable:')
+		self.emit('\ttrace.compiled_iterations += iterations')
+		self.emit('\treturn last_value, False')
+
+		# A signal raised by the condition belongs to the enclosing loop
+		self.is_in_condition = True
+		condition = self.write(node.condition_node)
+		self.is_in_condition = False
+		self.emit(f'if not {self.truth(condition)}:')
+		self.emit('\tbreak')
+		self.emit('iterations += 1')
+		self.write_body(node)
+		self.indent -= 1
+		self.emit('trace.compiled_iterations += iterations')
+		self.emit('return last_value, True')
+		return '\n'.join(self.lines) + '\n'
+
+	def write_prologue(self):
+		self.emit('slots = context.slots')
+		self.emit('symbol_table = context.symbol_table')
+		self.emit('symbols = symbol_table.symbols')
+		self.emit('is_stable = True')
+		self.emit('iterations = 0')
+
+	def write_body(self, node):
+		self.emit('try:')
+		self.indent += 1
+		if node.should_return_null:
+			self.write_discarded(node.body_node)
+		else:
+			value = self.write(node.body_node)
+		self.emit('pass')
+		self.indent -= 1
+		self.emit('except LoopSignal as signal:')
+		self.emit('\tif signal.should_break:')
+		self.emit('\t\tbreak')
+		self.emit('\tcontinue')
+		if not node.should_return_null:
+			self.emit(f'last_value = {value}')
+
+	def write_store(self, slot, name, value):
+		if slot is None:
+			self.emit(f'symbols[{name!r}] = {value}')
+		else:
+			self.emit(f'slots[{slot}] = {value}')
+
+	def write_discarded(self, node):
+		if isinstance(node, ListNode):
+			for element_node in node.element_nodes:
+				self.write(element_node)
+		else:
+			self.write(node)
+
+	def write(self, node):
+		method = getattr(self, f'write_{type(node).__name__}', self.write_fallback)
+		return method(node)
+
+	def write_fallback(self, node):
+		result = self.temporary()
+		self.emit(f'{result} = visit({self.reference(node)}, context)')
+		return result
+
+	###################################
+
+	def write_NumberNode(self, node):
+		return self.constant(Number(node.token.value))
+
+	def write_StringNode(self, node):
+		return self.constant(String(node.token.value))
+
+	def write_ListNode(self, node):
+		elements = [self.write(element_node) for element_node in node.element_nodes]
+		result = self.temporary()
+		self.emit(f'{result} = List([{", ".join(elements)}])')
+		return result
+
+	def write_VarAccessNode(self, node):
+		address, name = node.address, node.variable_name_token.value
+		result = self.temporary()
+		if not address:
+			self.emit(f'{result} = symbols.get({name!r})')
+			self.emit(f'if {result} is None:')
+			self.emit(f'\t{result} = symbol_table.get({name!r})')
+		elif len(address) == 1 and address[0][0] == 0:
+			self.emit(f'{result} = slots[{address[0][1]}]')
+			self.emit(f'if {result} is None:')
+			self.emit(f'\t{result} = symbol_table.get({name!r})')
+		else:
+			self.emit(f'{result} = context.lookup({address!r}, {name!r})')
+		self.emit(f'if {result} is None:')
+		self.emit(f'\t{result} = lookup_in_callers({self.reference(node)}, context)')
+		return result
+
+	def write_VariableAssignamentNode(self, node):
+		value = self.write(node.value_node)
+		self.write_store(node.slot, node.variable_name_token.value, value)
+		return value
+
+	def write_BinaryOperationNode(self, node):
+		left = self.write(node.left_node)
+		if node.operation_token.type == TT_KEYWORD:
+			return self.write_short_circuit(node, left)
+		return self.write_operation(node, left, self.write(node.right_node))
+
+	def write_short_circuit(self, node, left):
+		result = self.temporary()
+		truth = '' if SHORT_CIRCUIT_TRUTHS[node.operation_token.value] else 'not '
+		self.emit(f'if type({left}) is Number and {truth}{left}.value:')
+		self.emit(f'\t{result} = {left}')
+		self.emit('else:')
+		self.indent += 1
+		self.emit(f'{result} = {self.write_operation(node, left, self.write(node.right_node))}')
+		self.indent -= 1
+		return result
+
+	def write_operation(self, node, left, right):
+		method_name, operator = operator_of(node)
+		result = self.temporary()
+		slow_path = f'{result} = binary_operation({left}, {right}, {method_name!r}, {self.reference(node)}, context)'
+
+		observed = self.observed.get(node)
+		if observed == (Number, Number):
+			guard = self.guard(left, Number) + self.guard(right, Number)
+			if operator == '/':
+				guard.append(f'{right}.value != 0')
+			fast_path = (f'{result} = new_value(Number)', f'{result}.value = {left}.value {operator} {right}.value', f'{result}.error = None')
+		elif observed == (String, String) and operator == '+':
+			guard = self.guard(left, String) + self.guard(right, String)
+			fast_path = (f'{result} = {left}.concatenated({right})',)
+		elif observed == (String, Number) and operator == '*':
+			guard = self.guard(left, String) + self.guard(right, Number) + [f'type({right}.value) is int']
+			fast_path = (f'{result} = {left}.repeated({right}.value)',)
+		else:
+			self.emit(slow_path)
+			return result
+
+		self.write_guarded(guard, fast_path, slow_path)
+		return result
+
+	def write_UnaryOperationNode(self, node):
+		value = self.write(node.node)
+		kind = unary_kind_of(node)
+		if kind == UNARY_POSITIVE:
+			return value
+
+		result = self.temporary()
+		slow_path = f'{result} = unary_operation({value}, {kind}, {self.reference(node)}, context)'
+		if self.observed.get(node) is not Number:
+			self.emit(slow_path)
+			return result
+
+		operation = f'{value}.value * -1' if kind == UNARY_NEGATE else f'1 if {value}.value == 0 else 0'
+		fast_path = (f'{result} = new_value(Number)', f'{result}.value = {operation}', f'{result}.error = None')
+		self.write_guarded(self.guard(value, Number), fast_path, slow_path)
+		return result
+
+	def write_guarded(self, guard, fast_path, slow_path):
+		if not guard:
+			for line in fast_path:
+				self.emit(line)
+			return
+
+		self.emit(f'if {" and ".join(guard)}:')
+		for line in fast_path:
+			self.emit('\t' + line)
+		self.emit('else:')
+		self.emit('\t' + slow_path)
+		self.emit('\tis_stable = trace.guard_failed()')
+
+	def write_IfNode(self, node):
+		result = self.temporary()
+		depth = 0
+
+		for condition, expression, should_return_null in node.cases:
+			condition_value = self.write(condition)
+			self.emit(f'if {self.truth(condition_value)}:')
+			self.indent += 1
+			self.write_branch(result, expression, should_return_null)
+			self.indent -= 1
+			self.emit('else:')
+			self.indent += 1
+			depth += 1
+
+		if node.else_case:
+			self.write_branch(result, *node.else_case)
+		else:
+			self.emit(f'{result} = Number.null')
+
+		self.indent -= depth
+		return result
+
+	def write_branch(self, result, expression, should_return_null):
+		if should_return_null:
+			self.write_discarded(expression)
+			self.emit(f'{result} = Number.null')
+		else:
+			self.emit(f'{result} = {self.write(expression)}')
+
+	def write_CallNode(self, node):
+		if node.is_tail_call:
+			return self.write_fallback(node)
+
+		value_to_call = self.write(node.node_to_call)
+		arguments = [self.write(argument_node) for argument_node in node.argument_nodes]
+		result = self.temporary()
+		self.emit(f'{result} = {value_to_call}.execute([{", ".join(arguments)}], {self.reference(node)}, context)')
+		return result
+
+	def write_BreakNode(self, node):
+		self.emit('raise LoopSignal(True)' if self.is_in_condition else 'break')
+		return 'None'
+
+	def write_ContinueNode(self, node):
+		self.emit('raise LoopSignal(False)' if self.is_in_condition else 'continue')
+		return 'None'
+
+	def write_SequenceNode(self, node):
+		for statement_node in node.statement_nodes:
+			self.write(statement_node)
+		return self.write(node.value_node)
+
+###########################################
+# LOOP COMPILER
+###########################################
+
+class LoopTrace:
+	def __init__(self, node):
+		self.node = node
+		self.function = None
+		self.source = None
+		self.is_blacklisted = False
+		self.counted_iterations = 0
+		self.entry_countdown = 0
+		self.entered_at = 0
+		self.interpreted_iterations = 0
+		self.interpreted_time = 0
+		self.compilations = 0
+		self.compile_time = 0
+		self.compiled_iterations = 0
+		self.compiled_time = 0
+		self.guard_failures = 0
+		self.deoptimizations = 0
+
+	def guard_failed(self):
+		self.guard_failures += 1
+		return self.guard_failures < JIT_GUARD_FAILURE_LIMIT
+
+	def saved_time(self):
+		if not self.interpreted_iterations:
+			return 0
+		interpreted_cost = self.interpreted_time / self.interpreted_iterations
+		return self.compiled_iterations * interpreted_cost - self.compiled_time - self.compile_time
+
+class LoopCompiler:
+	# The interpreter counts the iterations of every loop. Once a loop has run threshold of them
+	# its next iteration is recorded, and the rest of the loop runs as generated Python code. Each
+	# trace hangs off its loop node, so it is freed with the program; this only keeps weak references
+	def __init__(self, threshold=JIT_THRESHOLD):
+		self.threshold = threshold
+		self.traces = weakref.WeakSet()
+
+	def enter(self, node):
+		trace = node.trace
+		if trace is None:
+			trace = node.trace = LoopTrace(node)
+			self.traces.add(trace)
+		if trace.function:
+			trace.entry_countdown = 0
+			return 0
+		if trace.is_blacklisted or not self.threshold:
+			return -1
+
+		trace.entry_countdown = max(self.threshold - trace.counted_iterations, 0)
+		trace.entered_at = time.perf_counter()
+		return trace.entry_countdown
+
+	def leave(self, node, countdown):
+		trace = node.trace
+		iterations = trace.entry_countdown - countdown
+		if iterations > 0:
+			trace.counted_iterations += iterations
+			trace.interpreted_iterations += iterations
+			trace.interpreted_time += time.perf_counter() - trace.entered_at
+		trace.entry_countdown = 0
+
+	def resume_for(self, node, context, i, end_value, step, ascending, last_value):
+		trace = node.trace
+		self.leave(node, 0)
+
+		if trace.function is None:
+			recorder = TypeRecorder()
+			number = Number(i)
+			context.assign(node.slot, node.variable_name_token.value, number)
+			i += step
+
+			try:
+				value = recorder.visit(node.body_node, context)
+				if not node.should_return_null:
+					last_value = value
+			except LoopSignal as signal:
+				if signal.should_break:
+					return i, last_value, True
+
+			writer = LoopWriter(trace, recorder.observed)
+			if not self.compile(trace, writer.write_for(node), writer.namespace):
+				return i, last_value, False
+
+		started = time.perf_counter()
+		try:
+			i, last_value, is_finished = trace.function(context, i, end_value, step, ascending, last_value)
+		finally:
+			trace.compiled_time += time.perf_counter() - started
+
+		if not is_finished:
+			self.deoptimize(trace)
+		return i, last_value, is_finished
+
+	def resume_while(self, node, context, last_value):
+		trace = node.trace
+		self.leave(node, 0)
+
+		if trace.function is None:
+			recorder = TypeRecorder()
+			condition = recorder.visit(node.condition_node, context)
+			if not condition.is_true():
+				return last_value, True
+
+			try:
+				value = recorder.visit(node.body_node, context)
+				if not node.should_return_null:
+					last_value = value
+			except LoopSignal as signal:
+				if signal.should_break:
+					return last_value, True
+
+			writer = LoopWriter(trace, recorder.observed)
+			if not self.compile(trace, writer.write_while(node), writer.namespace):
+				return last_value, False
+
+		started = time.perf_counter()
+		try:
+			last_value, is_finished = trace.function(context, last_value)
+		finally:
+			trace.compiled_time += time.perf_counter() - started
+
+		if not is_finished:
+			self.deoptimize(trace)
+		return last_value, is_finished
+
+	def compile(self, trace, source, namespace):
+		started = time.perf_counter()
+		try:
+			exec(compile(source, f'<loop {self.describe(trace.node)}>', 'exec'), namespace)
+		except (SyntaxError, RecursionError, MemoryError):
+			trace.is_blacklisted = True
+			return False
+		finally:
+			trace.compile_time += time.perf_counter() - started
+
+		trace.function = namespace['compiled_loop']
+		trace.source = source
+		trace.compilations += 1
+		trace.guard_failures = 0
+		return True
+
+	def deoptimize(self, trace):
+		# The loop carries on in the interpreter and is recorded again once it is hot, unless its
+		# guards have already failed too often
+		trace.function = None
+		trace.counted_iterations = 0
+		trace.deoptimizations += 1
+		if trace.deoptimizations >= JIT_DEOPTIMIZATION_LIMIT:
+			trace.is_blacklisted = True
+
+	def describe(self, node):
+		position = node.position_start
+		return f'{position.file_name}:{position.line_number + 1}'
+
+	def statistics(self):
+		compiled_traces = [trace for trace in self.traces if trace.compilations]
+		compiled_traces.sort(key=lambda trace: trace.saved_time(), reverse=True)
+		return [{
+			'loop': self.describe(trace.node),
+			'kind': 'for' if isinstance(trace.node, ForNode) else 'while',
+			'interpreted_iterations': trace.interpreted_iterations,
+			'compiled_iterations': trace.compiled_iterations,
+			'compilations': trace.compilations,
+			'deoptimizations': trace.deoptimizations,
+			'guard_failures': trace.guard_failures,
+			'compile_time': trace.compile_time,
+			'compiled_time': trace.compiled_time,
+			'saved_time': trace.saved_time(),
+		} for trace in compiled_traces]
+
+	def reset(self):
+		for trace in list(self.traces):
+			trace.node.trace = None
+		self.traces = weakref.WeakSet()
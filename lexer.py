@@ -1,30 +1,28 @@
 from error import Error, IllegalCharError, ExpectedCharError
 from constants import *
 from typing import Self
+from bisect import bisect_right
+from sys import intern
+import re
+
+KEYWORD_SET = frozenset(KEYWORDS)
 
 ###########################################
-# TOKENS
+# SOURCE
 ###########################################
 
-class Token:
-	def __init__(self, type_, value=None, position_start=None, position_end=None):
-		self.type = type_
-		self.value = value
+class Source:
+	def __init__(self, file_name, text):
+		self.file_name = file_name
+		self.text = text
+		self.line_starts = None
 
-		if position_start:
-			self.position_start = position_start.copy()
-			self.position_end = position_start.copy()
-			self.position_end.advance()
+	def line_and_column(self, index):
+		if self.line_starts is None:
+			self.line_starts = [0] + [match.end() for match in re.finditer('\n', self.text)]
 
-		if position_end:
-			self.position_end = position_end.copy()
-
-	def matches(self, type_, value):
-		return self.type == type_ and self.value == value
-	
-	def __repr__(self):
-		if self.value: return f'{self.type}:{self.value}'
-		return f'{self.type}'
+		line_number = bisect_right(self.line_starts, index) - 1
+		return line_number, index - self.line_starts[line_number]
 
 
 ###########################################
@@ -32,36 +30,114 @@ class Token:
 ###########################################
 
 class Position:
-	def __init__(self, index, line_number, column, file_name, file_text):
+	__slots__ = ('index', 'source', 'is_end')
+
+	def __init__(self, index, source, is_end=False):
 		self.index = index
-		self.line_number = line_number
-		self.column = column
-		self.file_name = file_name
-		self.file_text = file_text
+		self.source = source
+		self.is_end = is_end
 
-	def advance(self, current_character=None):
-		self.index += 1
-		self.column += 1
+	@property
+	def line_number(self):
+		return self.line_and_column()[0]
+
+	@property
+	def column(self):
+		return self.line_and_column()[1]
 
-		if current_character == '\n':
-			self.line_number += 1
-			self.column = 0
+	@property
+	def file_name(self):
+		return self.source.file_name
 
+	@property
+	def file_text(self):
+		return self.source.text
+
+	def line_and_column(self):
+		# An end position stays on the line of the last character it covers
+		if self.is_end and self.index > 0:
+			line_number, column = self.source.line_and_column(self.index - 1)
+			return line_number, column + 1
+		return self.source.line_and_column(self.index)
+
+	def advance(self, current_character=None):
+		self.index += 1
 		return self
 
 	def copy(self):
-		return Position(self.index, self.line_number, self.column, self.file_name, self.file_text)
+		return Position(self.index, self.source, self.is_end)
+
+
+###########################################
+# SPAN
+###########################################
+
+class Span:
+	__slots__ = ('start', 'end', 'source')
+	constructor_fields = ('start', 'end', 'source')
+
+	def __reduce__(self):
+		# Rebuilding through the constructor keeps cached programs compact and fast to load
+		return (type(self), tuple([getattr(self, name) for name in self.constructor_fields]))
+
+	@property
+	def position_start(self):
+		return Position(self.start, self.source)
+
+	@property
+	def position_end(self):
+		return Position(self.end, self.source, True)
+
+
+###########################################
+# TOKENS
+###########################################
+
+class Token(Span):
+	__slots__ = ('type', 'value')
+	constructor_fields = ('type', 'value', 'start', 'end', 'source')
+
+	def __init__(self, type_, value, start, end, source):
+		self.type = type_
+		self.value = value
+		self.start = start
+		self.end = end
+		self.source = source
+
+	def matches(self, type_, value):
+		return self.type == type_ and self.value == value
+	
+	def __repr__(self):
+		if self.value: return f'{TOKEN_NAMES[self.type]}:{self.value}'
+		return f'{TOKEN_NAMES[self.type]}'
 
 
 ###########################################
 # LEXER
 ###########################################
 
-class Lexer:
+class BaseLexer:
 	def __init__(self, file_name, text):
 		self.file_name = file_name
 		self.text = text
-		self.position = Position(-1, 0, -1, file_name, text)
+		self.source = Source(file_name, text)
+		self.error = None
+
+	def make_tokens(self):
+		tokens = list(self.generate_tokens())
+		if self.error:
+			return [], self.error
+		return tokens, None
+
+	def fail(self, error, index):
+		# Streaming consumers stop at the fake EOF and read the error from the lexer
+		self.error = error
+		return Token(TT_EOF, None, index, index + 1, self.source)
+
+class Lexer(BaseLexer):
+	def __init__(self, file_name, text):
+		BaseLexer.__init__(self, file_name, text)
+		self.position = Position(-1, self.source)
 		self.current_character = None
 		self.advance()
 	
@@ -69,70 +145,79 @@ class Lexer:
 		self.position.advance(self.current_character)
 		self.current_character = self.text[self.position.index] if self.position.index < len(self.text) else None
 
-	def make_tokens(self):
-		tokens = []
-
+	def generate_tokens(self):
 		while self.current_character != None:
 			if self.current_character in ' \t':
 				self.advance()
 			elif self.current_character == '#':
 				self.skip_comment()
 			elif self.current_character in ';\n':
-				tokens.append(Token(TT_NEWLINE, position_start=self.position))
+				yield Token(TT_NEWLINE, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character in DIGITS:
-				tokens.append(self.make_number())
+				yield self.make_number()
 			elif self.current_character in LETTERS:
-				tokens.append(self.make_identifier())
+				yield self.make_identifier()
 			elif self.current_character == '"':
-				tokens.append(self.make_string())
+				yield self.make_string()
 			elif self.current_character == '+':
-				tokens.append(Token(TT_PLUS, position_start=self.position))
+				yield Token(TT_PLUS, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character == '-':
-				tokens.append(self.make_minus_or_arrow())
+				yield self.make_minus_or_arrow()
 			elif self.current_character == '*':
-				tokens.append(Token(TT_MUL, position_start=self.position))
+				yield Token(TT_MUL, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character == '/':
-				tokens.append(Token(TT_DIV, position_start=self.position))
+				yield Token(TT_DIV, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character == '^':
-				tokens.append(Token(TT_POW, position_start=self.position))
+				yield Token(TT_POW, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character == '(':
-				tokens.append(Token(TT_LPAREN, position_start=self.position))
+				yield Token(TT_LPAREN, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character == ')':
-				tokens.append(Token(TT_RPAREN, position_start=self.position))
+				yield Token(TT_RPAREN, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character == '[':
-				tokens.append(Token(TT_LSQUARE, position_start=self.position))
+				yield Token(TT_LSQUARE, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character == ']':
-				tokens.append(Token(TT_RSQUARE, position_start=self.position))
+				yield Token(TT_RSQUARE, None, self.position.index, self.position.index + 1, self.source)
+				self.advance()
+			elif self.current_character == '{':
+				yield Token(TT_LBRACE, None, self.position.index, self.position.index + 1, self.source)
+				self.advance()
+			elif self.current_character == '}':
+				yield Token(TT_RBRACE, None, self.position.index, self.position.index + 1, self.source)
+				self.advance()
+			elif self.current_character == ':':
+				yield Token(TT_COLON, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			elif self.current_character == '!':
 				token, error = self.make_not_equals()
-				if error: return [], error
-				tokens.append(token)
+				if error:
+					yield self.fail(error, error.position_start.index)
+					return
+				yield token
 			elif self.current_character == '=':
-				tokens.append(self.make_equals())
+				yield self.make_equals()
 			elif self.current_character == '<':
-				tokens.append(self.make_less_than())
+				yield self.make_less_than()
 			elif self.current_character == '>':
-				tokens.append(self.make_greater_than())
+				yield self.make_greater_than()
 			elif self.current_character == ',':
-				tokens.append(Token(TT_COMMA, position_start=self.position))
+				yield Token(TT_COMMA, None, self.position.index, self.position.index + 1, self.source)
 				self.advance()
 			else:
 				position_start = self.position.copy()
 				char = self.current_character
 				self.advance()
-				return [], IllegalCharError(position_start, self.position, "'" + char + "'")
+				yield self.fail(IllegalCharError(position_start, self.position, "'" + char + "'"), position_start.index)
+				return
 
-		tokens.append(Token(TT_EOF, position_start=self.position))
-		return tokens, None
+		yield Token(TT_EOF, None, self.position.index, self.position.index + 1, self.source)
 
 	def make_number(self):
 		num_str = ''
@@ -148,9 +233,9 @@ class Lexer:
 			self.advance()
 
 		if dot_count == 0:
-			return Token(TT_INT, int(num_str), position_start, self.position)
+			return Token(TT_INT, int(num_str), position_start.index, self.position.index, self.source)
 		else:
-			return Token(TT_FLOAT, float(num_str), position_start, self.position)
+			return Token(TT_FLOAT, float(num_str), position_start.index, self.position.index, self.source)
 
 	def make_identifier(self):
 		id_str = ''
@@ -160,8 +245,8 @@ class Lexer:
 			id_str += self.current_character
 			self.advance()
 
-		token_type = TT_KEYWORD if id_str in KEYWORDS else TT_IDENTIFIER
-		return Token(token_type, id_str, position_start, self.position)
+		token_type = TT_KEYWORD if id_str in KEYWORD_SET else TT_IDENTIFIER
+		return Token(token_type, intern(id_str), position_start.index, self.position.index, self.source)
 
 	def make_minus_or_arrow(self):
 		token_type = TT_MINUS
@@ -172,7 +257,7 @@ class Lexer:
 			self.advance()
 			token_type = TT_ARROW
 
-		return Token(token_type, position_start=position_start, position_end=self.position)
+		return Token(token_type, None, position_start.index, self.position.index, self.source)
 
 	def make_not_equals(self):
 		position_start = self.position.copy()
@@ -180,7 +265,7 @@ class Lexer:
 
 		if self.current_character == '=':
 			self.advance()
-			return Token(TT_NE, position_start=position_start, position_end=self.position), None
+			return Token(TT_NE, None, position_start.index, self.position.index, self.source), None
 
 		self.advance()
 		return None, ExpectedCharError(position_start, self.position, "'=' (after '!')")
@@ -194,7 +279,7 @@ class Lexer:
 			self.advance()
 			token_type = TT_EE
 
-		return Token(token_type, position_start=position_start, position_end=self.position)
+		return Token(token_type, None, position_start.index, self.position.index, self.source)
 
 	def make_less_than(self):
 		token_type = TT_LT
@@ -205,7 +290,7 @@ class Lexer:
 			self.advance()
 			token_type = TT_LTE
 
-		return Token(token_type, position_start=position_start, position_end=self.position)
+		return Token(token_type, None, position_start.index, self.position.index, self.source)
 
 	def make_greater_than(self):
 		token_type = TT_GT
@@ -216,7 +301,7 @@ class Lexer:
 			self.advance()
 			token_type = TT_GTE
 
-		return Token(token_type, position_start=position_start, position_end=self.position)
+		return Token(token_type, None, position_start.index, self.position.index, self.source)
 
 	def make_string(self):
 		string = ""
@@ -231,27 +316,130 @@ class Lexer:
 
 		while self.current_character != None and (self.current_character != '"' or escape_character):
 			if escape_character:
-				string += escape_characters.get(self.current_char, self.current_char)
+				string += escape_characters.get(self.current_character, self.current_character)
+				escape_character = False
 			else:
 				if self.current_character == "\\":
 					escape_character = True 
 				else:
 					string += self.current_character
 			self.advance()
-			escape_character = False
 	
 		self.advance()
-		return Token(TT_STRING, string, position_start, self.position)
+		return Token(TT_STRING, string, position_start.index, self.position.index, self.source)
 		
 	def skip_comment(self):
 		self.advance()
 		
-		while self.current_char != '\n':
+		# The newline that ends the comment is left to end the statement as well
+		while self.current_character != None and self.current_character != '\n':
 			self.advance()
-		
-		self.advance()
 
 
+###########################################
+# TABLE LEXER
+###########################################
+
+TOKEN_PATTERN = re.compile(r'''
+	(?P<SPACE>[ \t]+)
+	| (?P<COMMENT>\#[^\n]*)
+	| (?P<NEWLINE>[;\n])
+	| (?P<NUMBER>[0-9]+(?:\.[0-9]*)?)
+	| (?P<IDENTIFIER>[A-Za-z][A-Za-z0-9_]*)
+	| (?P<STRING>"(?:[^"\\]|\\.)*\\?)(?P<STRING_END>"?)
+	| (?P<OPERATOR>->|==|!=|<=|>=|[-+*/^()\[\]{}=<>,:])
+''', re.VERBOSE | re.DOTALL)
+
+ESCAPE_PATTERN = re.compile(r'\\(.?)', re.DOTALL)
+
+ESCAPE_CHARACTERS = {
+	'n': '\n',
+	't': '\t'
+}
+
+OPERATOR_TOKENS = {
+	'+': TT_PLUS,
+	'-': TT_MINUS,
+	'*': TT_MUL,
+	'/': TT_DIV,
+	'^': TT_POW,
+	'(': TT_LPAREN,
+	')': TT_RPAREN,
+	'[': TT_LSQUARE,
+	']': TT_RSQUARE,
+	'{': TT_LBRACE,
+	'}': TT_RBRACE,
+	'=': TT_EQ,
+	'==': TT_EE,
+	'!=': TT_NE,
+	'<': TT_LT,
+	'>': TT_GT,
+	'<=': TT_LTE,
+	'>=': TT_GTE,
+	',': TT_COMMA,
+	':': TT_COLON,
+	'->': TT_ARROW
+}
+
+
+class TableLexer(BaseLexer):
+	def generate_tokens(self):
+		text = self.text
+		source = self.source
+		length = len(text)
+		match_token = TOKEN_PATTERN.match
+		index = 0
+
+		while index < length:
+			match = match_token(text, index)
+			if match is None:
+				yield self.fail(self.make_error(index), index)
+				return
+
+			kind = match.lastgroup
+			end = match.end()
+
+			if kind == 'SPACE' or kind == 'COMMENT':
+				pass
+			elif kind == 'IDENTIFIER':
+				identifier = intern(match.group())
+				token_type = TT_KEYWORD if identifier in KEYWORD_SET else TT_IDENTIFIER
+				yield Token(token_type, identifier, index, end, source)
+			elif kind == 'OPERATOR':
+				yield Token(OPERATOR_TOKENS[match.group()], None, index, end, source)
+			elif kind == 'NUMBER':
+				number = match.group()
+				if '.' in number:
+					yield Token(TT_FLOAT, float(number), index, end, source)
+				else:
+					yield Token(TT_INT, int(number), index, end, source)
+			elif kind == 'NEWLINE':
+				yield Token(TT_NEWLINE, None, index, end, source)
+			else:
+				string = match.group('STRING')[1:]
+				if '\\' in string:
+					string = ESCAPE_PATTERN.sub(lambda escape: ESCAPE_CHARACTERS.get(escape.group(1), escape.group(1)), string)
+
+				# An unterminated string consumes one position past the end of the text
+				if not match.group('STRING_END'):
+					end += 1
+
+				yield Token(TT_STRING, string, index, end, source)
+
+			index = end
+
+		yield Token(TT_EOF, None, index, index + 1, source)
+
+	def make_error(self, index):
+		position_start = Position(index, self.source)
+		character = self.text[index]
 
+		if character == '!':
+			return ExpectedCharError(position_start, Position(index + 2, self.source), "'=' (after '!')")
 
+		return IllegalCharError(position_start, Position(index + 1, self.source), "'" + character + "'")
 
+LEXERS = {
+	'classic': Lexer,
+	'table': TableLexer
+}
@@ -1,6 +1,12 @@
-from lexer import Lexer
+from lexer import LEXERS
 from parser import *
 from interpreter import *
+from cache import ProgramCache
+from vm import VirtualMachine
+from closures import ClosureCompiler
+from resolver import Resolver
+from jit import LoopCompiler
+from optimizer import Optimizer, OPTIMIZATION_LEVEL
 
 global_symbol_table = SymbolTable()
 global_symbol_table.set("null", Number.null)
@@ -14,27 +20,98 @@ global_symbol_table.set("cls", BuiltInFunction.clear)
 global_symbol_table.set("is_number", BuiltInFunction.is_number)
 global_symbol_table.set("is_string", BuiltInFunction.is_string)
 global_symbol_table.set("is_list", BuiltInFunction.is_list)
+global_symbol_table.set("is_map", BuiltInFunction.is_map)
 global_symbol_table.set("is_function", BuiltInFunction.is_function)
 global_symbol_table.set("append", BuiltInFunction.append)
 global_symbol_table.set("pop", BuiltInFunction.pop)
+global_symbol_table.set("get", BuiltInFunction.get)
+global_symbol_table.set("set", BuiltInFunction.set)
+global_symbol_table.set("has", BuiltInFunction.has)
+global_symbol_table.set("remove", BuiltInFunction.remove)
+global_symbol_table.set("keys", BuiltInFunction.keys)
+global_symbol_table.set("values", BuiltInFunction.values)
+global_symbol_table.set("len", BuiltInFunction.len)
+global_symbol_table.set("map", BuiltInFunction.map)
+global_symbol_table.set("filter", BuiltInFunction.filter)
+global_symbol_table.set("reduce", BuiltInFunction.reduce)
+global_symbol_table.set("sort", BuiltInFunction.sort)
+global_symbol_table.set("sort_by", BuiltInFunction.sort_by)
+global_symbol_table.set("slice", BuiltInFunction.slice)
+global_symbol_table.set("range", BuiltInFunction.range)
+global_symbol_table.set("reverse", BuiltInFunction.reverse)
+global_symbol_table.set("index_of", BuiltInFunction.index_of)
+global_symbol_table.set("run", BuiltInFunction.run)
+global_symbol_table.set("memo", BuiltInFunction.memo)
+global_symbol_table.set("memo_sized", BuiltInFunction.memo_sized)
+global_symbol_table.set("array", BuiltInFunction.array)
+global_symbol_table.set("zeros", BuiltInFunction.zeros)
+global_symbol_table.set("arange", BuiltInFunction.arange)
+global_symbol_table.set("to_list", BuiltInFunction.to_list)
+global_symbol_table.set("sum", BuiltInFunction.sum)
+global_symbol_table.set("min", BuiltInFunction.min)
+global_symbol_table.set("max", BuiltInFunction.max)
+global_symbol_table.set("mean", BuiltInFunction.mean)
 
-def run(fn, text):
+program_cache = ProgramCache()
+loop_compiler = Interpreter.loop_compiler = LoopCompiler()
+optimizer = Optimizer(global_symbol_table)
+
+def interpret(node, context):
+	try:
+		return Interpreter().visit(node, context), None
+	except RuntimeFailure as failure:
+		return None, failure.error
+	except (ReturnSignal, LoopSignal):
+		return None, None
+
+def execute(node, context):
+	return VirtualMachine().execute_program(node, context)
+
+def evaluate(node, context):
+	return ClosureCompiler().execute_program(node, context)
+
+ENGINES = {'interpreter': interpret, 'vm': execute, 'closures': evaluate}
+
+def parse_program(fn, text, lexer_engine='table', parser_engine='pratt'):
 	# Generate tokens
-	lexer = Lexer(fn, text)
-	tokens, error = lexer.make_tokens()
-	if error: 
-		return None, error
-	
+	lexer = LEXERS[lexer_engine](fn, text)
+	tokens = lexer.generate_tokens()
+
 	# Generate AST
-	parser = Parser(tokens)
+	parser = PARSERS[parser_engine](tokens)
 	ast = parser.parse()
+
+	# A lexing error further along the text still takes precedence over a syntax error
+	for _ in tokens:
+		pass
+	if lexer.error:
+		return None, lexer.error
 	if ast.error:
-		 return None, ast.error
+		return None, ast.error
+
+	return ast.node, None
+
+def run(fn, text, lexer_engine='table', parser_engine='pratt', use_cache=False, engine='interpreter', optimization_level=OPTIMIZATION_LEVEL):
+	node = program_cache.load(fn, text) if use_cache else None
+
+	if node is None:
+		node, error = parse_program(fn, text, lexer_engine, parser_engine)
+		if error:
+			return None, error
+		if use_cache:
+			program_cache.store(fn, text, node)
+
+	# The cache keeps the tree as parsed, so each run can optimize it to its own level
+	node = optimizer.optimize(node, optimization_level)
+	temporary_names = optimizer.temporary_names
+	Resolver(global_symbol_table).resolve(node)
 
 	# Run program
-	interpreter = Interpreter()
 	context = Context('<program>')
 	context.symbol_table = global_symbol_table
-	result = interpreter.visit(ast.node, context)
-
-	return result.value, result.error
\ No newline at end of file
+	try:
+		return ENGINES[engine](node, context)
+	finally:
+		# The optimizer's top-level temporaries are only read by the program's own loops
+		for name in temporary_names:
+			global_symbol_table.symbols.pop(name, None)
@@ -0,0 +1,516 @@
+from constants import *
+from lexer import Token
+from parser import *
+from interpreter import Number, String, BINARY_OPERATIONS, KEYWORD_OPERATIONS, short_circuits
+import itertools, time
+
+OPTIMIZATION_LEVEL = 1
+INLINING_NODE_LIMIT = 16
+FOLDED_STRING_LIMIT = 4096
+FOLDED_EXPONENT_LIMIT = 64
+
+###########################################
+# TREE HELPERS
+###########################################
+
+def child_nodes(node):
+	node_type = type(node)
+	if node_type is ListNode:
+		return list(node.element_nodes)
+	if node_type is MapNode:
+		return [child for entry_nodes in node.entry_nodes for child in entry_nodes]
+	if node_type is VariableAssignamentNode:
+		return [node.value_node]
+	if node_type is BinaryOperationNode:
+		return [node.left_node, node.right_node]
+	if node_type is UnaryOperationNode:
+		return [node.node]
+	if node_type is IfNode:
+		children = [child for condition, expression, _ in node.cases for child in (condition, expression)]
+		return children + [node.else_case[0]] if node.else_case else children
+	if node_type is ForNode:
+		children = [node.start_value_node, node.end_value_node]
+		if node.step_value_node:
+			children.append(node.step_value_node)
+		return children + [node.body_node]
+	if node_type is ForInNode:
+		return [node.iterable_node, node.body_node]
+	if node_type is WhileNode:
+		return [node.condition_node, node.body_node]
+	if node_type is FunctionNode:
+		return [node.body_node]
+	if node_type is CallNode:
+		return [node.node_to_call] + node.argument_nodes
+	if node_type is ReturnNode:
+		return [node.node_to_return] if node.node_to_return else []
+	if node_type is YieldNode:
+		return [node.node_to_yield] if node.node_to_yield else []
+	if node_type is SequenceNode:
+		return node.statement_nodes + [node.value_node]
+	return []
+
+def replace_child_nodes(node, replace):
+	node_type = type(node)
+	if node_type is NumberNode or node_type is StringNode or node_type is VarAccessNode:
+		return node
+	if node_type is ListNode:
+		node.element_nodes = [replace(element_node) for element_node in node.element_nodes]
+	elif node_type is MapNode:
+		node.entry_nodes = [(replace(key_node), replace(value_node)) for key_node, value_node in node.entry_nodes]
+	elif node_type is VariableAssignamentNode:
+		node.value_node = replace(node.value_node)
+	elif node_type is BinaryOperationNode:
+		node.left_node = replace(node.left_node)
+		node.right_node = replace(node.right_node)
+	elif node_type is UnaryOperationNode:
+		node.node = replace(node.node)
+	elif node_type is IfNode:
+		node.cases = [(replace(condition), replace(expression), should_return_null) for condition, expression, should_return_null in node.cases]
+		if node.else_case:
+			node.else_case = (replace(node.else_case[0]), node.else_case[1])
+	elif node_type is ForNode:
+		node.start_value_node = replace(node.start_value_node)
+		node.end_value_node = replace(node.end_value_node)
+		if node.step_value_node:
+			node.step_value_node = replace(node.step_value_node)
+		node.body_node = replace(node.body_node)
+	elif node_type is ForInNode:
+		node.iterable_node = replace(node.iterable_node)
+		node.body_node = replace(node.body_node)
+	elif node_type is WhileNode:
+		node.condition_node = replace(node.condition_node)
+		node.body_node = replace(node.body_node)
+	elif node_type is FunctionNode:
+		node.body_node = replace(node.body_node)
+	elif node_type is CallNode:
+		node.node_to_call = replace(node.node_to_call)
+		node.argument_nodes = [replace(argument_node) for argument_node in node.argument_nodes]
+	elif node_type is ReturnNode:
+		if node.node_to_return:
+			node.node_to_return = replace(node.node_to_return)
+	elif node_type is YieldNode:
+		if node.node_to_yield:
+			node.node_to_yield = replace(node.node_to_yield)
+	elif node_type is SequenceNode:
+		node.statement_nodes = [replace(statement_node) for statement_node in node.statement_nodes]
+		node.value_node = replace(node.value_node)
+	return node
+
+def count_nodes(node):
+	return 1 + sum(count_nodes(child_node) for child_node in child_nodes(node))
+
+def assigned_names(node, names=None):
+	# The names a node assigns in its own scope: a nested function only binds its own name there
+	if names is None:
+		names = set()
+	node_type = type(node)
+	if node_type is VariableAssignamentNode or node_type is ForNode or node_type is ForInNode:
+		names.add(node.variable_name_token.value)
+	elif node_type is FunctionNode:
+		if node.variable_name_token:
+			names.add(node.variable_name_token.value)
+		return names
+	for child_node in child_nodes(node):
+		assigned_names(child_node, names)
+	return names
+
+def binding_counts(node, counts=None):
+	# How many times each name is bound anywhere in the program, arguments included
+	if counts is None:
+		counts = {}
+	node_type = type(node)
+	if node_type is VariableAssignamentNode or node_type is ForNode or node_type is ForInNode:
+		name = node.variable_name_token.value
+		counts[name] = counts.get(name, 0) + 1
+	elif node_type is FunctionNode:
+		name_tokens = node.argument_name_tokens + ([node.variable_name_token] if node.variable_name_token else [])
+		for name_token in name_tokens:
+			counts[name_token.value] = counts.get(name_token.value, 0) + 1
+	for child_node in child_nodes(node):
+		binding_counts(child_node, counts)
+	return counts
+
+def literal_value(node):
+	if type(node) is NumberNode:
+		return Number(node.token.value)
+	if type(node) is StringNode:
+		return String(node.token.value)
+	return None
+
+def literal_node(value, span):
+	if type(value) is Number:
+		token_type = TT_FLOAT if isinstance(value.value, float) else TT_INT
+		return NumberNode(Token(token_type, value.value, span.start, span.end, span.source))
+	if type(value) is String:
+		return StringNode(Token(TT_STRING, value.value, span.start, span.end, span.source))
+	return None
+
+def operation_of(node):
+	operation_token = node.operation_token
+	if operation_token.type == TT_KEYWORD:
+		return KEYWORD_OPERATIONS[operation_token.value]
+	return BINARY_OPERATIONS[operation_token.type]
+
+###########################################
+# PASSES
+###########################################
+
+class OptimizationPass:
+	name = None
+	level = 1
+	# Global names the pass has added to the program, for the caller to remove once it has run
+	temporary_names = ()
+
+	def __init__(self):
+		self.visit_methods = {}
+
+	def run(self, node, symbol_table):
+		return self.visit(node)
+
+	def visit(self, node):
+		method = self.visit_methods.get(type(node))
+		if method is None:
+			method = self.visit_methods[type(node)] = getattr(self, f'visit_{type(node).__name__}', self.visit_children)
+		return method(node)
+
+	def visit_children(self, node):
+		return replace_child_nodes(node, self.visit)
+
+class ConstantFolding(OptimizationPass):
+	# Operations on literals are done once, here, exactly as the engines would do them; an
+	# operation that fails, or whose result would be too big to keep in the tree, is left alone
+	name = 'constant folding'
+	level = 1
+
+	def visit_BinaryOperationNode(self, node):
+		self.visit_children(node)
+		left, right = literal_value(node.left_node), literal_value(node.right_node)
+		if left is not None and node.operation_token.type == TT_KEYWORD and short_circuits(node, left):
+			return literal_node(left, node)
+		if left is None or right is None:
+			return node
+
+		method_name, number_operation = operation_of(node)
+		try:
+			if self.is_too_big(node, left, right):
+				return node
+			if type(left) is Number and type(right) is Number:
+				try:
+					return literal_node(Number(number_operation(left.value, right.value)), node)
+				except ArithmeticError:
+					pass
+			result, error = getattr(left, method_name)(right)
+		except Exception:
+			return node
+
+		if error:
+			return node
+		return literal_node(result, node) or node
+
+	def visit_UnaryOperationNode(self, node):
+		self.visit_children(node)
+		value = literal_value(node.node)
+		if value is None:
+			return node
+
+		if node.operation_token.type == TT_MINUS:
+			result, error = value.multed_by(Number(-1))
+		elif node.operation_token.matches(TT_KEYWORD, 'not'):
+			result, error = value.notted()
+		else:
+			result, error = value, None
+
+		if error:
+			return node
+		return literal_node(result, node) or node
+
+	def is_too_big(self, node, left, right):
+		operation_type = node.operation_token.type
+		if operation_type == TT_POW and type(left) is Number and type(right) is Number:
+			return abs(right.value) > FOLDED_EXPONENT_LIMIT and abs(left.value) > 1
+		if operation_type == TT_MUL and type(left) is String and type(right) is Number:
+			return len(left.value) * right.value > FOLDED_STRING_LIMIT
+		if operation_type == TT_PLUS and type(left) is String and type(right) is String:
+			return len(left.value) + len(right.value) > FOLDED_STRING_LIMIT
+		return False
+
+class DeadBranchElimination(OptimizationPass):
+	# A case whose condition is a literal is either never taken, and dropped, or always taken,
+	# and becomes the else case in place of everything after it
+	name = 'dead branch elimination'
+	level = 1
+
+	def visit_IfNode(self, node):
+		self.visit_children(node)
+		cases = []
+
+		for condition, expression, should_return_null in node.cases:
+			value = literal_value(condition)
+			if value is None:
+				cases.append((condition, expression, should_return_null))
+			elif value.is_true():
+				node.else_case = (expression, should_return_null)
+				break
+
+		node.cases = cases
+		if not cases and node.else_case and not node.else_case[1]:
+			return node.else_case[0]
+		return node
+
+class ConstantNameFolding(OptimizationPass):
+	# Assumes the names are not reassigned by scripts loaded with run
+	name = 'constant name folding'
+	level = 2
+
+	def run(self, node, symbol_table):
+		counts = binding_counts(node)
+		self.constants = {}
+		for name, value in (('null', Number.null), ('False', Number.false), ('True', Number.true), ('math_pi', Number.math_pi)):
+			if name not in counts and symbol_table is not None and symbol_table.get(name) is value:
+				self.constants[name] = value
+		return self.visit(node)
+
+	def visit_VarAccessNode(self, node):
+		value = self.constants.get(node.variable_name_token.value)
+		return node if value is None else literal_node(value, node)
+
+class FunctionInlining(OptimizationPass):
+	# A call to a small arrow function defined once, at the top of the program, is replaced by
+	# the function's expression. An error raised by that expression is reported at the call,
+	# without a frame for the function, and an argument it does not use is not looked up
+	name = 'function inlining'
+	level = 2
+
+	def run(self, node, symbol_table):
+		if type(node) is not ListNode:
+			return node
+
+		counts = binding_counts(node)
+		self.functions = {}
+
+		element_nodes = node.element_nodes
+		for index, element_node in enumerate(element_nodes):
+			element_node = element_nodes[index] = self.visit(element_node)
+			if type(element_node) is FunctionNode and self.is_inlinable(element_node, counts):
+				self.functions[element_node.variable_name_token.value] = element_node
+		return node
+
+	def is_inlinable(self, node, counts):
+		if not node.variable_name_token or not node.should_auto_return or counts[node.variable_name_token.value] != 1:
+			return False
+
+		argument_names = [argument_name.value for argument_name in node.argument_name_tokens]
+		if len(set(argument_names)) != len(argument_names):
+			return False
+		return count_nodes(node.body_node) <= INLINING_NODE_LIMIT and self.is_expression(node.body_node, argument_names)
+
+	def is_expression(self, node, argument_names):
+		node_type = type(node)
+		if node_type is VarAccessNode:
+			return node.variable_name_token.value in argument_names
+		if node_type in (NumberNode, StringNode, BinaryOperationNode, UnaryOperationNode, IfNode):
+			return all(self.is_expression(child_node, argument_names) for child_node in child_nodes(node))
+		return False
+
+	def visit_CallNode(self, node):
+		self.visit_children(node)
+		if type(node.node_to_call) is not VarAccessNode:
+			return node
+
+		function = self.functions.get(node.node_to_call.variable_name_token.value)
+		if not function or len(node.argument_nodes) != len(function.argument_name_tokens):
+			return node
+		if not all(type(argument_node) in (NumberNode, StringNode, VarAccessNode) for argument_node in node.argument_nodes):
+			return node
+
+		arguments = {argument_name.value: argument_node for argument_name, argument_node in zip(function.argument_name_tokens, node.argument_nodes)}
+		return self.copy(function.body_node, arguments, node)
+
+	def copy(self, node, arguments, span):
+		if type(node) is VarAccessNode:
+			argument_node = arguments[node.variable_name_token.value]
+			return type(argument_node)(*[getattr(argument_node, field) for field in argument_node.constructor_fields])
+
+		fields = []
+		for field in node.constructor_fields:
+			value = getattr(node, field)
+			if field == 'cases':
+				value = [(self.copy(condition, arguments, span), self.copy(expression, arguments, span), should_return_null) for condition, expression, should_return_null in value]
+			elif field == 'else_case' and value:
+				value = (self.copy(value[0], arguments, span), value[1])
+			elif isinstance(value, Span) and not isinstance(value, Token):
+				value = self.copy(value, arguments, span)
+			fields.append(value)
+
+		copied_node = type(node)(*fields)
+		copied_node.start, copied_node.end, copied_node.source = span.start, span.end, span.source
+		return copied_node
+
+class LoopInvariantMotion(OptimizationPass):
+	# An arithmetic expression inside a loop that only reads numbers the loop does not assign is
+	# worked out once, before the loop. Only expressions that cannot fail are moved, and only
+	# names assigned in the scope itself, and before the loop, count as known numbers: this
+	# assumes scripts loaded with run do not reassign them
+	name = 'loop invariant motion'
+	level = 2
+	# Temporaries are numbered across runs, so a script loaded with run inside a loop cannot
+	# overwrite those of the loop
+	invariant_numbers = itertools.count()
+
+	def run(self, node, symbol_table):
+		self.numbers = set()
+		self.is_top_level = True
+		self.temporary_names = []
+		return self.visit_scope(node, set())
+
+	def visit_scope(self, node, argument_names):
+		enclosing_numbers = self.numbers
+		self.numbers = self.number_names(node, argument_names)
+		node = self.hoist(node, set())
+		self.numbers = enclosing_numbers
+		return node
+
+	def number_names(self, node, argument_names):
+		assignments = {}
+		self.collect_assignments(node, assignments)
+		names = set(assignments) - argument_names
+
+		is_changed = True
+		while is_changed:
+			is_changed = False
+			for name in list(names):
+				if not all(value_node is not None and self.is_number(value_node, names) for value_node in assignments[name]):
+					names.discard(name)
+					is_changed = True
+		return names
+
+	def collect_assignments(self, node, assignments):
+		node_type = type(node)
+		if node_type is VariableAssignamentNode:
+			assignments.setdefault(node.variable_name_token.value, []).append(node.value_node)
+		elif node_type is ForNode:
+			assignments.setdefault(node.variable_name_token.value, [])
+		elif node_type is ForInNode:
+			assignments.setdefault(node.variable_name_token.value, []).append(None)
+		elif node_type is FunctionNode:
+			if node.variable_name_token:
+				assignments.setdefault(node.variable_name_token.value, []).append(None)
+			return
+		for child_node in child_nodes(node):
+			self.collect_assignments(child_node, assignments)
+
+	def is_number(self, node, names):
+		node_type = type(node)
+		if node_type is NumberNode:
+			return True
+		if node_type is VarAccessNode:
+			return node.variable_name_token.value in names
+		if node_type is VariableAssignamentNode:
+			return self.is_number(node.value_node, names)
+		if node_type is BinaryOperationNode:
+			return node.operation_token.type != TT_POW and self.is_number(node.left_node, names) and self.is_number(node.right_node, names)
+		if node_type is UnaryOperationNode:
+			return self.is_number(node.node, names)
+		return False
+
+	def is_invariant(self, node, names):
+		node_type = type(node)
+		if node_type is NumberNode:
+			return True
+		if node_type is VarAccessNode:
+			return node.variable_name_token.value in names
+		if node_type is UnaryOperationNode:
+			return self.is_invariant(node.node, names)
+		if node_type is not BinaryOperationNode or node.operation_token.type == TT_POW:
+			return False
+		if node.operation_token.type == TT_DIV:
+			divisor = literal_value(node.right_node)
+			if divisor is None or type(divisor) is not Number or divisor.value == 0:
+				return False
+		return self.is_invariant(node.left_node, names) and self.is_invariant(node.right_node, names)
+
+	def reads_variable(self, node):
+		return type(node) is VarAccessNode or any(self.reads_variable(child_node) for child_node in child_nodes(node))
+
+	def hoist(self, node, known_names):
+		node_type = type(node)
+		if node_type is FunctionNode:
+			enclosing_is_top_level, self.is_top_level = self.is_top_level, False
+			node = replace_child_nodes(node, lambda body_node: self.visit_scope(body_node, {argument_name.value for argument_name in node.argument_name_tokens}))
+			self.is_top_level = enclosing_is_top_level
+			return node
+
+		if node_type is ListNode:
+			known_names = set(known_names)
+			element_nodes = []
+			for element_node in node.element_nodes:
+				element_nodes.append(self.hoist(element_node, known_names))
+				known_names |= self.definitely_assigned(element_node)
+			node.element_nodes = element_nodes
+			return node
+
+		if node_type is ForNode or node_type is ForInNode or node_type is WhileNode:
+			names = (self.numbers & known_names) - assigned_names(node)
+			assignments = []
+			if node_type is WhileNode:
+				node.condition_node = self.extract(node.condition_node, names, assignments)
+			node.body_node = self.extract(node.body_node, names, assignments)
+			replace_child_nodes(node, lambda child_node: self.hoist(child_node, known_names))
+			return SequenceNode(assignments, node) if assignments else node
+
+		return replace_child_nodes(node, lambda child_node: self.hoist(child_node, known_names))
+
+	def definitely_assigned(self, node):
+		if type(node) is VariableAssignamentNode:
+			return {node.variable_name_token.value} | self.definitely_assigned(node.value_node)
+		if type(node) is SequenceNode:
+			return set().union(*[self.definitely_assigned(statement_node) for statement_node in node.statement_nodes])
+		return set()
+
+	def extract(self, node, names, assignments):
+		if type(node) is FunctionNode:
+			return node
+		if type(node) in (BinaryOperationNode, UnaryOperationNode) and self.is_invariant(node, names) and self.reads_variable(node):
+			invariant_token = Token(TT_IDENTIFIER, f'$invariant_{next(self.invariant_numbers)}', node.start, node.end, node.source)
+			if self.is_top_level:
+				self.temporary_names.append(invariant_token.value)
+			assignments.append(VariableAssignamentNode(invariant_token, node))
+			return VarAccessNode(invariant_token)
+		return replace_child_nodes(node, lambda child_node: self.extract(child_node, names, assignments))
+
+###########################################
+# OPTIMIZER
+###########################################
+
+class Optimizer:
+	def __init__(self, symbol_table=None):
+		# Passes run in this order, each one if the optimization level reaches its own
+		self.symbol_table = symbol_table
+		self.passes = [ConstantNameFolding(), FunctionInlining(), ConstantFolding(), DeadBranchElimination(), LoopInvariantMotion()]
+		self.timings = {}
+
+	def optimize(self, node, level=OPTIMIZATION_LEVEL):
+		self.temporary_names = []
+		for optimization_pass in self.passes:
+			if optimization_pass.level > level:
+				continue
+
+			start_time = time.perf_counter()
+			node = optimization_pass.run(node, self.symbol_table)
+			elapsed_time = time.perf_counter() - start_time
+			self.temporary_names.extend(optimization_pass.temporary_names)
+
+			runs, total_time = self.timings.get(optimization_pass.name, (0, 0.0))
+			self.timings[optimization_pass.name] = (runs + 1, total_time + elapsed_time)
+		return node
+
+	def statistics(self):
+		return [{
+			'pass': optimization_pass.name,
+			'level': optimization_pass.level,
+			'runs': self.timings.get(optimization_pass.name, (0, 0.0))[0],
+			'time': self.timings.get(optimization_pass.name, (0, 0.0))[1],
+		} for optimization_pass in self.passes]
+
+	def reset(self):
+		self.timings = {}
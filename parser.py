@@ -1,85 +1,132 @@
 from constants import *
 from error import InvalidSyntaxError
+from lexer import Span
 from typing import Self
 
 ###########################################
 # NODES
 ###########################################
 
-class NumberNode:
+class NumberNode(Span):
+	__slots__ = ('token',)
+	constructor_fields = ('token',)
+
 	def __init__(self, token):
 		self.token = token
 
-		self.position_start = self.token.position_start
-		self.position_end = self.token.position_end
+		self.start = self.token.start
+		self.end = self.token.end
+		self.source = self.token.source
 
 	def __repr__(self):
 		return f'{self.token}'
 
-class StringNode:
+class StringNode(Span):
+	__slots__ = ('token',)
+	constructor_fields = ('token',)
+
 	def __init__(self, token):
 		self.token = token
 
-		self.position_start = self.token.position_start
-		self.position_end = self.token.position_end
+		self.start = self.token.start
+		self.end = self.token.end
+		self.source = self.token.source
 
 	def __repr__(self):
 		return f'{self.token}'
 
-class ListNode:
-	def __init__(self, element_nodes, position_start, position_end):
+class ListNode(Span):
+	__slots__ = ('element_nodes',)
+	constructor_fields = ('element_nodes', 'start', 'end', 'source')
+
+	def __init__(self, element_nodes, start, end, source):
 		self.element_nodes = element_nodes
 
-		self.position_start = position_start
-		self.position_end = position_end
+		self.start = start
+		self.end = end
+		self.source = source
+
+class MapNode(Span):
+	__slots__ = ('entry_nodes',)
+	constructor_fields = ('entry_nodes', 'start', 'end', 'source')
+
+	def __init__(self, entry_nodes, start, end, source):
+		self.entry_nodes = entry_nodes
+
+		self.start = start
+		self.end = end
+		self.source = source
+
+class VarAccessNode(Span):
+	__slots__ = ('variable_name_token', 'address')
+	constructor_fields = ('variable_name_token',)
 
-class VarAccessNode:
 	def __init__(self, variable_name_token):
 		self.variable_name_token = variable_name_token
 
-		self.position_start = self.variable_name_token.position_start
-		self.position_end = self.variable_name_token.position_end
+		self.start = self.variable_name_token.start
+		self.end = self.variable_name_token.end
+		self.source = self.variable_name_token.source
+
+class VariableAssignamentNode(Span):
+	__slots__ = ('variable_name_token', 'value_node', 'slot')
+	constructor_fields = ('variable_name_token', 'value_node')
 
-class VariableAssignamentNode:
 	def __init__(self, variable_name_token, value_node):
 		self.variable_name_token = variable_name_token
 		self.value_node = value_node
 
-		self.position_start = self.variable_name_token.position_start
-		self.position_end = self.value_node.position_end
+		self.start = self.variable_name_token.start
+		self.end = self.value_node.end
+		self.source = self.variable_name_token.source
+
+class BinaryOperationNode(Span):
+	__slots__ = ('left_node', 'operation_token', 'right_node', 'operate')
+	constructor_fields = ('left_node', 'operation_token', 'right_node')
 
-class BinaryOperationNode:
 	def __init__(self, left_node, operation_token, right_node):
 		self.left_node = left_node
 		self.operation_token = operation_token
 		self.right_node = right_node
 
-		self.position_start = self.left_node.position_start
-		self.position_end = self.right_node.position_end
+		self.start = self.left_node.start
+		self.end = self.right_node.end
+		self.source = self.left_node.source
 
 	def __repr__(self):
 		return f'({self.left_node}, {self.operation_token}, {self.right_node})'
 
-class UnaryOperationNode:
+class UnaryOperationNode(Span):
+	__slots__ = ('operation_token', 'node')
+	constructor_fields = ('operation_token', 'node')
+
 	def __init__(self, operation_token, node):
 		self.operation_token = operation_token
 		self.node = node
 
-		self.position_start = self.operation_token.position_start
-		self.position_end = node.position_end
+		self.start = self.operation_token.start
+		self.end = node.end
+		self.source = self.operation_token.source
 
 	def __repr__(self):
 		return f'({self.operation_token}, {self.node})'
 
-class IfNode:
+class IfNode(Span):
+	__slots__ = ('cases', 'else_case')
+	constructor_fields = ('cases', 'else_case')
+
 	def __init__(self, cases, else_case):
 		self.cases = cases
 		self.else_case = else_case
 
-		self.position_start = self.cases[0][0].position_start
-		self.position_end = (self.else_case or self.cases[len(self.cases) - 1])[0].position_end
+		self.start = self.cases[0][0].start
+		self.end = (self.else_case or self.cases[len(self.cases) - 1])[0].end
+		self.source = self.cases[0][0].source
+
+class ForNode(Span):
+	__slots__ = ('variable_name_token', 'start_value_node', 'end_value_node', 'step_value_node', 'body_node', 'should_return_null', 'slot', 'trace')
+	constructor_fields = ('variable_name_token', 'start_value_node', 'end_value_node', 'step_value_node', 'body_node', 'should_return_null')
 
-class ForNode:
 	def __init__(self, variable_name_token, start_value_node, end_value_node, step_value_node, body_node, should_return_null):
 		self.variable_name_token = variable_name_token
 		self.start_value_node = start_value_node
@@ -88,19 +135,41 @@ class ForNode:
 		self.body_node = body_node
 		self.should_return_null = should_return_null
 
-		self.position_start = self.variable_name_token.position_start
-		self.position_end = self.body_node.position_end
+		self.start = self.variable_name_token.start
+		self.end = self.body_node.end
+		self.source = self.variable_name_token.source
+
+class ForInNode(Span):
+	__slots__ = ('variable_name_token', 'iterable_node', 'body_node', 'should_return_null', 'slot')
+	constructor_fields = ('variable_name_token', 'iterable_node', 'body_node', 'should_return_null')
+
+	def __init__(self, variable_name_token, iterable_node, body_node, should_return_null):
+		self.variable_name_token = variable_name_token
+		self.iterable_node = iterable_node
+		self.body_node = body_node
+		self.should_return_null = should_return_null
+
+		self.start = self.variable_name_token.start
+		self.end = self.body_node.end
+		self.source = self.variable_name_token.source
+
+class WhileNode(Span):
+	__slots__ = ('condition_node', 'body_node', 'should_return_null', 'trace')
+	constructor_fields = ('condition_node', 'body_node', 'should_return_null')
 
-class WhileNode:
 	def __init__(self, condition_node, body_node, should_return_null):
 		self.condition_node = condition_node
 		self.body_node = body_node
 		self.should_return_null = should_return_null
 
-		self.position_start = self.condition_node.position_start
-		self.position_end = self.body_node.position_end
+		self.start = self.condition_node.start
+		self.end = self.body_node.end
+		self.source = self.condition_node.source
+
+class FunctionNode(Span):
+	__slots__ = ('variable_name_token', 'argument_name_tokens', 'body_node', 'should_auto_return', 'slot', 'scope')
+	constructor_fields = ('variable_name_token', 'argument_name_tokens', 'body_node', 'should_auto_return')
 
-class FunctionNode:
 	def __init__(self, variable_name_token, argument_name_tokens, body_node, should_auto_return):
 		self.variable_name_token = variable_name_token
 		self.argument_name_tokens = argument_name_tokens
@@ -108,42 +177,85 @@ class FunctionNode:
 		self.should_auto_return = should_auto_return
 
 		if self.variable_name_token:
-			self.position_start = self.variable_name_token.position_start
+			self.start = self.variable_name_token.start
 		elif len(self.argument_name_tokens) > 0:
-			self.position_start = self.argument_name_tokens[0].position_start
+			self.start = self.argument_name_tokens[0].start
 		else:
-			self.position_start = self.body_node.position_start
+			self.start = self.body_node.start
+
+		self.end = self.body_node.end
+		self.source = self.body_node.source
 
-		self.position_end = self.body_node.position_end
+class CallNode(Span):
+	__slots__ = ('node_to_call', 'argument_nodes', 'is_tail_call')
+	constructor_fields = ('node_to_call', 'argument_nodes')
 
-class CallNode:
 	def __init__(self, node_to_call, argument_nodes):
 		self.node_to_call = node_to_call
 		self.argument_nodes = argument_nodes
 
-		self.position_start = self.node_to_call.position_start
+		self.start = self.node_to_call.start
 
 		if len(self.argument_nodes) > 0:
-			self.position_end = self.argument_nodes[len(self.argument_nodes) - 1].position_end
+			self.end = self.argument_nodes[len(self.argument_nodes) - 1].end
 		else:
-			self.position_end = self.node_to_call.position_end
+			self.end = self.node_to_call.end
 
-class ReturnNode:
-  def __init__(self, node_to_return, position_start, position_end):
-    self.node_to_return = node_to_return
+		self.source = self.node_to_call.source
 
-    self.position_start = position_start
-    self.position_end = position_end
+class ReturnNode(Span):
+	__slots__ = ('node_to_return',)
+	constructor_fields = ('node_to_return', 'start', 'end', 'source')
 
-class ContinueNode:
-  def __init__(self, position_start, position_end):
-    self.position_start = position_start
-    self.position_end = position_end
+	def __init__(self, node_to_return, start, end, source):
+		self.node_to_return = node_to_return
 
-class BreakNode:
-  def __init__(self, position_start, position_end):
-    self.position_start = position_start
-    self.position_end = position_end
+		self.start = start
+		self.end = end
+		self.source = source
+
+class YieldNode(Span):
+	__slots__ = ('node_to_yield',)
+	constructor_fields = ('node_to_yield', 'start', 'end', 'source')
+
+	def __init__(self, node_to_yield, start, end, source):
+		self.node_to_yield = node_to_yield
+
+		self.start = start
+		self.end = end
+		self.source = source
+
+class ContinueNode(Span):
+	__slots__ = ()
+	constructor_fields = ('start', 'end', 'source')
+
+	def __init__(self, start, end, source):
+		self.start = start
+		self.end = end
+		self.source = source
+
+class BreakNode(Span):
+	__slots__ = ()
+	constructor_fields = ('start', 'end', 'source')
+
+	def __init__(self, start, end, source):
+		self.start = start
+		self.end = end
+		self.source = source
+
+class SequenceNode(Span):
+	__slots__ = ('statement_nodes', 'value_node')
+	constructor_fields = ('statement_nodes', 'value_node')
+
+	def __init__(self, statement_nodes, value_node):
+		self.statement_nodes = statement_nodes
+		self.value_node = value_node
+
+		self.start = self.value_node.start
+		self.end = self.value_node.end
+		self.source = self.value_node.source
+
+RELEASE_THRESHOLD = 64
 
 ###########################################
 # PARSER RESULT
@@ -189,13 +301,17 @@ class ParseResult:
 
 class Parser:
 	def __init__(self, tokens):
-		self.tokens = tokens
+		self.tokens = iter(tokens)
+		self.buffer = []
+		self.buffer_start = 0
+		self.rewind_marks = []
 		self.token_index = -1
 		self.advance()
 
 	def advance(self):
 		self.token_index += 1
 		self.update_current_token()
+		self.release_tokens()
 		return self.current_token
 
 	def reverse(self, amount=1):
@@ -204,8 +320,25 @@ class Parser:
 		return self.current_token
 	
 	def update_current_token(self):
-		if self.token_index >= 0 and self.token_index < len(self.tokens):
-			self.current_token = self.tokens[self.token_index]
+		buffer_index = self.token_index - self.buffer_start
+
+		while buffer_index >= len(self.buffer):
+			token = next(self.tokens, None)
+			if token is None:
+				break
+			self.buffer.append(token)
+
+		if buffer_index >= 0 and buffer_index < len(self.buffer):
+			self.current_token = self.buffer[buffer_index]
+
+	def release_tokens(self):
+		# Only tokens after the oldest pending rewind point can be needed again
+		keep_from = self.rewind_marks[0] if self.rewind_marks else self.token_index
+		release_count = min(keep_from - self.buffer_start, len(self.buffer))
+
+		if release_count >= RELEASE_THRESHOLD:
+			del self.buffer[:release_count]
+			self.buffer_start += release_count
 
 	def parse(self):
 		response = self.statements()
@@ -219,7 +352,7 @@ class Parser:
 	def statements(self):
 		response = ParseResult()
 		statements = []
-		position_start = self.current_token.position_start.copy()
+		start = self.current_token.start
 
 		while self.current_token.type == TT_NEWLINE:
 			response.register_advancement()
@@ -244,43 +377,60 @@ class Parser:
 			if not more_statements:
 				break
 			
+			self.rewind_marks.append(self.token_index)
 			statement = response.try_register(self.statement())
 			if not statement:
 				self.reverse(response.to_reverse_count)
+			self.rewind_marks.pop()
+
+			if not statement:
 				more_statements = False  
 				continue
 
 			statements.append(statement)
 
-		return response.success(ListNode(statements, position_start, self.current_token.position_end.copy()))
+		return response.success(ListNode(statements, start, self.current_token.end, self.current_token.source))
 
 	def statement(self):
 		response = ParseResult()
-		position_start = self.current_token.position_start.copy()
+		start = self.current_token.start
 
 		if self.current_token.matches(TT_KEYWORD, "return"):
 			response.register_advancement()
 			self.advance()
 
+			self.rewind_marks.append(self.token_index)
 			expression = response.try_register(self.expression())
 			if not expression:
 				self.reverse(response.to_reverse_count)
-			return response.success(ReturnNode(expression, position_start, self.current_token.position_end.copy()))
+			self.rewind_marks.pop()
+			return response.success(ReturnNode(expression, start, self.current_token.end, self.current_token.source))
+
+		if self.current_token.matches(TT_KEYWORD, "yield"):
+			response.register_advancement()
+			self.advance()
+
+			self.rewind_marks.append(self.token_index)
+			expression = response.try_register(self.expression())
+			if not expression:
+				self.reverse(response.to_reverse_count)
+			self.rewind_marks.pop()
+			return response.success(YieldNode(expression, start, self.current_token.end, self.current_token.source))
 
 		if self.current_token.matches(TT_KEYWORD, "continue"):
 			response.register_advancement()
 			self.advance()
-			return response.success(ContinueNode(position_start, self.current_token.position_end.copy()))
+			return response.success(ContinueNode(start, self.current_token.end, self.current_token.source))
 
 		if self.current_token.matches(TT_KEYWORD, "break"):
 			response.register_advancement()
 			self.advance()
-			return response.success(BreakNode(position_start, self.current_token.position_end.copy()))
+			return response.success(BreakNode(start, self.current_token.end, self.current_token.source))
 
 		expression = response.register(self.expression())
 		if response.error:
 				 return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-					"Expected 'return', 'continue', 'break', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[' or 'not'"))
+					"Expected 'return', 'yield', 'continue', 'break', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"))
 
 		return response.success(expression)
 
@@ -312,7 +462,7 @@ class Parser:
 
 		if response.error:
 			return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-														"Expected 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[' or 'not'"))
+														"Expected 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"))
 
 		return response.success(node)
 
@@ -333,7 +483,7 @@ class Parser:
 		
 		if response.error:
 			return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-														"Expected int, float, identifier, '+', '-', '(', '[' or 'not'"))
+														"Expected int, float, identifier, '+', '-', '(', '[', '{' or 'not'"))
 
 		return response.success(node)
 
@@ -378,7 +528,7 @@ class Parser:
 				argument_nodes.append(response.register(self.expression()))
 				if response.error:
 					return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-											"Expected ')', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[' or 'not'"))
+											"Expected ')', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"))
 
 				while self.current_token.type == TT_COMMA:
 					response.register_advancement()
@@ -437,6 +587,12 @@ class Parser:
 			if response.error: 
 				return response
 			return response.success(list_expression)
+
+		elif token.type == TT_LBRACE:
+			map_expression = response.register(self.map_expression())
+			if response.error: 
+				return response
+			return response.success(map_expression)
 		
 		elif token.matches(TT_KEYWORD, 'if'):
 			if_expression = response.register(self.if_expression())
@@ -463,12 +619,12 @@ class Parser:
 			return response.success(function_definition)
 
 		return response.failure(InvalidSyntaxError(token.position_start, token.position_end,
-								"Expected int, float, identifier, '+', '-', '(', '[', 'if', 'for', 'while', 'fn'"))
+								"Expected int, float, identifier, '+', '-', '(', '[', '{', 'if', 'for', 'while', 'fn'"))
 
 	def list_expression(self):
 		response = ParseResult()
 		element_nodes = []
-		position_start = self.current_token.position_start.copy()
+		start = self.current_token.start
 
 		if self.current_token.type != TT_LSQUARE:
 			return response.failure(InvalidSyntaxError(token.position_start, token.position_end, "Expected '['"))
@@ -483,7 +639,7 @@ class Parser:
 			element_nodes.append(response.register(self.expression()))
 			if response.error:
 				return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
-						                "Expected ']', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[' or 'not'"))
+						                "Expected ']', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"))
 
 			while self.current_token.type == TT_COMMA:
 				response.register_advancement()
@@ -499,7 +655,51 @@ class Parser:
 			response.register_advancement()
 			self.advance()
 
-		return response.success(ListNode(element_nodes, position_start, self.current_token.position_end.copy()))
+		return response.success(ListNode(element_nodes, start, self.current_token.end, self.current_token.source))
+
+	def map_expression(self):
+		response = ParseResult()
+		entry_nodes = []
+		start = self.current_token.start
+
+		response.register_advancement()
+		self.advance()
+
+		if self.current_token.type == TT_RBRACE:
+			end = self.current_token.end
+			response.register_advancement()
+			self.advance()
+			return response.success(MapNode(entry_nodes, start, end, self.current_token.source))
+
+		while True:
+			key_node = response.register(self.expression())
+			if response.error:
+				return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
+						                "Expected '}', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"))
+
+			if self.current_token.type != TT_COLON:
+				return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end, "Expected ':'"))
+
+			response.register_advancement()
+			self.advance()
+
+			value_node = response.register(self.expression())
+			if response.error:
+				return response
+			entry_nodes.append((key_node, value_node))
+
+			if self.current_token.type != TT_COMMA:
+				break
+			response.register_advancement()
+			self.advance()
+
+		if self.current_token.type != TT_RBRACE:
+			return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end, "Expected ',' or '}'"))
+
+		end = self.current_token.end
+		response.register_advancement()
+		self.advance()
+		return response.success(MapNode(entry_nodes, start, end, self.current_token.source))
 		
 	
 	def if_expression(self):
@@ -627,8 +827,11 @@ class Parser:
 		response.register_advancement()
 		self.advance()
 
+		if self.current_token.matches(TT_KEYWORD, 'in'):
+			return self.for_in_expression(response, variable_name)
+
 		if self.current_token.type != TT_EQ:
-			return response.failure(InvalidSyntaxError( self.current_token.position_start, self.current_token.position_end, f"Expected '='"))
+			return response.failure(InvalidSyntaxError( self.current_token.position_start, self.current_token.position_end, f"Expected '=' or 'in'"))
 		
 		response.register_advancement()
 		self.advance()
@@ -684,6 +887,42 @@ class Parser:
 
 		return response.success(ForNode(variable_name, start_value, end_value, step_value, body, False))
 
+	def for_in_expression(self, response, variable_name):
+		response.register_advancement()
+		self.advance()
+
+		iterable = response.register(self.expression())
+		if response.error: 
+			return response
+
+		if not self.current_token.matches(TT_KEYWORD, 'then'):
+			return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end, f"Expected 'then'"))
+
+		response.register_advancement()
+		self.advance()
+
+		if self.current_token.type == TT_NEWLINE:
+			response.register_advancement()
+			self.advance()
+
+			body = response.register(self.statements())
+			if response.error:
+				 return response
+
+			if not self.current_token.matches(TT_KEYWORD, 'end'):
+				return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,f"Expected 'end'"))
+
+			response.register_advancement()
+			self.advance()
+
+			return response.success(ForInNode(variable_name, iterable, body, True))
+
+		body = response.register(self.statement())
+		if response.error:
+			 return response
+
+		return response.success(ForInNode(variable_name, iterable, body, False))
+
 	def while_expression(self):
 		response = ParseResult()
 
@@ -824,4 +1063,439 @@ class Parser:
 			
 			left = BinaryOperationNode(left, operation_token, right)
 
-		return response.success(left)
\ No newline at end of file
+		return response.success(left)
+
+###########################################
+# PRATT PARSER
+###########################################
+
+STATEMENT_KEYWORDS = frozenset(('return', 'yield', 'continue', 'break'))
+ATOM_KEYWORDS = frozenset(('if', 'for', 'while', 'fn'))
+EXPRESSION_KEYWORDS = ATOM_KEYWORDS | {'let', 'not'}
+ATOM_TOKENS = frozenset((TT_INT, TT_FLOAT, TT_STRING, TT_IDENTIFIER, TT_LPAREN, TT_LSQUARE, TT_LBRACE))
+FACTOR_TOKENS = ATOM_TOKENS | {TT_PLUS, TT_MINUS}
+
+BINARY_PRECEDENCE = {
+	TT_EE: 1,
+	TT_NE: 1,
+	TT_LT: 1,
+	TT_GT: 1,
+	TT_LTE: 1,
+	TT_GTE: 1,
+	TT_PLUS: 2,
+	TT_MINUS: 2,
+	TT_MUL: 3,
+	TT_DIV: 3
+}
+
+EXPECTED_STATEMENT = "Expected 'return', 'yield', 'continue', 'break', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"
+EXPECTED_EXPRESSION = "Expected 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'"
+EXPECTED_COMPARISON = "Expected int, float, identifier, '+', '-', '(', '[', '{' or 'not'"
+EXPECTED_ATOM = "Expected int, float, identifier, '+', '-', '(', '[', '{', 'if', 'for', 'while', 'fn'"
+
+class ParseFailure(Exception):
+	def __init__(self, error):
+		Exception.__init__(self, error.details)
+		self.error = error
+
+class PrattParser:
+	def __init__(self, tokens):
+		self.tokens = iter(tokens)
+		self.current_token = None
+		self.advance()
+
+	def advance(self):
+		self.current_token = next(self.tokens, self.current_token)
+		return self.current_token
+
+	def fail(self, details):
+		raise ParseFailure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end, details))
+
+	def expect_keyword(self, keyword):
+		if not self.current_token.matches(TT_KEYWORD, keyword):
+			self.fail(f"Expected '{keyword}'")
+		self.advance()
+
+	def expect(self, type_, details):
+		if self.current_token.type != type_:
+			self.fail(details)
+		self.advance()
+
+	def starts_expression(self):
+		token = self.current_token
+		return token.type in FACTOR_TOKENS or (token.type == TT_KEYWORD and token.value in EXPRESSION_KEYWORDS)
+
+	def starts_statement(self):
+		token = self.current_token
+		return self.starts_expression() or (token.type == TT_KEYWORD and token.value in STATEMENT_KEYWORDS)
+
+	def parse(self):
+		response = ParseResult()
+		try:
+			node = self.statements()
+		except ParseFailure as failure:
+			return response.failure(failure.error)
+
+		if self.current_token.type != TT_EOF:
+			return response.failure(InvalidSyntaxError(self.current_token.position_start, self.current_token.position_end,
+														"Token cannot appear after previous tokens"))
+		return response.success(node)
+
+	###################################
+
+	def statements(self):
+		statements = []
+		start = self.current_token.start
+
+		while self.current_token.type == TT_NEWLINE:
+			self.advance()
+
+		statements.append(self.statement())
+
+		while True:
+			newline_count = 0
+			while self.current_token.type == TT_NEWLINE:
+				self.advance()
+				newline_count += 1
+
+			if newline_count == 0 or not self.starts_statement():
+				break
+
+			statements.append(self.statement())
+
+		return ListNode(statements, start, self.current_token.end, self.current_token.source)
+
+	def statement(self):
+		token = self.current_token
+
+		if token.type == TT_KEYWORD and token.value in STATEMENT_KEYWORDS:
+			self.advance()
+			if token.value == 'return' or token.value == 'yield':
+				expression = self.expression() if self.starts_expression() else None
+				node_type = ReturnNode if token.value == 'return' else YieldNode
+				return node_type(expression, token.start, self.current_token.end, self.current_token.source)
+			if token.value == 'continue':
+				return ContinueNode(token.start, self.current_token.end, self.current_token.source)
+			return BreakNode(token.start, self.current_token.end, self.current_token.source)
+
+		if not self.starts_expression():
+			self.fail(EXPECTED_STATEMENT)
+
+		return self.expression()
+
+	def expression(self):
+		if self.current_token.matches(TT_KEYWORD, 'let'):
+			self.advance()
+
+			if self.current_token.type != TT_IDENTIFIER:
+				self.fail("Expected identifier")
+
+			variable_name = self.current_token
+			self.advance()
+			self.expect(TT_EQ, "Expected '='")
+			return VariableAssignamentNode(variable_name, self.expression())
+
+		if not self.starts_expression():
+			self.fail(EXPECTED_EXPRESSION)
+
+		left = self.comparison()
+		token = self.current_token
+		while token.type == TT_KEYWORD and (token.value == 'and' or token.value == 'or'):
+			self.advance()
+			left = BinaryOperationNode(left, token, self.comparison())
+			token = self.current_token
+
+		return left
+
+	def comparison(self):
+		token = self.current_token
+
+		if token.matches(TT_KEYWORD, 'not'):
+			self.advance()
+			return UnaryOperationNode(token, self.comparison())
+
+		if token.type not in FACTOR_TOKENS and not (token.type == TT_KEYWORD and token.value in ATOM_KEYWORDS):
+			self.fail(EXPECTED_COMPARISON)
+
+		return self.binary_operation(1)
+
+	def binary_operation(self, minimum_precedence):
+		left = self.factor()
+
+		while True:
+			token = self.current_token
+			precedence = BINARY_PRECEDENCE.get(token.type, 0)
+			if precedence < minimum_precedence:
+				return left
+
+			self.advance()
+			left = BinaryOperationNode(left, token, self.binary_operation(precedence + 1))
+
+	def factor(self):
+		token = self.current_token
+
+		if token.type == TT_PLUS or token.type == TT_MINUS:
+			self.advance()
+			return UnaryOperationNode(token, self.factor())
+
+		node = self.atom()
+
+		if self.current_token.type == TT_LPAREN:
+			node = self.call(node)
+
+		while self.current_token.type == TT_POW:
+			token = self.current_token
+			self.advance()
+			node = BinaryOperationNode(node, token, self.factor())
+
+		return node
+
+	def call(self, atom):
+		self.advance()
+		argument_nodes = []
+
+		if self.current_token.type == TT_RPAREN:
+			self.advance()
+			return CallNode(atom, argument_nodes)
+
+		if not self.starts_expression():
+			self.fail("Expected ')', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'")
+		argument_nodes.append(self.expression())
+
+		while self.current_token.type == TT_COMMA:
+			self.advance()
+			argument_nodes.append(self.expression())
+
+		self.expect(TT_RPAREN, "Expected ',' or ')'")
+		return CallNode(atom, argument_nodes)
+
+	def atom(self):
+		token = self.current_token
+
+		if token.type == TT_INT or token.type == TT_FLOAT:
+			self.advance()
+			return NumberNode(token)
+
+		elif token.type == TT_IDENTIFIER:
+			self.advance()
+			return VarAccessNode(token)
+
+		elif token.type == TT_STRING:
+			self.advance()
+			return StringNode(token)
+
+		elif token.type == TT_LPAREN:
+			self.advance()
+			expression = self.expression()
+			self.expect(TT_RPAREN, "Expected ')'")
+			return expression
+
+		elif token.type == TT_LSQUARE:
+			return self.list_expression()
+
+		elif token.type == TT_LBRACE:
+			return self.map_expression()
+
+		elif token.type == TT_KEYWORD:
+			if token.value == 'if':
+				return self.if_expression()
+			elif token.value == 'for':
+				return self.for_expression()
+			elif token.value == 'while':
+				return self.while_expression()
+			elif token.value == 'fn':
+				return self.function_definition()
+
+		self.fail(EXPECTED_ATOM)
+
+	def list_expression(self):
+		element_nodes = []
+		start = self.current_token.start
+		self.advance()
+
+		if self.current_token.type == TT_RSQUARE:
+			self.advance()
+		else:
+			if not self.starts_expression():
+				self.fail("Expected ']', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'")
+			element_nodes.append(self.expression())
+
+			while self.current_token.type == TT_COMMA:
+				self.advance()
+				element_nodes.append(self.expression())
+
+			self.expect(TT_RSQUARE, "Expected ',' or ')'")
+
+		return ListNode(element_nodes, start, self.current_token.end, self.current_token.source)
+
+	def map_expression(self):
+		entry_nodes = []
+		start = self.current_token.start
+		self.advance()
+
+		if self.current_token.type != TT_RBRACE:
+			while True:
+				if not self.starts_expression():
+					self.fail("Expected '}', 'let', 'if', 'for', 'while', 'fn', int, float, identifier, '+', '-', '(', '[', '{' or 'not'")
+				key_node = self.expression()
+				self.expect(TT_COLON, "Expected ':'")
+				entry_nodes.append((key_node, self.expression()))
+
+				if self.current_token.type != TT_COMMA:
+					break
+				self.advance()
+
+			if self.current_token.type != TT_RBRACE:
+				self.fail("Expected ',' or '}'")
+
+		end = self.current_token.end
+		self.advance()
+		return MapNode(entry_nodes, start, end, self.current_token.source)
+
+	def block_or_statement(self):
+		# Returns the body and whether it was a NEWLINE ... block, leaving 'end' to the caller
+		if self.current_token.type == TT_NEWLINE:
+			self.advance()
+			return self.statements(), True
+		return self.statement(), False
+
+	def if_expression(self):
+		cases, else_case = self.if_expression_cases('if')
+		return IfNode(cases, else_case)
+
+	def if_expression_cases(self, case_keyword):
+		self.expect_keyword(case_keyword)
+		condition = self.expression()
+		self.expect_keyword('then')
+
+		body, is_block = self.block_or_statement()
+		cases = [(condition, body, is_block)]
+
+		if is_block and self.current_token.matches(TT_KEYWORD, 'end'):
+			self.advance()
+			return cases, None
+
+		if self.current_token.matches(TT_KEYWORD, 'elif'):
+			new_cases, else_case = self.if_expression_cases('elif')
+			cases.extend(new_cases)
+			return cases, else_case
+
+		return cases, self.else_expression()
+
+	def else_expression(self):
+		if not self.current_token.matches(TT_KEYWORD, 'else'):
+			return None
+
+		self.advance()
+
+		if self.current_token.type == TT_NEWLINE:
+			self.advance()
+			statements = self.statements()
+			if not self.current_token.matches(TT_KEYWORD, 'end'):
+				self.fail("Expected 'end'")
+			self.advance()
+			return (statements, True)
+
+		return (self.expression(), False)
+
+	def for_expression(self):
+		self.advance()
+
+		if self.current_token.type != TT_IDENTIFIER:
+			self.fail("Expected identifier")
+
+		variable_name = self.current_token
+		self.advance()
+
+		if self.current_token.matches(TT_KEYWORD, 'in'):
+			self.advance()
+			iterable = self.expression()
+			self.expect_keyword('then')
+			body, is_block = self.block_or_statement()
+
+			if is_block:
+				self.expect_keyword('end')
+
+			return ForInNode(variable_name, iterable, body, is_block)
+
+		self.expect(TT_EQ, "Expected '=' or 'in'")
+
+		start_value = self.expression()
+		self.expect_keyword('to')
+		end_value = self.expression()
+
+		step_value = None
+		if self.current_token.matches(TT_KEYWORD, 'step'):
+			self.advance()
+			step_value = self.expression()
+
+		self.expect_keyword('then')
+		body, is_block = self.block_or_statement()
+
+		if is_block:
+			self.expect_keyword('end')
+
+		return ForNode(variable_name, start_value, end_value, step_value, body, is_block)
+
+	def while_expression(self):
+		self.advance()
+
+		condition = self.expression()
+		self.expect_keyword('then')
+		body, is_block = self.block_or_statement()
+
+		if is_block:
+			self.expect_keyword('end')
+
+		return WhileNode(condition, body, is_block)
+
+	def function_definition(self):
+		self.advance()
+
+		if self.current_token.type == TT_IDENTIFIER:
+			variable_name_token = self.current_token
+			self.advance()
+			if self.current_token.type != TT_LPAREN:
+				self.fail("Expected '('")
+		else:
+			variable_name_token = None
+			if self.current_token.type != TT_LPAREN:
+				self.fail("Expected identifier or '('")
+
+		self.advance()
+		argument_name_tokens = []
+
+		if self.current_token.type == TT_IDENTIFIER:
+			argument_name_tokens.append(self.current_token)
+			self.advance()
+
+			while self.current_token.type == TT_COMMA:
+				self.advance()
+
+				if self.current_token.type != TT_IDENTIFIER:
+					self.fail("Expected identifier")
+
+				argument_name_tokens.append(self.current_token)
+				self.advance()
+
+			self.expect(TT_RPAREN, "Expected ',' or ')'")
+		else:
+			self.expect(TT_RPAREN, "Expected identifier or ')'")
+
+		if self.current_token.type == TT_ARROW:
+			self.advance()
+			return FunctionNode(variable_name_token, argument_name_tokens, self.expression(), True)
+
+		if self.current_token.type != TT_NEWLINE:
+			self.fail("Expected '->' or NEWLINE")
+
+		self.advance()
+		body = self.statements()
+		self.expect_keyword('end')
+
+		return FunctionNode(variable_name_token, argument_name_tokens, body, False)
+
+PARSERS = {
+	'classic': Parser,
+	'pratt': PrattParser
+}
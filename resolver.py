@@ -0,0 +1,198 @@
+from parser import CallNode, IfNode
+
+###########################################
+# SCOPES
+###########################################
+
+class Scope:
+	def __init__(self, parent=None):
+		self.parent = parent
+		self.slots = {}
+		self.argument_slots = []
+		self.is_generator = False
+		self.generator_code = None
+
+	@property
+	def frame_size(self):
+		return len(self.slots)
+
+	def declare(self, name):
+		slot = self.slots.get(name)
+		if slot is None:
+			slot = self.slots[name] = len(self.slots)
+		return slot
+
+###########################################
+# RESOLVER
+###########################################
+
+class Resolver:
+	# Top-level names stay in the global symbol table, where run-loaded scripts and later shell lines can define them
+	def __init__(self, symbol_table=None):
+		self.scope = None
+		self.symbol_table = symbol_table
+		self.global_names = set()
+		self.accesses = []
+		self.tail_calls = []
+
+	def resolve(self, node):
+		self.visit(node)
+		# Names that a function of this program reads with no enclosing binding, and that are not
+		# global, can only be found in the chain of callers
+		dynamic_names = set()
+		for access_node, scope in self.accesses:
+			name = access_node.variable_name_token.value
+			access_node.address = self.address_of(name, scope)
+			if scope and not access_node.address and not self.is_global(name):
+				dynamic_names.add(name)
+
+		# A function that binds one of those names keeps its frame on tail calls, so the functions it
+		# calls can still read them
+		for call_node, scope in self.tail_calls:
+			call_node.is_tail_call = dynamic_names.isdisjoint(scope.slots)
+		self.accesses = []
+		self.tail_calls = []
+		return node
+
+	def is_global(self, name):
+		return name in self.global_names or (self.symbol_table is not None and self.symbol_table.get(name) is not None)
+
+	def address_of(self, name, scope):
+		address = []
+		depth = 0
+		while scope:
+			slot = scope.slots.get(name)
+			if slot is not None:
+				address.append((depth, slot))
+			scope = scope.parent
+			depth += 1
+		return tuple(address)
+
+	def declare(self, name):
+		if self.scope is None:
+			self.global_names.add(name)
+			return None
+		return self.scope.declare(name)
+
+	def mark_tail_position(self, node, scope):
+		# The value of a node in tail position is what the function returns, so a call there can
+		# take over the frame of the function making it
+		if isinstance(node, CallNode):
+			self.tail_calls.append((node, scope))
+		elif isinstance(node, IfNode):
+			for _, expression, should_return_null in node.cases:
+				if not should_return_null:
+					self.mark_tail_position(expression, scope)
+			if node.else_case and not node.else_case[1]:
+				self.mark_tail_position(node.else_case[0], scope)
+
+	def visit(self, node):
+		method_name = f'visit_{type(node).__name__}'
+		method = getattr(self, method_name, self.no_visit_method)
+		return method(node)
+
+	def no_visit_method(self, node):
+		raise Exception(f'No visit_{type(node).__name__} method defined')
+
+	###################################
+
+	def visit_NumberNode(self, node):
+		pass
+
+	def visit_StringNode(self, node):
+		pass
+
+	def visit_ListNode(self, node):
+		for element_node in node.element_nodes:
+			self.visit(element_node)
+
+	def visit_MapNode(self, node):
+		for key_node, value_node in node.entry_nodes:
+			self.visit(key_node)
+			self.visit(value_node)
+
+	def visit_VarAccessNode(self, node):
+		self.accesses.append((node, self.scope))
+
+	def visit_VariableAssignamentNode(self, node):
+		self.visit(node.value_node)
+		node.slot = self.declare(node.variable_name_token.value)
+
+	def visit_BinaryOperationNode(self, node):
+		node.operate = None
+		self.visit(node.left_node)
+		self.visit(node.right_node)
+
+	def visit_UnaryOperationNode(self, node):
+		self.visit(node.node)
+
+	def visit_IfNode(self, node):
+		for condition, expression, _ in node.cases:
+			self.visit(condition)
+			self.visit(expression)
+		if node.else_case:
+			self.visit(node.else_case[0])
+
+	def visit_ForNode(self, node):
+		self.visit(node.start_value_node)
+		self.visit(node.end_value_node)
+		if node.step_value_node:
+			self.visit(node.step_value_node)
+		node.slot = self.declare(node.variable_name_token.value)
+		node.trace = None
+		self.visit(node.body_node)
+
+	def visit_ForInNode(self, node):
+		self.visit(node.iterable_node)
+		node.slot = self.declare(node.variable_name_token.value)
+		self.visit(node.body_node)
+
+	def visit_WhileNode(self, node):
+		node.trace = None
+		self.visit(node.condition_node)
+		self.visit(node.body_node)
+
+	def visit_FunctionNode(self, node):
+		node.slot = self.declare(node.variable_name_token.value) if node.variable_name_token else None
+
+		scope = Scope(self.scope)
+		scope.argument_slots = [scope.declare(argument_name.value) for argument_name in node.argument_name_tokens]
+		node.scope = scope
+
+		enclosing_scope = self.scope
+		self.scope = scope
+		self.visit(node.body_node)
+		self.scope = enclosing_scope
+
+		if node.should_auto_return:
+			self.mark_tail_position(node.body_node, scope)
+
+	def visit_CallNode(self, node):
+		node.is_tail_call = False
+		self.visit(node.node_to_call)
+		for argument_node in node.argument_nodes:
+			self.visit(argument_node)
+
+	def visit_ReturnNode(self, node):
+		if node.node_to_return:
+			self.visit(node.node_to_return)
+			if self.scope:
+				self.mark_tail_position(node.node_to_return, self.scope)
+
+	def visit_YieldNode(self, node):
+		# A yield anywhere in a function's own body, outside nested functions, makes it a generator
+		if node.node_to_yield:
+			self.visit(node.node_to_yield)
+		if self.scope:
+			self.scope.is_generator = True
+
+	def visit_ContinueNode(self, node):
+		pass
+
+	def visit_BreakNode(self, node):
+		pass
+
+	def visit_SequenceNode(self, node):
+		for statement_node in node.statement_nodes:
+			self.visit(statement_node)
+		self.visit(node.value_node)
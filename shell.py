@@ -1,10 +1,15 @@
-import main
+import main, sys
+
+optimization_level = main.OPTIMIZATION_LEVEL
+for argument in sys.argv[1:]:
+    if argument in ('-O0', '-O1', '-O2'):
+        optimization_level = int(argument[2:])
 
 while True:
     text = input("language > ")
     if text.strip() == "":
         continue
-    result, error = main.run('<stdin>', text)
+    result, error = main.run('<stdin>', text, optimization_level=optimization_level)
 
     if error:
         print(error.as_string())
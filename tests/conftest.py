@@ -0,0 +1,42 @@
+import contextlib, io, os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from interpreter import Interpreter
+
+BUILT_IN_SYMBOLS = dict(main.global_symbol_table.symbols)
+
+def reset_globals():
+	# Programs share the global symbol table, so each one starts with only the built-ins in it
+	main.global_symbol_table.symbols.clear()
+	main.global_symbol_table.symbols.update(BUILT_IN_SYMBOLS)
+
+@pytest.fixture(autouse=True)
+def isolated_run():
+	threshold = main.loop_compiler.threshold
+	reset_globals()
+	yield
+	reset_globals()
+	Interpreter.loop_compiler = main.loop_compiler
+	main.loop_compiler.threshold = threshold
+	main.loop_compiler.reset()
+
+def run_program(text, engine='interpreter', optimization_level=1, threshold=None, **options):
+	# Runs the program on fresh globals and returns what it printed followed by either its results
+	# or its error, as text. A threshold of 0 turns the loop compiler off
+	reset_globals()
+	if threshold is not None:
+		main.loop_compiler.threshold = threshold
+		main.loop_compiler.reset()
+
+	output = io.StringIO()
+	with contextlib.redirect_stdout(output):
+		result, error = main.run('<test>', text, engine=engine, optimization_level=optimization_level, **options)
+	return output.getvalue() + (error.as_string() if error else repr(result))
+
+@pytest.fixture
+def run():
+	return run_program
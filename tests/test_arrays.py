@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from conftest import run_program
+
+ENGINES = ['interpreter', 'vm', 'closures']
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('text, expected', [
+	('array([1, 2, 3]) * 2', '[array([2,4,6])]'),
+	('let a = array([1, 2, 3])\n[a + a, a - 1, 1 - a, a / 2, a ^ 2]', '[array([1,2,3]),[array([2,4,6]),array([0,1,2]),array([0,-1,-2]),array([0.5,1.0,1.5]),array([1.0,4.0,9.0])]]'),
+	('let a = array([1, 2, 3])\n[a == 2, a < 2]', '[array([1,2,3]),[array([False,True,False]),array([True,False,False])]]'),
+	('[zeros(3), arange(0, 1, 0.25)]', '[[array([0.0,0.0,0.0]),array([0.0,0.25,0.5,0.75])]]'),
+	('to_list(array([1, 2]) * 3)', '[[3,6]]'),
+	('let t = 0\nfor x in array([1, 2, 3]) then let t = t + x\nt', '[0,6,6]'),
+])
+def test_operations(engine, text, expected):
+	assert run_program(text, engine) == expected
+
+@pytest.mark.parametrize('values', ['[4, 2, 9, 1]', 'array([4, 2, 9, 1])'])
+def test_reductions_take_lists_and_arrays(values):
+	assert run_program(f'let v = {values}\n[sum(v), min(v), max(v), mean(v)]').endswith(',[16,1,9,4.0]]')
+
+@pytest.mark.parametrize('text, expected', [
+	('sum(array([9223372036854775807, 1]))', '[9223372036854775808]'),
+	('array([4611686018427387904]) * 4', '[array([18446744073709551616])]'),
+	('array([9223372036854775807]) + 1', '[array([9223372036854775808])]'),
+	('0 - array([9223372036854775807]) - 2', '[array([-9223372036854775809])]'),
+	('min(array([18446744073709551616, 3]))', '[3]'),
+])
+def test_integers_stay_exact(text, expected):
+	assert run_program(text) == expected
+
+@pytest.mark.parametrize('text, error', [
+	('array([1, 2]) + array([1, 2, 3])', 'Arrays must have the same length'),
+	('array([1, 2]) / 0', 'Division by zero'),
+	('array([1, 2]) + "a"', 'Illegal operation'),
+	('array([1, "a"])', 'List must only hold numbers'),
+	('min([])', 'List must not be empty'),
+	('mean(array([]))', 'Array must not be empty'),
+	('max(5)', 'Argument must be a list or an array'),
+])
+def test_errors(text, error):
+	assert f'Runtime Error: {error}' in run_program(text)
+
+def test_empty_sums_are_zero():
+	assert run_program('[sum([]), sum(array([]))]') == '[[0,0.0]]'
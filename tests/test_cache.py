@@ -0,0 +1,101 @@
+import os, pickle
+
+import pytest
+
+import cache
+import main
+from cache import ProgramCache, CACHE_FORMAT_VERSION, CACHE_SUFFIX
+
+TEXT = 'let a = 2\na * 21'
+
+def parse(text=TEXT):
+	return main.parse_program('<test>', text)[0]
+
+def entries(directory):
+	return sorted(name for name in os.listdir(directory))
+
+def test_miss_then_hit(tmp_path):
+	program_cache = ProgramCache(str(tmp_path))
+	assert program_cache.load('<test>', TEXT) is None
+	assert program_cache.store('<test>', TEXT, parse())
+
+	node = program_cache.load('<test>', TEXT)
+	assert type(node) is type(parse())
+	assert (program_cache.hits, program_cache.misses) == (1, 1)
+
+def test_key_covers_file_name_and_text(tmp_path):
+	program_cache = ProgramCache(str(tmp_path))
+	program_cache.store('<test>', TEXT, parse())
+	assert program_cache.load('<other>', TEXT) is None
+	assert program_cache.load('<test>', TEXT + ' ') is None
+
+def test_new_interpreter_version_misses(tmp_path, monkeypatch):
+	program_cache = ProgramCache(str(tmp_path))
+	program_cache.store('<test>', TEXT, parse())
+	monkeypatch.setattr(cache, 'INTERPRETER_VERSION', cache.INTERPRETER_VERSION + '-next')
+	assert program_cache.load('<test>', TEXT) is None
+
+def test_entry_from_another_version_is_discarded(tmp_path):
+	program_cache = ProgramCache(str(tmp_path))
+	key = program_cache.make_key('<test>', TEXT)
+	with open(program_cache.entry_path(key), 'wb') as file:
+		pickle.dump((CACHE_FORMAT_VERSION, 'old', key, parse()), file)
+
+	assert program_cache.load('<test>', TEXT) is None
+	assert entries(tmp_path) == []
+
+def test_corrupt_entry_is_discarded(tmp_path):
+	program_cache = ProgramCache(str(tmp_path))
+	key = program_cache.make_key('<test>', TEXT)
+	with open(program_cache.entry_path(key), 'wb') as file:
+		file.write(b'not a pickle')
+
+	assert program_cache.load('<test>', TEXT) is None
+	assert entries(tmp_path) == []
+
+def test_eviction_drops_least_recently_used(tmp_path):
+	program_cache = ProgramCache(str(tmp_path))
+	texts = [f'{TEXT}\n{number}' for number in range(3)]
+	for age, text in enumerate(texts):
+		program_cache.store('<test>', text, parse(text))
+		os.utime(program_cache.entry_path(program_cache.make_key('<test>', text)), (age, age))
+
+	# Reading the oldest entry makes it the most recently used
+	assert program_cache.load('<test>', texts[0]) is not None
+	entry_size = os.path.getsize(program_cache.entry_path(program_cache.make_key('<test>', texts[0])))
+	program_cache.max_size = entry_size * 2 + entry_size // 2
+	program_cache.evict()
+
+	assert program_cache.load('<test>', texts[1]) is None
+	assert program_cache.load('<test>', texts[0]) is not None
+	assert program_cache.load('<test>', texts[2]) is not None
+
+def test_entry_larger_than_the_cache_is_not_stored(tmp_path):
+	program_cache = ProgramCache(str(tmp_path), max_size=10)
+	assert not program_cache.store('<test>', TEXT, parse())
+	assert program_cache.load('<test>', TEXT) is None
+
+def test_failed_write_leaves_nothing_behind(tmp_path, monkeypatch):
+	program_cache = ProgramCache(str(tmp_path))
+
+	def fail(source, destination):
+		raise OSError('disk full')
+	monkeypatch.setattr(os, 'replace', fail)
+
+	assert not program_cache.store('<test>', TEXT, parse())
+	assert entries(tmp_path) == []
+
+def test_write_replaces_the_entry_whole(tmp_path):
+	program_cache = ProgramCache(str(tmp_path))
+	program_cache.store('<test>', TEXT, parse())
+	program_cache.store('<test>', TEXT, parse())
+	assert [name for name in entries(tmp_path) if not name.endswith(CACHE_SUFFIX)] == []
+	assert len(entries(tmp_path)) == 1
+
+def test_run_uses_the_cache(tmp_path, monkeypatch):
+	program_cache = ProgramCache(str(tmp_path))
+	monkeypatch.setattr(main, 'program_cache', program_cache)
+	for _ in range(2):
+		result, error = main.run('<test>', TEXT, use_cache=True)
+		assert error is None and result.elements[-1].value == 42
+	assert (program_cache.hits, program_cache.misses) == (1, 1)
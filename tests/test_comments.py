@@ -0,0 +1,31 @@
+import pytest
+
+from constants import TT_NEWLINE, TT_EOF
+from lexer import Lexer, TableLexer
+
+from conftest import run_program
+
+@pytest.mark.parametrize('lexer_class', [Lexer, TableLexer])
+def test_comment_keeps_its_newline(lexer_class):
+	tokens, error = lexer_class('<test>', 'let a = 1 # one\na').make_tokens()
+	assert error is None
+	assert [token.type for token in tokens][-3:] == [TT_NEWLINE, tokens[-2].type, TT_EOF]
+	assert tokens[-2].value == 'a'
+
+@pytest.mark.parametrize('lexer_class', [Lexer, TableLexer])
+def test_comment_at_end_of_text(lexer_class):
+	tokens, error = lexer_class('<test>', '1 # the end').make_tokens()
+	assert error is None
+	assert [token.type for token in tokens][1:] == [TT_EOF]
+
+@pytest.mark.parametrize('lexer_engine', ['classic', 'table'])
+@pytest.mark.parametrize('parser_engine', ['classic', 'pratt'])
+@pytest.mark.parametrize('text, expected', [
+	('let a = 1 # one\nlet b = 2\n[a, b]', '[1,2,[1,2]]'),
+	('let a = 1 #\na', '[1,1]'),
+	('# first\n# second\n5', '[5]'),
+	('let s = "#not"\ns', '["#not","#not"]'),
+	('fn f() # trailing\n\treturn 3 # here\nend\nf()', '[<function f>,3]'),
+])
+def test_comment_ends_statement(lexer_engine, parser_engine, text, expected):
+	assert run_program(text, lexer_engine=lexer_engine, parser_engine=parser_engine) == expected
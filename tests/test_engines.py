@@ -0,0 +1,161 @@
+import pytest
+
+from conftest import run_program
+
+# Each program runs on every engine, with the loop compiler off and at thresholds of 1 and 2, and
+# at each optimization level. The results, output and errors must match the tree walker's, which
+# must in turn match the expected results below
+PROGRAMS = {
+	'arithmetic': '[1 + 2 * 3, (1 + 2) * 3, 7 / 2, 2 ^ 10, -3 - -4, 10 / 4 * 2]',
+	'comparisons': '[1 == 1, 1 != 1, 2 < 3, 3 <= 2, not 0, 1 and 0, 0 or 2]',
+	'division by zero': 'let a = 1\nlet b = 0\na / b',
+	'illegal operation': 'fn f() -> 1 + "a"\nf()',
+	'undefined name': 'fn f() -> nowhere\nf()',
+	'strings': 'let s = ""\nfor i = 0 to 5 then let s = s + "ab" * i\n[s, "x" + "y", "no" * 0]',
+	'lists': 'let l = [1, 2, 3]\nlet m = l <= 4\n[l, m, m / 3, m - 0, l + [5], len(m)]',
+	'list index error': 'let l = [1, 2]\nl / 5',
+	'maps': 'let m = {"a": 1, 2: "b"}\nlet n = m + {"c": 3}\n[m / "a", n, n - 2, keys(n), has(m, 1.0 + 1)]',
+	'if': 'fn sign(x) -> if x < 0 then -1 elif x == 0 then 0 else 1\n[sign(-5), sign(0), sign(5)]',
+	'for loop': 'let total = 0\nfor i = 0 to 100 then let total = total + i\ntotal',
+	'for loop with step': 'let l = []\nfor i = 10 to 0 step -3 then append(l, i)\nl',
+	'while loop': 'let n = 0\nlet steps = 0\nwhile n < 50 then\n let n = n + 7\n let steps = steps + 1\nend\n[n, steps]',
+	'break and continue': '''
+let l = []
+for i = 0 to 20 then
+	if i == 15 then break
+	if i == 3 or i == 7 then continue
+	append(l, i)
+end
+l
+''',
+	'loop value': 'let l = for i = 0 to 5 then i * i\nl',
+	'type change in loop': '''
+let values = [1, 2, 3, "a", "b", 4]
+let out = []
+for i = 0 to 6 then append(out, values / i + values / i)
+out
+''',
+	'float change in loop': 'let x = 0\nfor i = 0 to 6 then let x = if i == 2 then x + 0.5 else x + i\nx',
+	'error in compiled loop': 'let l = [1, 2, 3]\nlet t = 0\nfor i = 0 to 6 then let t = t + l / i\nt',
+	'while type change': 'let n = 0\nwhile n < 10 then let n = if n == 4 then n + 1.5 else n + 1\nn',
+	'nested loops': '''
+let total = 0
+for i = 0 to 5 then
+	for j = 0 to i then
+		if j == 3 then break
+		let total = total + i * j
+	end
+end
+total
+''',
+	'functions': 'fn add(a, b) -> a + b\nfn twice(f, x) -> f(f(x))\n[add(1, 2), twice(fn(x) -> x * 3, 2)]',
+	'too few arguments': 'fn f(a, b) -> a\nf(1)',
+	'too many arguments': 'fn f(a) -> a\nf(1, 2)',
+	'recursion': 'fn fact(n)\n\tif n <= 1 then return 1\n\treturn n * fact(n - 1)\nend\nfact(25)',
+	'closures': '''
+fn counter(start)
+	let count = start
+	fn next()
+		let count = count + 1
+		return count
+	end
+	return next
+end
+let c = counter(10)
+let d = counter(0)
+[c(), c(), d()]
+''',
+	'callers': 'fn f() -> depth + 1\nfn g(depth) -> f()\ng(41)',
+	'tail calls': 'fn count(n, total) -> if n == 0 then total else count(n - 1, total + n)\ncount(5000, 0)',
+	'list built-ins': '''
+let l = range(0, 10, 1)
+let mapped = [map(l, fn(x) -> x * x), filter(l, fn(x) -> x > 6), reduce(l, fn(a, x) -> a + x, 0)]
+[mapped, sort([3, 1, 2]), sort_by(l, fn(x) -> 0 - x), slice(l, 2, -2), reverse(l), index_of(l, 4), sum(l)]
+''',
+	'error in callback': 'map([1, 2, 0], fn(x) -> 1 / x)',
+	'memo': 'let fib = memo(fn(n) -> if n < 2 then n else fib(n - 1) + fib(n - 2))\nfib(60)',
+	'generators': '''
+fn squares(n)
+	for i = 0 to n then yield i * i
+end
+let total = 0
+for x in squares(6) then let total = total + x
+[total, to_list(squares(4))]
+''',
+	'error in generator': 'fn g()\n\tyield 1\n\tyield 1 / 0\nend\nto_list(g())',
+	'for in': 'let l = []\nfor c in "abc" then append(l, c)\nfor k in {"x": 1, "y": 2} then append(l, k)\nl',
+	'print': 'print("hi")\nprint([1, "a"])\nfor i = 0 to 3 then print(i)',
+	'short circuit': 'fn boom() -> 1 / 0\n[0 and boom(), 1 or boom(), is_list(5) and boom()]',
+	'constant folding': 'let l = [2 * 60, "a" + "b", if 1 then "yes" else "no", True, math_pi > 3]\nl',
+	'inlined arrow': 'let double = fn(x) -> x * 2\nlet t = 0\nfor i = 0 to 10 then let t = t + double(i)\nt',
+	'invariant code': 'let k = 3\nlet t = 0\nfor i = 0 to 10 then let t = t + k * 4 + i\nt',
+}
+
+# What each program gives, checked by hand
+EXPECTED = {
+	'arithmetic': '[[7,9,3.5,1024,1,5.0]]',
+	'comparisons': '[[True,False,True,False,1,0,2]]',
+	'division by zero': 'Traceback (most recent call last):\n  File <test>, line 3, in <program>\nRuntime Error: Division by zero\n\n\na / b\n    ^',
+	'illegal operation': 'Traceback (most recent call last):\n  File <test>, line 2, in <program>\n  File <test>, line 1, in f\nRuntime Error: Illegal operation\n\nfn f() -> 1 + "a"\n          ^^^^^^^',
+	'undefined name': "Traceback (most recent call last):\n  File <test>, line 2, in <program>\n  File <test>, line 1, in f\nRuntime Error: 'nowhere' is not defined\n\nfn f() -> nowhere\n          ^^^^^^^",
+	'strings': '["","abababababababababab",["abababababababababab","xy",""]]',
+	'lists': '[[1,2,3],[1,2,3,4],[[1,2,3],[1,2,3,4],4,[2,3,4],[1,2,3,5],4]]',
+	'list index error': 'Traceback (most recent call last):\n  File <test>, line 2, in <program>\nRuntime Error: Element at this index could not be retrieved from list because index is out of bounds\n\n\nl / 5\n    ^',
+	'maps': '[{"a":1,2:"b"},{"a":1,2:"b","c":3},[1,{"a":1,2:"b","c":3},{"a":1,"c":3},["a",2,"c"],1]]',
+	'if': '[<function sign>,[-1,0,1]]',
+	'for loop': '[0,4950,4950]',
+	'for loop with step': '[[10,7,4,1],0,[10,7,4,1]]',
+	'while loop': '[0,0,0,[56,8]]',
+	'break and continue': '[[0,1,2,4,5,6,8,9,10,11,12,13,14],0,[0,1,2,4,5,6,8,9,10,11,12,13,14]]',
+	'loop value': '[16,16]',
+	'type change in loop': '[[1,2,3,"a","b",4],[2,4,6,"aa","bb",8],0,[2,4,6,"aa","bb",8]]',
+	'float change in loop': '[0,13.5,13.5]',
+	'error in compiled loop': 'Traceback (most recent call last):\n  File <test>, line 3, in <program>\nRuntime Error: Element at this index could not be retrieved from list because index is out of bounds\n\n\nfor i = 0 to 6 then let t = t + l / i\n                                    ^',
+	'while type change': '[0,10.5,10.5]',
+	'nested loops': '[0,0,23]',
+	'functions': '[<function add>,<function twice>,[3,18]]',
+	'too few arguments': "Traceback (most recent call last):\n  File <test>, line 2, in <program>\nRuntime Error: 1 too few arguments passed into 'f'\n\n\nf(1)\n^^^",
+	'too many arguments': "Traceback (most recent call last):\n  File <test>, line 2, in <program>\nRuntime Error: 1 too many arguments passed into 'f'\n\n\nf(1, 2)\n^^^^^^",
+	'recursion': '[<function fact>,15511210043330985984000000]',
+	'closures': '[<function counter>,<function next>,<function next>,[11,11,1]]',
+	'callers': '[<function f>,<function g>,42]',
+	'tail calls': '[<function count>,12502500]',
+	'list built-ins': '[[0,1,2,3,4,5,6,7,8,9],[[0,1,4,9,16,25,36,49,64,81],[7,8,9],45],[[[0,1,4,9,16,25,36,49,64,81],[7,8,9],45],[1,2,3],[9,8,7,6,5,4,3,2,1,0],[2,3,4,5,6,7],[9,8,7,6,5,4,3,2,1,0],4,45]]',
+	'error in callback': 'Traceback (most recent call last):\n  File <test>, line 1, in <program>\n  File <test>, line 1, in map\n  File <test>, line 1, in <anonymous>\nRuntime Error: Division by zero\n\nmap([1, 2, 0], fn(x) -> 1 / x)\n                            ^',
+	'memo': '[<memoized function <anonymous>>,1548008755920]',
+	'generators': '[<generator function squares>,0,55,[55,[0,1,4,9]]]',
+	'error in generator': 'Traceback (most recent call last):\n  File <test>, line 5, in <program>\n  File <test>, line 5, in to_list\n  File <test>, line 3, in g\nRuntime Error: Division by zero\n\n\nyield 1 / 0\n           ^',
+	'for in': '[["a","b","c","x","y"],0,0,["a","b","c","x","y"]]',
+	'print': 'hi\n[1,"a"]\n0\n1\n2\n[0,0,0]',
+	'short circuit': '[<function boom>,[0,1,0]]',
+	'constant folding': '[[120,"ab","yes",1,True],[120,"ab","yes",1,True]]',
+	'inlined arrow': '[<function <anonymous>>,0,90,90]',
+	'invariant code': '[3,0,165,165]',
+}
+
+CONFIGURATIONS = [
+	('interpreter', 1),
+	('interpreter', 2),
+	('vm', 0),
+	('closures', 0),
+]
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_reference_results(name):
+	assert run_program(PROGRAMS[name], 'interpreter', 0, threshold=0) == EXPECTED[name]
+
+@pytest.mark.parametrize('optimization_level', [0, 1, 2])
+@pytest.mark.parametrize('engine, threshold', CONFIGURATIONS)
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_engines_agree(name, engine, threshold, optimization_level):
+	text = PROGRAMS[name]
+	expected = run_program(text, 'interpreter', optimization_level, threshold=0)
+	assert run_program(text, engine, optimization_level, threshold=threshold) == expected
+
+@pytest.mark.parametrize('name', PROGRAMS)
+def test_optimization_keeps_results(name):
+	# Errors may be reported differently at -O2, where an inlined function has no frame of its own
+	expected = run_program(PROGRAMS[name], optimization_level=0)
+	if 'Traceback' not in expected:
+		for optimization_level in (1, 2):
+			assert run_program(PROGRAMS[name], optimization_level=optimization_level) == expected
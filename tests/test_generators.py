@@ -0,0 +1,61 @@
+import pytest
+
+from conftest import run_program
+
+ENGINES = ['interpreter', 'vm', 'closures']
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_values_are_made_lazily(engine):
+	text = '''
+let made = []
+fn numbers()
+	let n = 0
+	while 1 then
+		append(made, n)
+		yield n
+		let n = n + 1
+	end
+end
+let l = []
+for x in numbers() then
+	if x == 3 then break
+	append(l, x)
+end
+[l, made]
+'''
+	assert run_program(text, engine).endswith('[[0,1,2],[0,1,2,3]]]')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_return_and_bare_yield(engine):
+	text = 'fn g()\n\tyield\n\tyield 2\n\treturn 5\n\tyield 3\nend\nto_list(g())'
+	assert run_program(text, engine) == '[<generator function g>,[0,2]]'
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_finished_generator_stays_finished(engine):
+	text = 'fn g()\n\tyield 1\nend\nlet gen = g()\n[to_list(gen), to_list(gen)]'
+	assert run_program(text, engine).endswith('[[1],[]]]')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_error_traceback_goes_through_the_consumer(engine):
+	text = '''
+fn gen()
+	yield 1
+	yield 1 / 0
+end
+fn make()
+	let g = gen()
+	return g
+end
+to_list(make())
+'''
+	traceback = run_program(text, engine)
+	assert 'line 10, in <program>\n  File <test>, line 10, in to_list\n  File <test>, line 4, in gen\n' in traceback
+	assert 'in make' not in traceback
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_resuming_a_running_generator_fails_at_the_reentry(engine):
+	text = 'fn gen()\n\tyield 1\n\tfor x in g then x\nend\nlet g = gen()\nto_list(g)'
+	traceback = run_program(text, engine)
+	assert "Generator 'gen' is already running" in traceback
+	assert 'line 6, in to_list\n  File <test>, line 3, in gen\n' in traceback
+	assert traceback.endswith('for x in g then x\n          ^')
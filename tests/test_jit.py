@@ -0,0 +1,78 @@
+import gc
+
+import main
+from conftest import run_program
+from interpreter import Interpreter
+from jit import JIT_GUARD_FAILURE_LIMIT
+
+COUNTED_KEYS = ['interpreted_iterations', 'compiled_iterations', 'compilations', 'deoptimizations', 'guard_failures']
+
+def counts(statistics):
+	return [{key: entry[key] for key in ['loop', 'kind'] + COUNTED_KEYS} for entry in statistics]
+
+def test_statistics_count_iterations():
+	text = 'let t = 0\nfor i = 0 to 100 then let t = t + i\nlet n = 0\nwhile n < 50 then let n = n + 1\nt'
+	assert run_program(text, threshold=10) == '[0,4950,0,50,4950]'
+
+	# Ten iterations are counted, one more is recorded and the rest run compiled
+	statistics = main.loop_compiler.statistics()
+	assert sorted(counts(statistics), key=lambda entry: entry['loop']) == [
+		{'loop': '<test>:2', 'kind': 'for', 'interpreted_iterations': 10, 'compiled_iterations': 89, 'compilations': 1, 'deoptimizations': 0, 'guard_failures': 0},
+		{'loop': '<test>:4', 'kind': 'while', 'interpreted_iterations': 10, 'compiled_iterations': 39, 'compilations': 1, 'deoptimizations': 0, 'guard_failures': 0},
+	]
+	for entry in statistics:
+		assert entry['compile_time'] > 0
+		assert entry['compiled_time'] > 0
+		assert isinstance(entry['saved_time'], float)
+	assert [entry['saved_time'] for entry in statistics] == sorted((entry['saved_time'] for entry in statistics), reverse=True)
+
+def test_loops_below_threshold_are_not_listed():
+	assert run_program('let t = 0\nfor i = 0 to 5 then let t = t + i\nt', threshold=10) == '[0,10,10]'
+	assert main.loop_compiler.statistics() == []
+
+def test_threshold_zero_turns_it_off():
+	assert run_program('let t = 0\nfor i = 0 to 100 then let t = t + i\nt', threshold=0) == '[0,4950,4950]'
+	assert main.loop_compiler.statistics() == []
+
+def test_no_loop_compiler():
+	Interpreter.loop_compiler = None
+	assert run_program('let t = 0\nfor i = 0 to 100 then let t = t + i\nt', threshold=1) == '[0,4950,4950]'
+	assert main.loop_compiler.statistics() == []
+
+def test_reset():
+	run_program('let t = 0\nfor i = 0 to 100 then let t = t + i\nt', threshold=1)
+	assert len(main.loop_compiler.statistics()) == 1
+	main.loop_compiler.reset()
+	assert main.loop_compiler.statistics() == []
+
+def test_traces_are_freed_with_their_program():
+	main.loop_compiler.threshold = 1
+	result, error = main.run('<test>', 'let t = 0\nfor i = 0 to 100 then let t = t + i\nt')
+	assert len(main.loop_compiler.statistics()) == 1
+	del result, error
+	gc.collect()
+	assert main.loop_compiler.statistics() == []
+
+def test_failed_guards_take_the_slow_path():
+	text = 'let values = [1, 2, 3, "a", "b", 4]\nlet out = []\nfor i = 0 to 6 then append(out, values / i + values / i)\nout'
+	assert run_program(text, threshold=1) == '[[1,2,3,"a","b",4],[2,4,6,"aa","bb",8],0,[2,4,6,"aa","bb",8]]'
+	assert counts(main.loop_compiler.statistics()) == [
+		{'loop': '<test>:3', 'kind': 'for', 'interpreted_iterations': 1, 'compiled_iterations': 4, 'compilations': 1, 'deoptimizations': 0, 'guard_failures': 2},
+	]
+
+def test_deoptimization():
+	# Once its guards have failed often enough, the loop carries on in the interpreter
+	text = 'let out = []\nfor i = 0 to 300 then\n\tlet v = if i < 20 then i else "a"\n\tappend(out, v * 2)\nend\n[out / 19, out / 20, out / 299, len(out)]'
+	assert run_program(text, threshold=10).endswith(',[38,"aa","aa",300]]')
+	[entry] = main.loop_compiler.statistics()
+	assert entry['compilations'] == 1
+	assert entry['deoptimizations'] == 1
+	assert entry['guard_failures'] == JIT_GUARD_FAILURE_LIMIT
+
+def test_error_in_compiled_loop():
+	text = 'let l = [1, 2, 3]\nlet t = 0\nfor i = 0 to 6 then let t = t + l / i\nt'
+	assert run_program(text, threshold=1) == (
+		'Traceback (most recent call last):\n  File <test>, line 3, in <program>\n'
+		'Runtime Error: Element at this index could not be retrieved from list because index is out of bounds\n\n\n'
+		'for i = 0 to 6 then let t = t + l / i\n                                    ^'
+	)
@@ -0,0 +1,74 @@
+import pytest
+
+from lexer import Lexer, TableLexer
+
+def tokenize(lexer_class, text):
+	tokens, error = lexer_class('<test>', text).make_tokens()
+	if error:
+		return error.as_string()
+	return [(repr(token), token.start, token.end) for token in tokens]
+
+# What the table lexer must give for each program, exactly as the classic lexer does
+TOKENS = {
+	'let a = 1 + 2.5 * (3 - 4) / 5 ^ 2': [
+		'KEYWORD:let', 'IDENTIFIER:a', 'EQ', 'INT:1', 'PLUS', 'FLOAT:2.5', 'MUL', 'LPAREN', 'INT:3',
+		'MINUS', 'INT:4', 'RPAREN', 'DIV', 'INT:5', 'POW', 'INT:2', 'EOF',
+	],
+	'a == b != c < d > e <= f >= g': [
+		'IDENTIFIER:a', 'EE', 'IDENTIFIER:b', 'NE', 'IDENTIFIER:c', 'LT', 'IDENTIFIER:d', 'GT',
+		'IDENTIFIER:e', 'LTE', 'IDENTIFIER:f', 'GTE', 'IDENTIFIER:g', 'EOF',
+	],
+	'fn f(x, y) -> x\nend': [
+		'KEYWORD:fn', 'IDENTIFIER:f', 'LPAREN', 'IDENTIFIER:x', 'COMMA', 'IDENTIFIER:y', 'RPAREN', 'ARROW',
+		'IDENTIFIER:x', 'NEWLINE', 'KEYWORD:end', 'EOF',
+	],
+	'{"k": [1, 2]}\nif not x and y or z then elif else': [
+		'LBRACE', 'STRING:k', 'COLON', 'LSQUARE', 'INT:1', 'COMMA', 'INT:2', 'RSQUARE', 'RBRACE', 'NEWLINE',
+		'KEYWORD:if', 'KEYWORD:not', 'IDENTIFIER:x', 'KEYWORD:and', 'IDENTIFIER:y', 'KEYWORD:or',
+		'IDENTIFIER:z', 'KEYWORD:then', 'KEYWORD:elif', 'KEYWORD:else', 'EOF',
+	],
+	'while for to step return continue break yield in memo': [
+		'KEYWORD:while', 'KEYWORD:for', 'KEYWORD:to', 'KEYWORD:step', 'KEYWORD:return', 'KEYWORD:continue',
+		'KEYWORD:break', 'KEYWORD:yield', 'KEYWORD:in', 'IDENTIFIER:memo', 'EOF',
+	],
+	'"a\\"b\\n\\tc\\\\"': ['STRING:a"b\n\tc\\', 'EOF'],
+	'"unterminated': ['STRING:unterminated', 'EOF'],
+	'12abc 5.': ['INT:12', 'IDENTIFIER:abc', 'FLOAT:5.0', 'EOF'],
+	'ab;1': ['IDENTIFIER:ab', 'NEWLINE', 'INT:1', 'EOF'],
+	'  \n\n  ': ['NEWLINE', 'NEWLINE', 'EOF'],
+	'': ['EOF'],
+}
+
+ERRORS = {
+	'let x = 1 % 2': "Illegal Character: '%'\nFile <test>, line 1\n\nlet x = 1 % 2\n          ^",
+	'1.2.3': "Illegal Character: '.'\nFile <test>, line 1\n\n1.2.3\n   ^",
+	'x.y': "Illegal Character: '.'\nFile <test>, line 1\n\nx.y\n ^",
+	'a ! b': "Expected Character: '=' (after '!')\nFile <test>, line 1\n\na ! b\n  ^^",
+}
+
+@pytest.mark.parametrize('lexer_class', [Lexer, TableLexer])
+@pytest.mark.parametrize('text', TOKENS)
+def test_tokens(lexer_class, text):
+	assert [token for token, start, end in tokenize(lexer_class, text)] == TOKENS[text]
+
+@pytest.mark.parametrize('lexer_class', [Lexer, TableLexer])
+@pytest.mark.parametrize('text', ERRORS)
+def test_errors(lexer_class, text):
+	assert tokenize(lexer_class, text) == ERRORS[text]
+
+def test_spans():
+	assert tokenize(TableLexer, 'let ab = "x"\n1.5') == [
+		('KEYWORD:let', 0, 3), ('IDENTIFIER:ab', 4, 6), ('EQ', 7, 8), ('STRING:x', 9, 12),
+		('NEWLINE', 12, 13), ('FLOAT:1.5', 13, 16), ('EOF', 16, 17),
+	]
+
+@pytest.mark.parametrize('text', list(TOKENS) + list(ERRORS) + [
+	'fn fact(n)\n\tif n <= 1 then return 1\n\treturn n * fact(n - 1)\nend\nfact(25)',
+	'let l = for i = 0 to 5 step 2 then i * i # squares\nl / 1',
+	'let m = {"a": 1, 2: "b"}\nfor k in m then print(k)',
+	'"tab\\there" + "\\q"',
+	'0.5 .5',
+	'-1--2',
+])
+def test_lexers_agree(text):
+	assert tokenize(TableLexer, text) == tokenize(Lexer, text)
@@ -0,0 +1,33 @@
+import pytest
+
+from conftest import run_program
+
+ENGINES = ['interpreter', 'vm', 'closures']
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_built_ins_read_and_change_the_map(engine):
+	text = 'let m = {"a": 1}\nset(m, "b", 2)\nset(m, 1, [3])\nlet removed = remove(m, "a")\n[m, removed, get(m, "b"), get(m, 1.0), has(m, "z"), has(m, "b"), keys(m), values(m)]'
+	assert run_program(text, engine).endswith(',[{"b":2,1:[3]},1,2,[3],0,1,["b",1],[2,[3]]]]')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_operators_return_new_maps(engine):
+	text = 'let m = {"a": 1, 2: "b"}\nlet n = m + {"c": 3}\nlet o = n - 2\n[m, n, o, n / "c"]'
+	assert run_program(text, engine).endswith(',[{"a":1,2:"b"},{"a":1,2:"b","c":3},{"a":1,"c":3},3]]')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_copy_is_independent(engine):
+	text = 'let m = {1: "x"}\nlet c = m + {}\nset(c, 1, "y")\nset(m, 2, "z")\n[m, c]'
+	assert run_program(text, engine).endswith(',[{1:"x",2:"z"},{1:"y"}]]')
+
+def test_equal_numbers_are_the_same_key():
+	assert run_program('{1: "a", 1.0: "b"}') == '[{1:"b"}]'
+
+@pytest.mark.parametrize('text, error', [
+	('get({}, "a")', 'Key could not be found in map'),
+	('{"a": 1} / "b"', 'Key could not be found in map'),
+	('remove({}, "a")', 'Key could not be removed from map because it is not in the map'),
+	('{[1]: 2}', 'Map keys must be numbers or strings'),
+	('set({}, [1], 2)', 'Second argument must be a number or a string'),
+])
+def test_errors(text, error):
+	assert f'Runtime Error: {error}' in run_program(text)
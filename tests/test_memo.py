@@ -0,0 +1,50 @@
+import pytest
+
+import main
+
+from conftest import run_program
+
+ENGINES = ['interpreter', 'vm', 'closures']
+
+def memoized(text, engine='interpreter'):
+	# Runs the program and returns its last result, the memoized function
+	result, error = main.run('<test>', text, engine=engine)
+	assert error is None
+	return result.elements[-1]
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_counts_hits_and_misses(engine):
+	function = memoized('let f = memo(fn(n) -> n * 10)\nf(1)\nf(1)\nf(2)\nf', engine)
+	assert (function.hits, function.misses) == (1, 2)
+	assert function.statistics() == {'hits': 1, 'misses': 2, 'size': 2, 'limit': 1024}
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_recursive_function_is_cached(engine):
+	text = 'let fib = memo(fn(n) -> if n < 2 then n else fib(n - 1) + fib(n - 2))\n[fib(80), fib]'
+	result, error = main.run('<test>', text, engine=engine)
+	value, function = result.elements[-1].elements
+	assert value.value == 23416728348467685
+	assert function.misses == 81
+
+def test_least_recently_used_results_are_dropped():
+	text = 'let f = memo_sized(fn(n) -> n * 2, 2)\nf(1)\nf(2)\nf(1)\nf(3)\nf(1)\nf(2)\nf'
+	function = memoized(text)
+	# f(3) drops f(2), the least recently used, so only f(2) is computed twice
+	assert (function.hits, function.misses) == (2, 4)
+	assert function.statistics()['size'] == 2
+
+def test_lists_and_strings_are_keys():
+	function = memoized('let f = memo(fn(x) -> x)\nf([1, "a"])\nf([1, "a"])\nf("s")\nf("s")\nf')
+	assert (function.hits, function.misses) == (2, 2)
+
+def test_calls_with_functions_are_not_cached():
+	function = memoized('let f = memo(fn(g) -> g(1))\nlet h = fn(x) -> x\nf(h)\nf(h)\nf')
+	assert (function.hits, function.misses, function.statistics()['size']) == (0, 0, 0)
+
+@pytest.mark.parametrize('text, error', [
+	('memo(5)', 'Argument must be a function'),
+	('memo_sized(fn(x) -> x, 0)', 'Second argument must be a positive whole number'),
+	('memo_sized(fn(x) -> x, 1.5)', 'Second argument must be a positive whole number'),
+])
+def test_errors(text, error):
+	assert f'Runtime Error: {error}' in run_program(text)
@@ -0,0 +1,46 @@
+import pytest
+
+import main
+
+from conftest import run_program
+
+INVARIANT_PROGRAM = 'let k = 3\nlet t = 0\nfor i = 0 to 10 then let t = t + k * 4 + i\nt'
+
+@pytest.mark.parametrize('optimization_level', [0, 1, 2])
+@pytest.mark.parametrize('text, expected', [
+	('2 * 60 + 1', '[121]'),
+	('"a" + "b" * 3', '["abbb"]'),
+	('if 0 then 1 elif 1 then 2 else 3', '[2]'),
+	('[True, False, null, math_pi > 3]', '[[1,0,0,True]]'),
+	('let double = fn(x) -> x * 2\n[double(4), double(double(1))]', '[<function <anonymous>>,[8,4]]'),
+	(INVARIANT_PROGRAM, '[3,0,165,165]'),
+])
+def test_results_at_every_level(optimization_level, text, expected):
+	assert run_program(text, optimization_level=optimization_level) == expected
+
+def test_hoisted_temporaries_are_removed_after_the_run():
+	run_program(INVARIANT_PROGRAM, optimization_level=2)
+	assert not [name for name in main.global_symbol_table.symbols if name.startswith('$')]
+
+def test_hoisted_temporaries_are_named_apart_across_runs():
+	node = main.parse_program('<test>', INVARIANT_PROGRAM)[0]
+	main.optimizer.optimize(node, 2)
+	first_names = main.optimizer.temporary_names
+	main.optimizer.optimize(main.parse_program('<test>', INVARIANT_PROGRAM)[0], 2)
+	assert first_names and main.optimizer.temporary_names
+	assert not set(first_names) & set(main.optimizer.temporary_names)
+
+def test_hoisted_temporaries_are_removed_after_an_error():
+	assert 'Division by zero' in run_program('let k = 2\nfor i = 0 to 3 then k * 5 / (i - 1)', optimization_level=2)
+	assert not [name for name in main.global_symbol_table.symbols if name.startswith('$')]
+
+def test_statistics_time_each_pass():
+	main.optimizer.reset()
+	run_program('1 + 2', optimization_level=1)
+	run_program('1 + 2', optimization_level=2)
+	statistics = {entry['pass']: entry for entry in main.optimizer.statistics()}
+	assert statistics['constant folding']['runs'] == 2
+	assert statistics['loop invariant motion']['runs'] == 1
+	assert all(entry['time'] >= 0 for entry in statistics.values())
+	main.optimizer.reset()
+	assert all(entry['runs'] == 0 for entry in main.optimizer.statistics())
@@ -0,0 +1,82 @@
+import pytest
+
+import main
+from lexer import Span, Source
+
+from conftest import run_program
+
+def parse(text, parser_engine):
+	node, error = main.parse_program('<test>', text, parser_engine=parser_engine)
+	return error.as_string() if error else dump(node)
+
+def dump(value):
+	# Every field a node is built from, down to its tokens and their spans
+	if isinstance(value, Span):
+		return (type(value).__name__,) + tuple(dump(getattr(value, name)) for name in value.constructor_fields if name != 'source')
+	if isinstance(value, (list, tuple)):
+		return [dump(element) for element in value]
+	if isinstance(value, Source):
+		return None
+	return value
+
+# How each expression groups
+TREES = {
+	'1 + 2 * 3 - 4 / 5 ^ 2 ^ 3': '((INT:1, PLUS, (INT:2, MUL, INT:3)), MINUS, (INT:4, DIV, (INT:5, POW, (INT:2, POW, INT:3))))',
+	'-2 ^ 2': '(MINUS, (INT:2, POW, INT:2))',
+	'2 ^ -1': '(INT:2, POW, (MINUS, INT:1))',
+	'5 - - 2': '(INT:5, MINUS, (MINUS, INT:2))',
+	'1 == 1 == 1': '((INT:1, EE, INT:1), EE, INT:1)',
+	'not 1 == 2 and 3 or 4': '(((KEYWORD:not, (INT:1, EE, INT:2)), KEYWORD:and, INT:3), KEYWORD:or, INT:4)',
+	'1 <= 2 + 3': '(INT:1, LTE, (INT:2, PLUS, INT:3))',
+	'(1 + 2) * 3': '((INT:1, PLUS, INT:2), MUL, INT:3)',
+}
+
+RESULTS = {
+	'1 + 2 * 3 - 4 / 2 ^ 2 ^ 3': '[6.984375]',
+	'2 ^ 3 ^ 2': '[512]',
+	'-2 ^ 2': '[-4]',
+	'not 1 == 2 and 3 or 0': '[3]',
+	'[1, 2] <= 3 <= 4': '[[1,2,3,4]]',
+	'let x = let y = 3\n[x, y]': '[3,[3,3]]',
+	'fn f(a, b) -> a * 10 + b\nf(1, 2)': '[<function f>,12]',
+	'let g = fn(x) -> if x then "t" else "f"\n[g(1), g(0)]': '[<function <anonymous>>,["t","f"]]',
+	'if 0 then 1 elif 0 then 2 else 3': '[3]',
+	'for i = 0 to 10 step 3 then i': '[9]',
+	'{"a": [1, {2: 3}]}': '[{"a":[1,{2:3}]}]',
+	'1 +': "Invalid Syntax: Expected int, float, identifier, '+', '-', '(', '[', '{', 'if', 'for', 'while', 'fn'\nFile <test>, line 1\n\n1 +\n   ^",
+	'(1': "Invalid Syntax: Expected ')'\nFile <test>, line 1\n\n(1\n  ^",
+	'1 2': 'Invalid Syntax: Token cannot appear after previous tokens\nFile <test>, line 1\n\n1 2\n  ^',
+	'for i = 0 then 1': "Invalid Syntax: Expected 'to'\nFile <test>, line 1\n\nfor i = 0 then 1\n          ^^^^",
+}
+
+@pytest.mark.parametrize('parser_engine', ['classic', 'pratt'])
+@pytest.mark.parametrize('text', TREES)
+def test_precedence(parser_engine, text):
+	node, error = main.parse_program('<test>', text, parser_engine=parser_engine)
+	assert error is None
+	assert repr(node.element_nodes) == f'[{TREES[text]}]'
+
+@pytest.mark.parametrize('parser_engine', ['classic', 'pratt'])
+@pytest.mark.parametrize('text', RESULTS)
+def test_results(parser_engine, text):
+	assert run_program(text, parser_engine=parser_engine) == RESULTS[text]
+
+@pytest.mark.parametrize('text', list(TREES) + list(RESULTS) + [
+	'a - - b <= c',
+	'f(1, 2)(3)',
+	'if a then\n\tb\nelif c then\n\td\nelse\n\te\nend',
+	'for i = 0 to 3 then\n\tif i then break\n\tcontinue\nend',
+	'while x then let x = x - 1',
+	'for k in m then print(k)',
+	'fn f()\n\treturn\nend\nfn g()\n\tyield 1\nend',
+	'fn (x) -> x',
+	'let f = fn(x) -> if x then 1 else 2\nf(1)',
+	'let = 2',
+	'[1, 2',
+	'f(1,',
+	'if x then',
+	'fn f(',
+	'{1: }',
+])
+def test_parsers_agree(text):
+	assert parse(text, 'pratt') == parse(text, 'classic')
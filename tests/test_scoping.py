@@ -0,0 +1,44 @@
+import pytest
+
+import main
+
+from conftest import run_program
+
+ENGINES = ['interpreter', 'vm', 'closures']
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('text, expected', [
+	# A function reads the variables of the function it is written inside, after that has returned
+	('fn adder(n) -> fn(x) -> x + n\nlet add = adder(5)\nadd(2)', '7'),
+	# A name no enclosing function defines is read from the innermost caller that has it
+	('fn f() -> x\nfn g(x) -> f()\ng(5)', '5'),
+	('fn f() -> k\nfn h() -> f()\nfn g(k) -> h()\ng(7)', '7'),
+	('fn f() -> q\nfn g(q) -> map([1, 2], fn(v) -> f() + v)\ng(10)', '[11,12]'),
+	# A global of the same name comes first
+	('let z = 1\nfn f() -> z\nfn g(z) -> f()\ng(5)', '1'),
+	# The enclosing function wins over the caller
+	('fn outer(a)\n\tfn inner() -> a\n\treturn inner\nend\nfn call(a, f) -> f()\ncall(2, outer(1))', '1'),
+])
+def test_lookup(engine, text, expected):
+	assert run_program(text, engine).endswith(f',{expected}]')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_undefined_name(engine):
+	assert "'y' is not defined" in run_program('fn f() -> y\nfn g(x) -> f()\ng(5)', engine)
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_caller_variable_read_in_loop(engine):
+	text = 'fn f()\n\tlet s = 0\n\tfor i = 0 to 3000 then let s = s + x\n\treturn s\nend\nfn g(x) -> f()\ng(2)'
+	assert run_program(text, engine, threshold=1).endswith(',6000]')
+
+COUNT = 'fn count(n, acc) -> if n == 0 then acc else count(n - 1, acc + 1)\ncount(20000, 0)'
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_global_read_keeps_tail_calls(engine):
+	# A function reading the global n must not cost count, which binds n, its tail calls
+	assert run_program(f'let n = 3\nfn show() -> n\n{COUNT}', engine).endswith(',20000]')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_earlier_programs_keep_tail_calls(engine):
+	run_program('fn helper() -> n\nfn caller(n) -> helper()\ncaller(1)', engine)
+	assert main.run('<test>', COUNT, engine=engine)[0].elements[-1].value == 20000
@@ -0,0 +1,21 @@
+import pytest
+
+from conftest import run_program
+
+ENGINES = ['interpreter', 'vm', 'closures']
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_building_a_string(engine):
+	text = 'let s = ""\nfor i = 0 to 4 then let s = s + "ab" * i + "|"\nlet t = s + "!"\n[s, t, "x" * 0, "x" * -2]'
+	assert run_program(text, engine).endswith(',["|ab|abab|ababab|","|ab|abab|ababab|!","",""]]')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_earlier_strings_keep_their_text(engine):
+	text = 'let a = "x" + "y"\nlet b = a + "1"\nlet c = a + "2"\n[a, b, c]'
+	assert run_program(text, engine).endswith(',["xy","xy1","xy2"]]')
+
+@pytest.mark.parametrize('threshold', [0, 1])
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('text', ['"a" * 2.5', 'let counts = [2, 3, 1.5]\nfor i = 0 to 3 then "x" * (counts / i)'])
+def test_repeating_by_a_fraction_is_illegal(engine, threshold, text):
+	assert 'Runtime Error: Illegal operation' in run_program(text, engine, threshold=threshold)
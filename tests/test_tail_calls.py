@@ -0,0 +1,39 @@
+import pytest
+
+from conftest import run_program
+
+ENGINES = ['interpreter', 'vm', 'closures']
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_deep_tail_recursion(engine):
+	text = 'fn count(n, total) -> if n == 0 then total else count(n - 1, total + 1)\ncount(50000, 0)'
+	assert run_program(text, engine) == '[<function count>,50000]'
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_mutual_tail_recursion_with_return(engine):
+	text = '''
+fn is_even(n)
+	if n == 0 then return 1
+	return is_odd(n - 1)
+end
+fn is_odd(n)
+	if n == 0 then return 0
+	return is_even(n - 1)
+end
+[is_even(30001), is_odd(30001)]
+'''
+	assert run_program(text, engine).endswith('[0,1]]')
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_tail_call_replaces_the_calling_frame(engine):
+	text = 'fn inner(x) -> x / 0\nfn outer(x) -> inner(x)\nouter(1)'
+	traceback = run_program(text, engine)
+	assert 'in inner' in traceback
+	assert 'in outer' not in traceback
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_tail_call_argument_error_names_the_calling_frame(engine):
+	text = 'fn g(a, b) -> a\nfn f(x)\n\treturn g(x)\nend\nf(1)'
+	traceback = run_program(text, engine)
+	assert 'line 3, in f\n' in traceback
+	assert "1 too few arguments passed into 'g'" in traceback
@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from vector import Vector, EMPTY_VECTOR, VECTOR_WIDTH
+
+from conftest import run_program
+
+@pytest.mark.parametrize('size', [0, 1, VECTOR_WIDTH, VECTOR_WIDTH + 1, VECTOR_WIDTH * VECTOR_WIDTH + 5, 5000])
+def test_build_and_read(size):
+	vector = EMPTY_VECTOR.extend(range(size))
+	assert len(vector) == size
+	assert list(vector) == list(range(size))
+	if size:
+		assert vector[0] == 0 and vector[-1] == size - 1 and vector[size // 2] == size // 2
+
+def test_index_out_of_range():
+	with pytest.raises(IndexError):
+		Vector.from_list([1, 2])[2]
+
+@pytest.mark.parametrize('size', [3, VECTOR_WIDTH + 3, 1100])
+def test_remove_keeps_the_original(size):
+	vector = EMPTY_VECTOR.extend(range(size))
+	for index in (0, size // 2, size - 2, -1):
+		expected = list(range(size))
+		del expected[index]
+		assert list(vector.remove(index)) == expected
+		assert list(vector) == list(range(size))
+
+def test_matches_a_python_list():
+	generator = random.Random(7)
+	vector, model, versions = EMPTY_VECTOR, [], []
+	for _ in range(3000):
+		choice = generator.random()
+		if choice < 0.6 or not model:
+			value = generator.randrange(1000)
+			vector, model = vector.append(value), model + [value]
+		elif choice < 0.8:
+			vector, model = vector.pop(), model[:-1]
+		else:
+			index = generator.randrange(len(model))
+			vector, model = vector.remove(index), model[:index] + model[index + 1:]
+		versions.append((vector, model))
+	for vector, model in versions[::97]:
+		assert list(vector) == model
+
+@pytest.mark.parametrize('engine', ['interpreter', 'vm', 'closures'])
+def test_list_operations_return_new_lists(engine):
+	text = 'let l = range(0, 40, 1)\nlet a = l - 3\nlet b = l <= 99\nlet c = l + [7]\n[len(l), l / 3, a / 3, len(a), b / 40, c / 40, len(l)]'
+	assert run_program(text, engine).endswith(',[40,3,4,39,99,7,40]]')
+
+@pytest.mark.parametrize('engine', ['interpreter', 'vm', 'closures'])
+def test_remove_out_of_range(engine):
+	assert 'could not be removed from list' in run_program('[1, 2] - 2', engine)
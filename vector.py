@@ -0,0 +1,167 @@
+import operator
+
+VECTOR_BITS = 5
+VECTOR_WIDTH = 1 << VECTOR_BITS
+VECTOR_MASK = VECTOR_WIDTH - 1
+
+###########################################
+# VECTOR
+###########################################
+
+class Vector:
+	# An immutable sequence kept as a tree of 32-wide chunks, with the last chunk apart as the
+	# tail. A change copies the tail or one path through the tree and shares everything else,
+	# so every earlier version stays as it was. Chunks are never modified once a vector holds them
+	__slots__ = ('count', 'shift', 'root', 'tail')
+
+	def __init__(self, count, shift, root, tail):
+		self.count = count
+		self.shift = shift
+		self.root = root
+		self.tail = tail
+
+	@classmethod
+	def from_list(cls, values):
+		# A short list becomes the tail as it is, so the caller must not modify it afterwards
+		if len(values) <= VECTOR_WIDTH:
+			return cls(len(values), VECTOR_BITS, [], values)
+		return EMPTY_VECTOR.extend(values)
+
+	def __len__(self):
+		return self.count
+
+	def __iter__(self):
+		tree_count = self.count - len(self.tail)
+		for start in range(0, tree_count, VECTOR_WIDTH):
+			yield from self.leaf_for(start)
+		yield from self.tail
+
+	def __getitem__(self, index):
+		index = self.position_of(index)
+		tree_count = self.count - len(self.tail)
+		if index >= tree_count:
+			return self.tail[index - tree_count]
+		return self.leaf_for(index)[index & VECTOR_MASK]
+
+	def position_of(self, index):
+		# Indices behave as they do for Python lists: negative ones count from the end
+		index = operator.index(index)
+		if index < 0:
+			index += self.count
+		if not 0 <= index < self.count:
+			raise IndexError('vector index out of range')
+		return index
+
+	def leaf_for(self, index):
+		node = self.root
+		shift = self.shift
+		while shift > 0:
+			node = node[(index >> shift) & VECTOR_MASK]
+			shift -= VECTOR_BITS
+		return node
+
+	###################################
+
+	def append(self, value):
+		tail = self.tail
+		if len(tail) < VECTOR_WIDTH:
+			return Vector(self.count + 1, self.shift, self.root, tail + [value])
+
+		root, shift = self.root, self.shift
+		if (self.count >> VECTOR_BITS) > (1 << shift):
+			root = [root, self.new_path(shift, tail)]
+			shift += VECTOR_BITS
+		else:
+			root = self.push_tail(shift, root, tail)
+		return Vector(self.count + 1, shift, root, [value])
+
+	def extend(self, values):
+		values = list(values)
+		vector = self
+		position = 0
+
+		while position < len(values):
+			room = VECTOR_WIDTH - len(vector.tail)
+			if not room:
+				vector = vector.append(values[position])
+				position += 1
+				continue
+
+			chunk = values[position:position + room]
+			vector = Vector(vector.count + len(chunk), vector.shift, vector.root, vector.tail + chunk)
+			position += len(chunk)
+		return vector
+
+	def new_path(self, shift, node):
+		while shift > 0:
+			node = [node]
+			shift -= VECTOR_BITS
+		return node
+
+	def push_tail(self, shift, parent, tail):
+		child_index = ((self.count - 1) >> shift) & VECTOR_MASK
+		if shift == VECTOR_BITS:
+			child = tail
+		elif child_index < len(parent):
+			child = self.push_tail(shift - VECTOR_BITS, parent[child_index], tail)
+		else:
+			child = self.new_path(shift - VECTOR_BITS, tail)
+
+		node = parent[:]
+		if child_index < len(node):
+			node[child_index] = child
+		else:
+			node.append(child)
+		return node
+
+	###################################
+
+	def pop(self):
+		if not self.count:
+			raise IndexError('pop from empty vector')
+		if self.count == 1:
+			return EMPTY_VECTOR
+		if len(self.tail) > 1:
+			return Vector(self.count - 1, self.shift, self.root, self.tail[:-1])
+
+		tail = self.leaf_for(self.count - 2)
+		root = self.pop_tail(self.shift, self.root) or []
+		shift = self.shift
+		if shift > VECTOR_BITS and len(root) == 1:
+			root = root[0]
+			shift -= VECTOR_BITS
+		return Vector(self.count - 1, shift, root, tail)
+
+	def pop_tail(self, shift, node):
+		child_index = ((self.count - 2) >> shift) & VECTOR_MASK
+		if shift > VECTOR_BITS:
+			child = self.pop_tail(shift - VECTOR_BITS, node[child_index])
+			if child is None and child_index == 0:
+				return None
+			node = node[:child_index + 1]
+			if child is None:
+				del node[child_index]
+			else:
+				node[child_index] = child
+			return node
+		if child_index == 0:
+			return None
+		return node[:child_index]
+
+	def remove(self, index):
+		# Only the tail can lose an element in place: every element after one removed from the tree
+		# moves down a position, and each chunk but the tail must stay full, so the vector is rebuilt
+		index = self.position_of(index)
+		if index == self.count - 1:
+			return self.pop()
+		tree_count = self.count - len(self.tail)
+		if index >= tree_count:
+			tail = self.tail[:]
+			del tail[index - tree_count]
+			return Vector(self.count - 1, self.shift, self.root, tail)
+
+		values = list(self)
+		del values[index]
+		return Vector.from_list(values)
+
+EMPTY_VECTOR = Vector(0, VECTOR_BITS, [], [])
@@ -0,0 +1,418 @@
+from compiler import *
+from interpreter import Value, Number, List, BaseFunction, Function, RuntimeFailure, LoopSignal, build_map, YIELD_OUTSIDE_FUNCTION_DETAILS
+from error import RunTimeError
+
+###########################################
+# COMPILED FUNCTION
+###########################################
+
+class CompiledFunction(Function):
+	def __init__(self, name, body_node, argument_names, should_auto_return, scope, enclosing_context, code):
+		Function.__init__(self, name, body_node, argument_names, should_auto_return, scope, enclosing_context)
+		self.code = code
+
+	def execute(self, arguments, span, context):
+		return VirtualMachine().call(self, arguments, span, context)
+
+	def caller(self, span, context):
+		machine, code = VirtualMachine(), self.code
+
+		def call(arguments):
+			return machine.run(code, machine.new_frame(self, arguments, span, context))
+		return call
+
+###########################################
+# GENERATORS
+###########################################
+
+class GeneratorFunction(Function):
+	# Every engine runs generator bodies on the virtual machine, which can stop at a yield and carry
+	# on later from its saved instruction index, stack and loops
+	def __init__(self, name, body_node, argument_names, should_auto_return, scope, enclosing_context, code=None):
+		Function.__init__(self, name, body_node, argument_names, should_auto_return, scope, enclosing_context)
+		if code is None:
+			if scope.generator_code is None:
+				scope.generator_code = Compiler(self.name, True).compile_body(body_node, should_auto_return)
+			code = scope.generator_code
+		self.code = code
+
+	def execute(self, arguments, span, context):
+		return Generator(self, VirtualMachine().new_frame(self, arguments, span, context))
+
+	caller = BaseFunction.caller
+
+	def __repr__(self):
+		return f"<generator function {self.name}>"
+
+class Generator(Value):
+	# Calling a generator function only sets up its frame. Each value asked for runs the body on to
+	# its next yield, so the values are made one at a time, as a loop reaches them
+	def __init__(self, function, context):
+		self.function = function
+		self.context = context
+		self.index = 0
+		self.stack = []
+		self.loops = []
+		self.is_running = False
+		self.is_suspended = False
+		self.machine = VirtualMachine()
+		self.machine.generator = self
+
+	def resume(self, span, context):
+		# Returns the next value, or None once the body has finished. The body runs as if called from
+		# the code that asks for the value, which its tracebacks show
+		if self.context is None:
+			return None
+		if self.is_running:
+			raise RuntimeFailure(RunTimeError(span.position_start, span.position_end, f"Generator '{self.function.name}' is already running", context))
+		self.context.parent = context
+		self.context.parent_entry_span = span
+
+		self.is_running = True
+		self.is_suspended = False
+		try:
+			value = self.machine.run(self.function.code, self.context, self.index, self.stack, self.loops)
+		except LoopSignal:
+			value = None
+		finally:
+			# Only a yield keeps the generator going: a return, an error or the end of the body finish it
+			self.is_running = False
+			if not self.is_suspended:
+				self.context = None
+		return value if self.is_suspended else None
+
+	def suspend(self, index, stack, loops, context):
+		self.index = index
+		self.stack = stack
+		self.loops = loops
+		self.context = context
+		self.is_suspended = True
+
+	def iterate(self, span, context):
+		return self.values(span, context), None
+
+	def values(self, span, context):
+		while True:
+			value = self.resume(span, context)
+			if value is None:
+				return
+			yield value
+
+	def is_true(self):
+		return True
+
+	def __repr__(self):
+		return f"<generator {self.function.name}>"
+
+###########################################
+# VIRTUAL MACHINE
+###########################################
+
+class Loop:
+	__slots__ = ('stack_height', 'continue_target', 'break_target', 'is_counted', 'in_body', 'last_value', 'index', 'end_value', 'step', 'ascending', 'iterator')
+
+	def __init__(self, stack_height, continue_target, break_target, is_counted):
+		self.stack_height = stack_height
+		self.continue_target = continue_target
+		self.break_target = break_target
+		self.is_counted = is_counted
+		self.in_body = is_counted
+		self.last_value = None
+
+class VirtualMachine:
+	# The generator whose body this machine runs, if any: a yield hands it the machine's place
+	generator = None
+
+	def execute_program(self, node, context):
+		code = Compiler().compile_program(node)
+		try:
+			return self.run(code, context), None
+		except RuntimeFailure as failure:
+			return None, failure.error
+		except LoopSignal:
+			return None, None
+
+	def call(self, function, arguments, span, context):
+		return self.run(function.code, self.new_frame(function, arguments, span, context))
+
+	def new_frame(self, function, arguments, span, context):
+		argument_names = function.argument_names
+		if len(arguments) != len(argument_names):
+			function.check_arguments(argument_names, arguments, span, context)
+
+		execution_context = function.generate_new_context(span, context)
+		slots = execution_context.slots
+		for argument_slot, argument_value in zip(function.scope.argument_slots, arguments):
+			slots[argument_slot] = argument_value
+		return execution_context
+
+	def unwind(self, frame, frames, should_break):
+		# A signal raised while a while loop evaluates its condition belongs to the enclosing loop,
+		# and one raised outside the loops of a function carries on into its caller
+		while True:
+			instructions, index, stack, loops, context = frame
+			while loops and not loops[-1].in_body:
+				loops.pop()
+			if loops:
+				break
+			if not frames:
+				raise LoopSignal(should_break)
+			frame = frames.pop()
+
+		loop = loops[-1]
+		del stack[loop.stack_height:]
+		if should_break:
+			index = loop.break_target
+		else:
+			loop.in_body = loop.is_counted
+			index = loop.continue_target
+		return instructions, index, stack, loops, context
+
+	def run(self, code, context, index=0, stack=None, loops=None):
+		# Calls between compiled functions switch frames inside this loop instead of recursing, so
+		# the depth of the program's call stack is not bounded by Python's. Loop counters and
+		# arithmetic results are built field by field: going through the constructor costs more
+		# than the rest of an instruction. A generator passes in the place its last yield left
+		new_value = Value.__new__
+		frames = []
+		instructions = code.instructions
+		stack = [] if stack is None else stack
+		loops = [] if loops is None else loops
+
+		while True:
+			slots = context.slots
+			symbol_table = context.symbol_table
+			symbols = symbol_table.symbols
+			lookup = symbols.get
+			parent_table = symbol_table.parent
+			push = stack.append
+			pop = stack.pop
+
+			while True:
+				opcode, argument = instructions[index]
+				index += 1
+
+				if opcode == OP_LOAD_NAME:
+					slot, address, name, node = argument
+					value = slots[slot] if slot is not None else context.lookup(address, name) if address else None
+					if value is None:
+						value = lookup(name)
+						if value is None and parent_table:
+							value = parent_table.get(name)
+					if value is None:
+						value = context.lookup_in_callers(name)
+					if value is None:
+						raise RuntimeFailure(RunTimeError(node.position_start, node.position_end, f"'{name}' is not defined", context))
+					push(value)
+
+				elif opcode == OP_LOAD_CONSTANT:
+					push(argument)
+
+				elif opcode == OP_BINARY:
+					method_name, number_operation, node = argument
+					right = pop()
+					left = pop()
+					if type(left) is Number and type(right) is Number:
+						try:
+							result = new_value(Number)
+							result.value = number_operation(left.value, right.value)
+							result.error = None
+							push(result)
+							continue
+						except ArithmeticError:
+							pass
+					result, error = getattr(left, method_name)(right)
+					if error:
+						raise RuntimeFailure(error.locate(node, node.right_node, context))
+					push(result)
+
+				elif opcode == OP_POP:
+					pop()
+
+				elif opcode == OP_JUMP_IF_FALSE:
+					value = pop()
+					if not (value.value != 0 if type(value) is Number else value.is_true()):
+						index = argument
+
+				elif opcode == OP_JUMP:
+					index = argument
+
+				elif opcode == OP_SHORT_CIRCUIT:
+					value = stack[-1]
+					if type(value) is Number and (value.value != 0) is argument[1]:
+						index = argument[0]
+
+				elif opcode == OP_STORE_LOCAL:
+					slots[argument] = stack[-1]
+
+				elif opcode == OP_STORE_NAME:
+					symbols[argument] = stack[-1]
+
+				elif opcode == OP_FOR_ITER:
+					slot, name = argument
+					loop = loops[-1]
+					value = loop.index
+					if (value < loop.end_value.value) if loop.ascending else (value > loop.end_value.value):
+						number = new_value(Number)
+						number.value = value
+						number.error = None
+						if slot is None:
+							symbols[name] = number
+						else:
+							slots[slot] = number
+						loop.index = value + loop.step
+					else:
+						index = loop.break_target
+
+				elif opcode == OP_CALL or opcode == OP_TAIL_CALL:
+					argument_count, node = argument
+					if argument_count:
+						arguments = stack[-argument_count:]
+						del stack[-argument_count:]
+					else:
+						arguments = []
+					value_to_call = pop()
+
+					if type(value_to_call) is CompiledFunction:
+						execution_context = self.new_frame(value_to_call, arguments, node, context)
+						if opcode == OP_CALL:
+							frames.append((instructions, index, stack, loops, context))
+						else:
+							# The callee takes over this frame and returns straight to its caller
+							execution_context.parent = context.parent
+							execution_context.parent_entry_span = context.parent_entry_span
+						context = execution_context
+						instructions = value_to_call.code.instructions
+						index = 0
+						stack = []
+						loops = []
+						break
+
+					try:
+						push(value_to_call.execute(arguments, node, context))
+					except LoopSignal as signal:
+						instructions, index, stack, loops, context = self.unwind((instructions, index, stack, loops, context), frames, signal.should_break)
+						break
+
+				elif opcode == OP_LOOP_KEEP:
+					loops[-1].last_value = pop()
+
+				elif opcode == OP_RETURN:
+					value = pop()
+					if not frames:
+						return value
+					instructions, index, stack, loops, context = frames.pop()
+					stack.append(value)
+					break
+
+				elif opcode == OP_LOAD_NULL:
+					push(Number.null)
+
+				elif opcode == OP_UNARY:
+					kind, node = argument
+					value = pop()
+					error = None
+					if kind == UNARY_NEGATE:
+						value, error = value.multed_by(Number(-1))
+					elif kind == UNARY_NOT:
+						value, error = value.notted()
+					if error:
+						raise RuntimeFailure(error.locate(node.node, node.node, context))
+					push(value)
+
+				elif opcode == OP_BUILD_LIST:
+					if argument:
+						elements = stack[-argument:]
+						del stack[-argument:]
+					else:
+						elements = []
+					push(List(elements))
+
+				elif opcode == OP_BUILD_MAP:
+					count, node = argument
+					if count:
+						values = stack[-2 * count:]
+						del stack[-2 * count:]
+					else:
+						values = []
+					push(build_map(node, zip(values[0::2], values[1::2]), context))
+
+				elif opcode == OP_FOR_SETUP:
+					has_step, continue_target, break_target = argument
+					step = pop().value if has_step else 1
+					end_value = pop()
+					start_value = pop()
+					loop = Loop(len(stack), continue_target, break_target, True)
+					loop.index = start_value.value
+					loop.end_value = end_value
+					loop.step = step
+					loop.ascending = step >= 0
+					loops.append(loop)
+
+				elif opcode == OP_WHILE_SETUP:
+					continue_target, break_target = argument
+					loops.append(Loop(len(stack), continue_target, break_target, False))
+
+				elif opcode == OP_WHILE_TEST:
+					if pop().is_true():
+						loops[-1].in_body = True
+					else:
+						index = argument
+
+				elif opcode == OP_WHILE_NEXT:
+					loops[-1].in_body = False
+					index = argument
+
+				elif opcode == OP_LOOP_END:
+					loop = loops.pop()
+					push(Number.null if argument or loop.last_value is None else loop.last_value)
+
+				elif opcode == OP_BREAK or opcode == OP_CONTINUE:
+					instructions, index, stack, loops, context = self.unwind((instructions, index, stack, loops, context), frames, opcode == OP_BREAK)
+					break
+
+				elif opcode == OP_ITER_SETUP:
+					continue_target, break_target, node = argument
+					values, error = pop().iterate(node.iterable_node, context)
+					if error:
+						raise RuntimeFailure(error.locate(node.iterable_node, node.iterable_node, context))
+					loop = Loop(len(stack), continue_target, break_target, True)
+					loop.iterator = values
+					loops.append(loop)
+
+				elif opcode == OP_ITER_NEXT:
+					slot, name = argument
+					loop = loops[-1]
+					value = next(loop.iterator, None)
+					if value is None:
+						index = loop.break_target
+					elif slot is None:
+						symbols[name] = value
+					else:
+						slots[slot] = value
+
+				elif opcode == OP_YIELD:
+					value = pop()
+					if self.generator is None:
+						raise RuntimeFailure(RunTimeError(argument.position_start, argument.position_end, YIELD_OUTSIDE_FUNCTION_DETAILS, context))
+					# The yield itself evaluates to null when the generator carries on
+					push(Number.null)
+					self.generator.suspend(index, stack, loops, context)
+					return value
+
+				elif opcode == OP_MAKE_FUNCTION:
+					function_name, slot, argument_names, function_code, node = argument
+					function_type = GeneratorFunction if node.scope.is_generator else CompiledFunction
+					function = function_type(function_name, node.body_node, argument_names, node.should_auto_return, node.scope, context, function_code)
+					if function_name:
+						if slot is None:
+							symbols[function_name] = function
+						else:
+							slots[slot] = function
+					push(function)
+
+				elif opcode == OP_HALT:
+					return None
+
+				else:
+					raise Exception(f'Unknown opcode {opcode}')